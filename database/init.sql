@@ -104,6 +104,8 @@ CREATE TABLE IF NOT EXISTS matches (
 CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(data);
 CREATE INDEX IF NOT EXISTS idx_matches_home_team ON matches(home_team_id);
 CREATE INDEX IF NOT EXISTS idx_matches_away_team ON matches(away_team_id);
+-- Partidas por competição (/api/stats) sem varrer a tabela inteira
+CREATE INDEX IF NOT EXISTS idx_matches_liga_sofascore ON matches(liga) WHERE sofascore_event_id IS NOT NULL;
 
 -- ==================== JOGADORES ====================
 
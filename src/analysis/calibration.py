@@ -8,7 +8,6 @@ Verifica se as probabilidades são realistas:
 Se não, ajustamos os parâmetros.
 """
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
@@ -16,6 +15,7 @@ import numpy as np
 from collections import defaultdict
 
 from src.analysis.predictions import MatchPredictor
+from src.core import db
 
 
 @dataclass
@@ -77,7 +77,7 @@ class ModelCalibrator:
         self.predictor = predictor
     
     def get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return db.connect(self.db_config)
     
     def calibrate(
         self,
@@ -103,6 +103,7 @@ class ModelCalibrator:
         cursor.execute("""
             SELECT 
                 m.id,
+                m.data,
                 m.home_team_id AS mandante_id,
                 m.away_team_id AS visitante_id,
                 m.home_goals    AS gols_mandante,
@@ -130,11 +131,13 @@ class ModelCalibrator:
         
         for jogo in jogos:
             try:
-                # Fazer previsão
+                # Fazer previsão só com dados anteriores ao jogo (sem vazamento)
                 pred = self.predictor.predict_quick(
                     jogo['mandante_id'],
                     jogo['visitante_id'],
-                    league_id
+                    league_id,
+                    temporada=temporada,
+                    as_of=jogo['data']
                 )
                 
                 # Resultado real
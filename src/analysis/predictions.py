@@ -9,19 +9,42 @@ Orquestra todo o pipeline:
 5. Retorna previsões completas
 """
 
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 import json
+import os
+import queue
+import threading
+import time
+import numpy as np
 
+from src.core import artifact, metrics
 from src.core.league_stats import LeagueStats
 from src.core.team_model import TeamModel
 from src.core.player_model import PlayerModel
-from src.engine.parameters import ParameterCalculator, MatchParameters
-from src.engine.context import MatchContext, ContextAdjuster
+from src.engine.parameters import ParameterCalculator, MatchParameters, PredictionContext
+from src.engine.context import MatchContext, ContextAdjuster, PARAM_COLUMNS, params_to_array
 from src.engine.lineup_adjuster import LineupAdjuster
 from src.engine.monte_carlo import MonteCarloSimulator, SimulationResult
 
 
+STAGE_SECONDS = metrics.histogram(
+    'prediction_stage_seconds', 'Duração de cada etapa do pipeline de previsão', ['etapa']
+)
+
+
+def _observe_stages(timings_ms: Dict[str, float], *etapas: str) -> None:
+    """Registra etapas de timings_ms (em ms) no histograma de etapas."""
+    for etapa in etapas:
+        if etapa in timings_ms:
+            STAGE_SECONDS.observe(timings_ms[etapa] / 1000, etapa=etapa)
+
+
+class _StreamCancelado(Exception):
+    """Interrompe simulações de um predict_stream cujo consumidor saiu."""
+
+
 @dataclass
 class MatchPrediction:
     """Previsão completa para uma partida."""
@@ -45,6 +68,9 @@ class MatchPrediction:
     com_escalacao: bool = False
     warnings: List[str] = field(default_factory=list)
     
+    # Tempo de cada etapa do pipeline (ms)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    
     def to_dict(self) -> dict:
         """Converte para dicionário completo."""
         return {
@@ -58,7 +84,8 @@ class MatchPrediction:
             'previsao': self.simulation.to_dict(),
             'confianca': round(self.confianca * 100, 1),
             'com_escalacao': self.com_escalacao,
-            'warnings': self.warnings or []
+            'warnings': self.warnings or [],
+            'timings_ms': {k: round(v, 2) for k, v in self.timings_ms.items()}
         }
     
     def resumo(self) -> dict:
@@ -114,6 +141,84 @@ class MatchPredictor:
         self.context_adjuster = ContextAdjuster()
         self.lineup_adjuster = LineupAdjuster(self.player_model)
         self.simulator = MonteCarloSimulator(n_simulations)
+        self.snapshot = None
+    
+    @classmethod
+    def from_artifact(
+        cls,
+        path: str,
+        db_config: Optional[dict] = None,
+        n_simulations: int = 100_000
+    ) -> 'MatchPredictor':
+        """
+        Preditor a partir de um artefato compilado (src.core.artifact).
+        
+        Args:
+            path: Arquivo .npz
+            db_config: Banco para o que não estiver no artefato; None = sem
+                       banco (times/ligas fora do artefato geram erro)
+        """
+        predictor = cls(db_config, n_simulations=n_simulations)
+        predictor.attach_snapshot(artifact.load(path))
+        return predictor
+    
+    def attach_snapshot(self, store) -> None:
+        """
+        Passa a ler médias, forças e ratings de um snapshot (SnapshotStore
+        ou LeagueSnapshot de src.core.snapshot) em vez de carregar do banco
+        em cada processo. O que não estiver no snapshot segue o caminho
+        normal. None desanexa.
+        """
+        self.snapshot = store
+        self.league_stats.snapshot = store
+        self.team_model.snapshot = store
+        self.player_model.snapshot = store
+    
+    def warm_up(
+        self,
+        league_id: int,
+        temporada: str = "2025",
+        n_simulations: int = 10_000
+    ) -> Dict[str, float]:
+        """
+        Deixa o preditor pronto para servir: carrega em memória médias da
+        liga, força de todos os times e ratings de jogadores, e roda uma
+        previsão completa (primeiras chamadas de NumPy/SciPy, conexões do
+        pool abertas).
+        
+        Returns:
+            Duração (ms) de cada etapa e o total
+        """
+        timings = {}
+        inicio = etapa = time.perf_counter()
+        
+        def _marcar(nome: str):
+            nonlocal etapa
+            agora = time.perf_counter()
+            timings[nome] = (agora - etapa) * 1000
+            etapa = agora
+        
+        self.league_stats.calculate_averages(league_id, temporada)
+        self.league_stats.get_distribution_prefs(league_id, temporada)
+        _marcar('liga')
+        
+        strengths = self.team_model.preload_league(league_id, temporada)
+        _marcar('times')
+        
+        if self.snapshot is None or self.snapshot.current() is None:
+            self.player_model.refresh(force=True)
+        _marcar('jogadores')
+        
+        # Previsão real com dois times da liga (ou só o simulador, se vazia)
+        ids = list(strengths)[:2]
+        if len(ids) == 2:
+            self.predict(ids[0], ids[1], league_id, temporada, n_simulations=n_simulations)
+        else:
+            self.simulator.simulate(1.5, 1.1, n_simulations=n_simulations)
+        _marcar('simulacao')
+        
+        timings['total'] = (time.perf_counter() - inicio) * 1000
+        return timings
     
     def predict(
         self,
@@ -125,7 +230,8 @@ class MatchPredictor:
         lineup_mandante: Optional[List[int]] = None,
         lineup_visitante: Optional[List[int]] = None,
         lineup_confidence_mandante: float = 1.0,
-        lineup_confidence_visitante: float = 1.0
+        lineup_confidence_visitante: float = 1.0,
+        n_simulations: Optional[int] = None
     ) -> MatchPrediction:
         """
         Gera previsão completa para uma partida.
@@ -138,41 +244,69 @@ class MatchPredictor:
             context: Contexto da partida (opcional)
             lineup_mandante: Escalação do mandante (opcional)
             lineup_visitante: Escalação do visitante (opcional)
+            n_simulations: Simulações desta previsão (padrão: o do preditor)
             
         Returns:
             MatchPrediction com previsão completa
         """
-        # 0. Âncoras da liga (usadas em overdispersão e warnings)
-        league_avg = self.league_stats.calculate_averages(league_id, temporada)
-
-        # 1. Calcular parâmetros base
-        params = self.param_calculator.calculate(
+        inicio = time.perf_counter()
+        
+        # 0. Âncoras da liga, forças dos times e overdispersão (uma vez só)
+        ctx = self.param_calculator.load_context(
             mandante_id, visitante_id, league_id, temporada
         )
+        carregamento = (time.perf_counter() - inicio) * 1000
         
-        # 1.1 Overdispersão específica por mercado (gols/cartões/escanteios)
-        overdisp = self.league_stats.get_overdispersion_by_market(league_id, temporada)
-        distribution_prefs = {
-            'gols': overdisp['gols']['recomendacao'],
-            'cartoes': overdisp['cartoes']['recomendacao'],
-            'escanteios': overdisp['escanteios']['recomendacao']
-        }
-        params.base_params['distribution_prefs'] = distribution_prefs
+        prediction = self.predict_from_context(
+            ctx,
+            context=context,
+            lineup_mandante=lineup_mandante,
+            lineup_visitante=lineup_visitante,
+            lineup_confidence_mandante=lineup_confidence_mandante,
+            lineup_confidence_visitante=lineup_confidence_visitante,
+            n_simulations=n_simulations
+        )
+        prediction.timings_ms = {'carregamento': carregamento, **prediction.timings_ms}
+        prediction.timings_ms['total'] = (time.perf_counter() - inicio) * 1000
+        _observe_stages(prediction.timings_ms, 'carregamento', 'total')
+        return prediction
+    
+    def predict_from_context(
+        self,
+        ctx: PredictionContext,
+        context: Optional[MatchContext] = None,
+        lineup_mandante: Optional[List[int]] = None,
+        lineup_visitante: Optional[List[int]] = None,
+        lineup_confidence_mandante: float = 1.0,
+        lineup_confidence_visitante: float = 1.0,
+        rng=None,
+        n_simulations: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        on_chunk=None
+    ) -> MatchPrediction:
+        """
+        Previsão a partir de um PredictionContext já carregado (sem novas
+        consultas de liga/times).
         
-        # Converter para dict para ajustes
-        params_dict = {
-            'lambda_mandante': params.lambda_mandante,
-            'lambda_visitante': params.lambda_visitante,
-            'mu_mandante': params.mu_mandante,
-            'mu_visitante': params.mu_visitante,
-            'kappa_mandante': params.kappa_mandante,
-            'kappa_visitante': params.kappa_visitante,
-            'distribution_prefs': distribution_prefs
-        }
+        Args:
+            rng: Gerador aleatório próprio (np.random.Generator) para simular
+                 em paralelo; None usa o estado global
+            n_simulations: Simulações desta previsão (padrão: o do preditor)
+            chunk_size, on_chunk: Estimativas parciais durante a simulação
+                                  (ver MonteCarloSimulator.simulate)
+        """
+        timings = {}
+        inicio = etapa = time.perf_counter()
         
-        # 2. Ajustar por contexto
-        if context:
-            params_dict = self.context_adjuster.adjust_parameters(params_dict, context)
+        def _marcar(nome: str):
+            nonlocal etapa
+            agora = time.perf_counter()
+            timings[nome] = (agora - etapa) * 1000
+            etapa = agora
+        
+        # 1-2. Parâmetros base ajustados por contexto
+        params, params_dict = self._base_parameters(ctx, context)
+        _marcar('parametros')
         
         # 3. Ajustar por escalação
         com_escalacao = False
@@ -187,58 +321,130 @@ class MatchPredictor:
             com_escalacao = True
             params.lineup_adjustments = params_dict.get('lineup_ratios', {})
             params.lineup_adjustments['lineup_confidence'] = params_dict.get('lineup_confidence', {})
+        _marcar('escalacao')
         
         # 4. Rodar Monte Carlo
-        simulation = self.simulator.simulate_from_params(params_dict)
+        simulation = self.simulator.simulate_from_params(
+            params_dict,
+            rng=rng,
+            n_simulations=n_simulations,
+            chunk_size=chunk_size,
+            on_chunk=on_chunk
+        )
+        _marcar('simulacao')
         
-        # 5. Buscar nomes dos times
-        mandante = self.team_model.calculate_team_strength(mandante_id, league_id)
-        visitante = self.team_model.calculate_team_strength(visitante_id, league_id)
-
-        warnings = self._build_warnings(league_id, mandante, visitante, league_avg)
+        warnings = self._build_warnings(ctx)
+        timings['total'] = (time.perf_counter() - inicio) * 1000
+        _observe_stages(timings, 'parametros', 'escalacao', 'simulacao')
         
         return MatchPrediction(
-            mandante=mandante.team_name,
-            visitante=visitante.team_name,
-            mandante_id=mandante_id,
-            visitante_id=visitante_id,
+            mandante=ctx.mandante.team_name,
+            visitante=ctx.visitante.team_name,
+            mandante_id=ctx.mandante.team_id,
+            visitante_id=ctx.visitante.team_id,
             parameters=params,
             simulation=simulation,
             confianca=params.confianca,
             com_escalacao=com_escalacao,
-            warnings=warnings
+            warnings=warnings,
+            timings_ms=timings
         )
     
+    def _base_parameters(
+        self,
+        ctx: PredictionContext,
+        context: Optional[MatchContext] = None
+    ):
+        """Parâmetros base (λ, μ, κ) + preferências de distribuição, ajustados por contexto."""
+        # 1. Calcular parâmetros base (com overdispersão por mercado já carregada)
+        params = self.param_calculator.calculate_from_context(ctx)
+        
+        # Converter para dict para ajustes
+        params_dict = {
+            'lambda_mandante': params.lambda_mandante,
+            'lambda_visitante': params.lambda_visitante,
+            'mu_mandante': params.mu_mandante,
+            'mu_visitante': params.mu_visitante,
+            'kappa_mandante': params.kappa_mandante,
+            'kappa_visitante': params.kappa_visitante,
+            'distribution_prefs': ctx.distribution_prefs
+        }
+        
+        # 2. Ajustar por contexto
+        if context:
+            params_dict = self.context_adjuster.adjust_parameters(params_dict, context)
+        
+        return params, params_dict
+    
+    def absence_impact(
+        self,
+        mandante_id: int,
+        visitante_id: int,
+        league_id: int,
+        temporada: str = "2025",
+        context: Optional[MatchContext] = None,
+        lineup_mandante: Optional[List[int]] = None,
+        lineup_visitante: Optional[List[int]] = None
+    ) -> dict:
+        """
+        Matriz de impacto de ausências: efeito em cada mercado de tirar
+        cada jogador (dos dois elencos, ou das escalações informadas).
+        
+        Precificação analítica em lote: não roda Monte Carlo por cenário.
+        """
+        ctx = self.param_calculator.load_context(
+            mandante_id, visitante_id, league_id, temporada
+        )
+        _, params_dict = self._base_parameters(ctx, context)
+        impacto = self.lineup_adjuster.absence_impact(
+            params_dict, mandante_id, visitante_id, lineup_mandante, lineup_visitante
+        )
+        
+        return {
+            'partida': f"{ctx.mandante.team_name} x {ctx.visitante.team_name}",
+            'com_escalacao': bool(lineup_mandante or lineup_visitante),
+            **impacto
+        }
+    
     def predict_quick(
         self,
         mandante_id: int,
         visitante_id: int,
-        league_id: int
+        league_id: int,
+        temporada: str = "2025",
+        as_of=None,
+        n_simulations: Optional[int] = None
     ) -> dict:
         """
         Previsão rápida (só probabilidades de resultado).
+        
+        Args:
+            as_of: Se informado, usa apenas jogos anteriores a essa data
+                   (médias e forças "as-of", sem vazamento para backtests)
+            n_simulations: Simulações desta chamada (padrão: o do preditor)
         """
-        params = self.param_calculator.calculate(mandante_id, visitante_id, league_id)
+        ctx = self.param_calculator.load_context(
+            mandante_id, visitante_id, league_id, temporada, as_of=as_of
+        )
+        params = self.param_calculator.calculate_from_context(ctx)
         
         result = self.simulator.quick_simulate(
             params.lambda_mandante,
-            params.lambda_visitante
+            params.lambda_visitante,
+            n_simulations=n_simulations
         )
         
-        mandante = self.team_model.calculate_team_strength(mandante_id, league_id)
-        visitante = self.team_model.calculate_team_strength(visitante_id, league_id)
-        
         return {
-            'partida': f"{mandante.team_name} x {visitante.team_name}",
+            'partida': f"{ctx.mandante.team_name} x {ctx.visitante.team_name}",
             **result
         }
 
-    def _build_warnings(self, league_id: int, mandante, visitante, league_avg) -> List[str]:
+    def _build_warnings(self, ctx: PredictionContext) -> List[str]:
         """Gera avisos de qualidade dos dados para transparência."""
         warnings = []
-        if league_avg.total_jogos < 50:
+        if ctx.league_avg.total_jogos < 50:
             warnings.append("Poucos jogos na liga: âncora pode estar instável.")
-        for side, team in [('Mandante', mandante), ('Visitante', visitante)]:
+        for side, team in [('Mandante', ctx.mandante), ('Visitante', ctx.visitante)]:
             jogos = team.jogos_casa + team.jogos_fora
             if jogos < 8:
                 warnings.append(f"{side}: apenas {jogos} jogos; regressão à média alta.")
@@ -249,28 +455,337 @@ class MatchPredictor:
     def predict_round(
         self,
         matches: List[Dict],
-        league_id: int
+        league_id: int,
+        temporada: str = "2025",
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        n_simulations: Optional[int] = None
     ) -> List[MatchPrediction]:
         """
-        Prevê todas as partidas de uma rodada.
+        Prevê todas as partidas de uma rodada em paralelo.
+        
+        1. Carrega uma vez o estado da liga: médias, força de todos os
+           times, overdispersão e ratings de jogadores
+        2. Distribui parâmetros + simulação em um pool de threads; cada
+           partida usa seu próprio gerador aleatório (o numpy libera o GIL
+           durante o sorteio, então as simulações rodam de fato em paralelo)
         
         Args:
-            matches: Lista de dicts com mandante_id, visitante_id
+            matches: Lista de dicts com mandante_id, visitante_id e,
+                     opcionalmente, context, lineup_mandante, lineup_visitante,
+                     lineup_confidence_mandante, lineup_confidence_visitante
             league_id: ID da liga
+            temporada: Temporada
+            max_workers: Tamanho do pool (padrão: nº de CPUs)
+            seed: Seed para resultados reprodutíveis
+            n_simulations: Simulações por partida (padrão: o do preditor)
             
         Returns:
-            Lista de previsões
+            Lista de previsões na mesma ordem de `matches`, com
+            timings_ms por partida
         """
-        predictions = []
-        for match in matches:
-            pred = self.predict(
-                mandante_id=match['mandante_id'],
-                visitante_id=match['visitante_id'],
-                league_id=league_id
+        if not matches:
+            return []
+        
+        # 1. Estado da liga (uma vez para a rodada inteira)
+        load_context = self._preload_round(matches, league_id, temporada)
+        seeds = np.random.SeedSequence(seed).spawn(len(matches))
+        
+        def _predict(i: int) -> MatchPrediction:
+            match = matches[i]
+            inicio = time.perf_counter()
+            ctx = load_context(match)
+            carregamento = (time.perf_counter() - inicio) * 1000
+            
+            prediction = self.predict_from_context(
+                ctx,
+                context=match.get('context'),
+                lineup_mandante=match.get('lineup_mandante'),
+                lineup_visitante=match.get('lineup_visitante'),
+                lineup_confidence_mandante=match.get('lineup_confidence_mandante', 1.0),
+                lineup_confidence_visitante=match.get('lineup_confidence_visitante', 1.0),
+                rng=np.random.default_rng(seeds[i]),
+                n_simulations=n_simulations
             )
-            predictions.append(pred)
+            prediction.timings_ms = {'carregamento': carregamento, **prediction.timings_ms}
+            prediction.timings_ms['total'] = (time.perf_counter() - inicio) * 1000
+            _observe_stages(prediction.timings_ms, 'carregamento', 'total')
+            return prediction
+        
+        workers = max_workers or min(len(matches), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map preserva a ordem de entrada
+            return list(pool.map(_predict, range(len(matches))))
+    
+    def predict_stream(
+        self,
+        matches: List[Dict],
+        league_id: int,
+        temporada: str = "2025",
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        n_simulations: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+        executor: Optional[Executor] = None
+    ) -> Iterator[Dict]:
+        """
+        Previsões de uma rodada como sequência de eventos, emitidos assim
+        que ficam prontos (ordem de conclusão, não de entrada).
+        
+        Eventos (dicts com a chave 'evento'):
+        - inicio: {'partidas'}
+        - parcial: {'indice', 'partida', 'simulacoes', 'estimativas',
+          'erro_padrao'} a cada bloco de chunk_size simulações (só se
+          chunk_size for informado); probabilidades em 0-1
+        - partida: {'indice', 'previsao'} com o mesmo conteúdo de
+          MatchPrediction.to_dict()
+        - erro: {'indice', 'detalhe'} se uma partida falhar
+        - fim: {'partidas', 'erros', 'duracao_ms'}
+        
+        Fechar o gerador ou sinalizar `cancel` (ex: cliente desconectou)
+        interrompe as simulações em andamento no próximo bloco.
         
-        return predictions
+        Args:
+            matches: Como em predict_round
+            chunk_size: Simulações por bloco para estimativas parciais
+            cancel: Evento para cancelar de outra thread
+            max_workers: Partidas simulando ao mesmo tempo (padrão: nº de CPUs)
+            executor: Onde rodar as simulações (ex: o pool limitado da API);
+                      padrão: pool próprio com max_workers threads
+        """
+        inicio = time.perf_counter()
+        if not matches:
+            yield {'evento': 'inicio', 'partidas': 0}
+            yield {'evento': 'fim', 'partidas': 0, 'erros': 0, 'duracao_ms': 0.0}
+            return
+        
+        # Carga da liga e primeiras partidas enviadas ao executor antes do
+        # evento inicio: falhas aqui saem no primeiro next(), quem consome
+        # ainda pode responder com erro em vez de interromper o stream
+        load_context = self._preload_round(matches, league_id, temporada)
+        seeds = np.random.SeedSequence(seed).spawn(len(matches))
+        eventos: queue.Queue = queue.Queue()
+        cancelado = cancel or threading.Event()
+        
+        def _predict(i: int) -> None:
+            match = matches[i]
+            if cancelado.is_set():
+                eventos.put(None)
+                return
+            try:
+                ctx = load_context(match)
+                nome = f"{ctx.mandante.team_name} x {ctx.visitante.team_name}"
+                
+                def _parcial(simulacoes: int, estimativas: Dict, erros: Dict) -> None:
+                    if cancelado.is_set():
+                        raise _StreamCancelado()
+                    eventos.put({
+                        'evento': 'parcial',
+                        'indice': i,
+                        'partida': nome,
+                        'simulacoes': simulacoes,
+                        'estimativas': {k: round(v, 4) for k, v in estimativas.items()},
+                        'erro_padrao': {k: round(v, 4) for k, v in erros.items()}
+                    })
+                
+                prediction = self.predict_from_context(
+                    ctx,
+                    context=match.get('context'),
+                    lineup_mandante=match.get('lineup_mandante'),
+                    lineup_visitante=match.get('lineup_visitante'),
+                    lineup_confidence_mandante=match.get('lineup_confidence_mandante', 1.0),
+                    lineup_confidence_visitante=match.get('lineup_confidence_visitante', 1.0),
+                    rng=np.random.default_rng(seeds[i]),
+                    n_simulations=n_simulations,
+                    chunk_size=chunk_size,
+                    on_chunk=_parcial if chunk_size else None
+                )
+                eventos.put({'evento': 'partida', 'indice': i, 'previsao': prediction.to_dict()})
+            except _StreamCancelado:
+                eventos.put(None)
+                return
+            except Exception as e:
+                eventos.put({'evento': 'erro', 'indice': i, 'detalhe': str(e)})
+            eventos.put(None)
+        
+        # No máximo em_voo partidas no executor por vez (a próxima entra quando
+        # uma termina): uma rodada grande não ocupa a fila inteira de um pool compartilhado
+        em_voo = max_workers or min(len(matches), os.cpu_count() or 1)
+        pool = None
+        if executor is None:
+            pool = executor = ThreadPoolExecutor(max_workers=em_voo)
+        futures = []
+        try:
+            proxima = min(em_voo, len(matches))
+            for i in range(proxima):
+                futures.append(executor.submit(_predict, i))
+            yield {'evento': 'inicio', 'partidas': len(matches)}
+            
+            # Cada partida termina com um None na fila
+            restantes, erros = len(matches), 0
+            while restantes:
+                evento = eventos.get()
+                if evento is None:
+                    restantes -= 1
+                    if proxima < len(matches):
+                        try:
+                            futures.append(executor.submit(_predict, proxima))
+                        except Exception as e:
+                            # Executor recusou (ex: fila cheia): a partida sai como erro
+                            eventos.put({'evento': 'erro', 'indice': proxima, 'detalhe': str(e)})
+                            eventos.put(None)
+                        proxima += 1
+                    continue
+                erros += evento['evento'] == 'erro'
+                yield evento
+            
+            yield {
+                'evento': 'fim',
+                'partidas': len(matches),
+                'erros': erros,
+                'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1)
+            }
+        finally:
+            cancelado.set()
+            for future in futures:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    
+    def _preload_round(self, matches: List[Dict], league_id: int, temporada: str):
+        """
+        Carrega uma vez o estado da liga (médias, força de todos os times,
+        overdispersão e ratings de jogadores) para várias partidas.
+        
+        Returns:
+            Função partida -> PredictionContext, sem novas consultas para
+            times da liga
+        """
+        strengths = self.team_model.preload_league(league_id, temporada)
+        league_avg = self.league_stats.calculate_averages(league_id, temporada)
+        distribution_prefs = self.league_stats.get_distribution_prefs(league_id, temporada)
+        if self.snapshot is None and any(
+            m.get('lineup_mandante') or m.get('lineup_visitante') for m in matches
+        ):
+            self.player_model.refresh()
+        
+        def load_context(match: Dict) -> PredictionContext:
+            mandante_id, visitante_id = match['mandante_id'], match['visitante_id']
+            if mandante_id in strengths and visitante_id in strengths:
+                return PredictionContext(
+                    league_id=league_id,
+                    temporada=temporada,
+                    league_avg=league_avg,
+                    mandante=strengths[mandante_id],
+                    visitante=strengths[visitante_id],
+                    distribution_prefs=distribution_prefs
+                )
+            # Time de fora da liga: carrega individualmente
+            return self.param_calculator.load_context(
+                mandante_id, visitante_id, league_id, temporada
+            )
+        
+        return load_context
+    
+    def predict_batch(
+        self,
+        matches: List[Dict],
+        league_id: int,
+        temporada: str = "2025",
+        seed: Optional[int] = None,
+        n_simulations: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Previsão de várias partidas em formato colunar.
+        
+        Parâmetros de todas as partidas são montados a partir do estado da
+        liga carregado uma vez e simulados juntos (simulate_batch), sem
+        criar um SimulationResult por partida.
+        
+        Args:
+            matches: Lista de dicts com mandante_id, visitante_id e,
+                     opcionalmente, context, lineup_mandante, lineup_visitante,
+                     lineup_confidence_mandante, lineup_confidence_visitante
+            league_id: ID da liga
+            temporada: Temporada
+            seed: Seed para resultados reprodutíveis
+            n_simulations: Simulações por partida (padrão: o do preditor)
+            
+        Returns:
+            Dict coluna -> np.ndarray com uma linha por partida (mesma ordem
+            de `matches`): ids, nomes, confiança, parâmetros e mercados
+            (probabilidades 0-1 e médias)
+        """
+        colunas = {nome: [] for nome in (
+            'mandante_id', 'visitante_id', 'mandante', 'visitante',
+            'confianca', 'com_escalacao', *PARAM_COLUMNS
+        )}
+        if not matches:
+            return {nome: np.array([]) for nome in colunas}
+        
+        load_context = self._preload_round(matches, league_id, temporada)
+        # Mesmas preferências para o lote inteiro (estado da liga já carregado)
+        distribution_prefs = self.league_stats.get_distribution_prefs(league_id, temporada)
+        
+        # 1. Parâmetros base de cada partida → matriz (N × 6)
+        contexts = [load_context(match) for match in matches]
+        base = [self.param_calculator.calculate_from_context(ctx) for ctx in contexts]
+        matriz = params_to_array([{col: getattr(params, col) for col in PARAM_COLUMNS} for params in base])
+        
+        # 2. Contexto da partida: uma multiplicação para o lote inteiro
+        matriz = self.context_adjuster.adjust_array(matriz, [match.get('context') for match in matches])
+        
+        # 3. Escalações: ratios empilhados das partidas com as duas escalações
+        com_escalacao = np.array([
+            bool(match.get('lineup_mandante') and match.get('lineup_visitante')) for match in matches
+        ], dtype=bool)
+        linhas = np.flatnonzero(com_escalacao)
+        if len(linhas):
+            player_model = self.lineup_adjuster.player_model
+            
+            def _ratios(campo: str) -> Dict[str, np.ndarray]:
+                ratios = [player_model.calculate_lineup_ratios(matches[i][campo]) for i in linhas]
+                return {nome: np.array([r[nome] for r in ratios]) for nome in ('off_ratio', 'foul_ratio', 'cross_ratio')}
+            
+            def _confianca(campo: str) -> np.ndarray:
+                return np.array([matches[i].get(campo, 1.0) for i in linhas], dtype=float)
+            
+            ajustados = self.lineup_adjuster.adjust_arrays(
+                {col: matriz[linhas, j] for j, col in enumerate(PARAM_COLUMNS)},
+                _ratios('lineup_mandante'),
+                _ratios('lineup_visitante'),
+                _confianca('lineup_confidence_mandante'),
+                _confianca('lineup_confidence_visitante')
+            )
+            for j, col in enumerate(PARAM_COLUMNS):
+                matriz[linhas, j] = ajustados[col]
+        
+        colunas.update({
+            'mandante_id': [ctx.mandante.team_id for ctx in contexts],
+            'visitante_id': [ctx.visitante.team_id for ctx in contexts],
+            'mandante': [ctx.mandante.team_name for ctx in contexts],
+            'visitante': [ctx.visitante.team_name for ctx in contexts],
+            'confianca': [params.confianca for params in base],
+            'com_escalacao': com_escalacao,
+            **{col: matriz[:, j] for j, col in enumerate(PARAM_COLUMNS)}
+        })
+        
+        result = {
+            'mandante_id': np.array(colunas.pop('mandante_id'), dtype=np.int64),
+            'visitante_id': np.array(colunas.pop('visitante_id'), dtype=np.int64),
+            'mandante': np.array(colunas.pop('mandante'), dtype=str),
+            'visitante': np.array(colunas.pop('visitante'), dtype=str),
+            'com_escalacao': np.array(colunas.pop('com_escalacao'), dtype=bool),
+            **{nome: np.array(valores, dtype=float) for nome, valores in colunas.items()}
+        }
+        result.update(self.simulator.simulate_batch(
+            {nome: result[nome] for nome in PARAM_COLUMNS},
+            distribution_prefs=distribution_prefs,
+            rng=np.random.default_rng(seed),
+            n_simulations=n_simulations
+        ))
+        return result
     
     def compare_scenarios(
         self,
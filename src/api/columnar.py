@@ -0,0 +1,69 @@
+"""
+Formatos de resposta para previsões em lote.
+
+O MatchPredictor.predict_batch devolve colunas (dict nome -> np.ndarray,
+uma linha por partida). Aqui elas são serializadas em:
+- records: lista de dicts (JSON, uma entrada por partida)
+- columnar: JSON com uma lista por coluna (mais compacto, vira array direto)
+- npz: arquivo NumPy (np.load devolve os mesmos arrays)
+- arrow: Arrow IPC stream (requer pyarrow, opcional)
+"""
+
+import io
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional: só o formato arrow depende dele
+    pa = None
+
+
+FORMATOS = ('records', 'columnar', 'npz', 'arrow')
+
+MEDIA_TYPES = {
+    'npz': 'application/octet-stream',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def _round(valores: np.ndarray, casas: int) -> np.ndarray:
+    return np.round(valores, casas) if valores.dtype.kind == 'f' else valores
+
+
+def to_records(colunas: Dict[str, np.ndarray], casas: int = 4) -> List[dict]:
+    """Uma entrada por partida."""
+    listas = {nome: _round(valores, casas).tolist() for nome, valores in colunas.items()}
+    n = len(next(iter(listas.values()), []))
+    return [{nome: valores[i] for nome, valores in listas.items()} for i in range(n)]
+
+
+def to_columns(colunas: Dict[str, np.ndarray], casas: int = 4) -> dict:
+    """Uma lista por coluna."""
+    return {nome: _round(valores, casas).tolist() for nome, valores in colunas.items()}
+
+
+def to_npz(colunas: Dict[str, np.ndarray]) -> bytes:
+    """Arquivo .npz em memória (sem pickle: nomes em unicode fixo)."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **colunas)
+    return buffer.getvalue()
+
+
+def to_arrow(colunas: Dict[str, np.ndarray]) -> bytes:
+    """Arrow IPC stream com um único record batch."""
+    if pa is None:
+        raise RuntimeError("Formato arrow requer o pacote pyarrow")
+    batch = pa.record_batch(
+        [pa.array(valores) for valores in colunas.values()],
+        names=list(colunas)
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,231 @@
+"""
+Executores dedicados da API.
+
+Os endpoints são `async`, mas o trabalho pesado é síncrono (psycopg2 e
+Monte Carlo em numpy). Rodar isso direto no event loop trava todas as
+outras requisições do worker. Cada tipo de trabalho vai para um pool de
+threads próprio, com:
+- Limite de concorrência (número de threads)
+- Limite de fila: acima dele a requisição é recusada com 503 em vez de
+  acumular latência
+- Métricas de fila (profundidade atual/pico, espera e execução médias)
+
+SingleFlight junta requisições idênticas simultâneas em uma só execução
+e guarda o resultado por alguns segundos.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Hashable
+
+from fastapi import HTTPException
+
+from src.core.cache import TTLCache
+
+
+_MISSING = object()
+
+
+class WorkPool:
+    """Pool de threads com fila limitada e métricas, para uso com await."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        """
+        Args:
+            name: Nome do pool (aparece nas métricas e nas threads)
+            max_workers: Tarefas executando ao mesmo tempo
+            max_queue: Tarefas aguardando; acima disso responde 503
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.queued = 0
+        self.running = 0
+        self.peak_queue = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.run_ms_total = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Executa fn(*args, **kwargs) no pool sem bloquear o event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Agenda fn(*args, **kwargs) e devolve o Future (mesma interface de
+        Executor.submit): usado por run() e por código que já roda fora do
+        event loop para distribuir tarefas no pool.
+
+        Responde 503 (HTTPException) com a fila cheia, como run().
+        """
+        future = self._executor.submit(self._admit(fn, args, kwargs))
+        future.add_done_callback(self._on_cancelled)
+        return future
+
+    def _admit(self, fn: Callable, args: tuple, kwargs: dict) -> Callable:
+        """Reserva um lugar na fila (ou 503) e devolve a tarefa com métricas."""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Servidor ocupado ({self.name}): tente novamente",
+                    headers={'Retry-After': '1'}
+                )
+            self.queued += 1
+            self.peak_queue = max(self.peak_queue, self.queued)
+
+        enviado = time.perf_counter()
+
+        def _task():
+            inicio = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_ms_total += (inicio - enviado) * 1000
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.run_ms_total += (time.perf_counter() - inicio) * 1000
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        return _task
+
+    def _on_cancelled(self, future: Future) -> None:
+        """Tarefa cancelada antes de rodar: libera o lugar na fila."""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        """Profundidade da fila e tempos médios."""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'executando': self.running,
+                'na_fila': self.queued,
+                'pico_fila': self.peak_queue,
+                'concluidas': self.completed,
+                'falhas': self.failed,
+                'recusadas': self.rejected,
+                'espera_media_ms': round(self.wait_ms_total / finished, 3) if finished else 0.0,
+                'execucao_media_ms': round(self.run_ms_total / finished, 3) if finished else 0.0
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def offload(pool: WorkPool):
+    """
+    Decorador de endpoint: a função síncrona roda no pool e o endpoint
+    publicado é async (o FastAPI lê a assinatura original via __wrapped__).
+
+    Exemplo:
+        @app.get("/api/teams")
+        @offload(db_pool)
+        def get_teams(league_id: int = 1): ...
+    """
+    def decorator(fn: Callable):
+        @functools.wraps(fn)
+        async def endpoint(*args, **kwargs):
+            return await pool.run(fn, *args, **kwargs)
+        return endpoint
+    return decorator
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas em andamento + cache curto do resultado.
+
+    Requisições com a mesma chave que chegam enquanto a primeira ainda
+    calcula aguardam o mesmo resultado em vez de repetir o trabalho. O
+    resultado fica em cache por `ttl` segundos. Roda no event loop (sem
+    locks): a chave entra em `_inflight` e sai no callback da task.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        """
+        Args:
+            name: Nome (aparece nas métricas)
+            ttl: Segundos que um resultado fica em cache (0 = sem cache)
+            maxsize: Resultados mantidos em cache (LRU)
+        """
+        self.name = name
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl, name=name) if ttl > 0 else None
+
+        # Contadores
+        self.executions = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        Resultado de `await fn()` para a chave: do cache, de uma execução
+        em andamento ou de uma nova execução.
+        """
+        if self._results is not None:
+            result = self._results.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # shield: se este cliente desconectar, a execução segue para os demais
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.failures += 1
+        elif self._results is not None:
+            self._results.set(key, task.result())
+
+    def clear(self) -> None:
+        """Descarta resultados em cache (ex: dados mudaram)."""
+        if self._results is not None:
+            self._results.clear()
+
+    def stats(self) -> dict:
+        cache = self._results.stats() if self._results is not None else {}
+        return {
+            'name': self.name,
+            'ttl': self.ttl,
+            'execucoes': self.executions,
+            'agrupadas': self.coalesced,
+            'cache_hits': cache.get('hits', 0),
+            'falhas': self.failures,
+            'em_andamento': len(self._inflight)
+        }
+
@@ -0,0 +1,79 @@
+"""
+Cache de respostas por versão dos dados + ETag.
+
+Endpoints de leitura (times, jogadores, estatísticas) só mudam quando a
+versão dos dados muda. Para eles:
+- ETag = versão dos dados; If-None-Match igual → 304 sem montar nada
+- Corpo JSON serializado fica em memória por (versão, endpoint, parâmetros);
+  quando a versão muda o cache é esvaziado
+"""
+
+import json
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from src.core.cache import TTLCache
+from src.core.data_version import DataVersion
+
+
+class VersionedResponseCache:
+    """Corpos de resposta em cache enquanto a versão dos dados não muda."""
+
+    def __init__(self, version: DataVersion, maxsize: int = 1024):
+        """
+        Args:
+            version: Fonte da versão dos dados
+            maxsize: Respostas mantidas (LRU)
+        """
+        self.version = version
+        self._cache = TTLCache(maxsize=maxsize, ttl=None, name='responses')
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        version.on_change(lambda anterior, novo: self._cache.clear())
+
+    def respond(self, request: Request, key: Hashable, build: Callable[[], Any]) -> Response:
+        """
+        Resposta JSON do endpoint, em cache por versão.
+
+        Args:
+            request: Requisição (lê If-None-Match)
+            key: Identifica endpoint + parâmetros
+            build: Monta o corpo (dict) quando não está em cache
+        """
+        versao = self.version.current()
+        etag = f'"{versao}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if _etag_matches(request.headers.get('if-none-match'), etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        body: Optional[bytes] = self._cache.get((versao, key))
+        if body is None:
+            body = json.dumps(build(), ensure_ascii=False, default=_json_default).encode()
+            self._cache.set((versao, key), body)
+        return Response(content=body, media_type='application/json', headers=headers)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), 'nao_modificado_304': self.not_modified}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [t.strip() for t in if_none_match.split(',')]
+    # Comparação fraca: W/"x" equivale a "x"
+    return '*' in candidatos or any(t.removeprefix('W/') == etag for t in candidatos)
+
+
+def _json_default(value):
+    # Escalares numpy (float32, int64, ...) vindos dos modelos
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} não serializável")
@@ -0,0 +1,119 @@
+"""
+Teste de carga local da API.
+
+Dispara requisições concorrentes contra um endpoint e mede a latência
+(p50/p95/p99). Em paralelo mede /api/health: se o event loop estiver
+livre, o health continua rápido mesmo com simulações pesadas na fila.
+
+Uso:
+    uvicorn src.api.main:app --port 8000
+    python -m src.api.load_test --path "/api/simulate?n_simulations=100000" -c 32 -n 400
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+import numpy as np
+
+
+def percentiles(latencias_ms: List[float]) -> dict:
+    """Resumo de latências em ms."""
+    if not latencias_ms:
+        return {'n': 0}
+    arr = np.array(latencias_ms)
+    return {
+        'n': len(arr),
+        'p50': round(float(np.percentile(arr, 50)), 1),
+        'p95': round(float(np.percentile(arr, 95)), 1),
+        'p99': round(float(np.percentile(arr, 99)), 1),
+        'max': round(float(arr.max()), 1)
+    }
+
+
+async def run_load(
+    base_url: str,
+    path: str,
+    concurrency: int,
+    total: int,
+    method: str = 'GET',
+    json_body: dict = None,
+    probe_path: str = '/api/health'
+) -> dict:
+    """
+    Executa `total` requisições com `concurrency` clientes simultâneos.
+
+    Returns:
+        Dict com latências do endpoint, do probe, throughput e erros
+    """
+    latencias: List[float] = []
+    probe: List[float] = []
+    status = {}
+    restantes = total
+    fim = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def worker():
+            nonlocal restantes
+            while restantes > 0:
+                restantes -= 1
+                inicio = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, json=json_body)
+                    status[resp.status_code] = status.get(resp.status_code, 0) + 1
+                except httpx.HTTPError as e:
+                    status[type(e).__name__] = status.get(type(e).__name__, 0) + 1
+                    continue
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+        async def prober():
+            while not fim.is_set():
+                inicio = time.perf_counter()
+                try:
+                    await client.get(probe_path)
+                    probe.append((time.perf_counter() - inicio) * 1000)
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.05)
+
+        inicio = time.perf_counter()
+        probe_task = asyncio.create_task(prober())
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duracao = time.perf_counter() - inicio
+        fim.set()
+        await probe_task
+
+    return {
+        'endpoint': path,
+        'concorrencia': concurrency,
+        'requisicoes': total,
+        'duracao_s': round(duracao, 2),
+        'throughput_rps': round(total / duracao, 1),
+        'status': status,
+        'latencia_ms': percentiles(latencias),
+        'probe_ms': percentiles(probe)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API")
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--path', default='/api/simulate?n_simulations=100000')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args.url, args.path, args.concurrency, args.requests, args.method))
+
+    print(f"\n📊 {result['endpoint']} — {result['requisicoes']} req, concorrência {result['concorrencia']}")
+    print(f"   Duração: {result['duracao_s']}s | Throughput: {result['throughput_rps']} req/s")
+    print(f"   Status: {result['status']}")
+    print(f"   Latência (ms): {result['latencia_ms']}")
+    print(f"   /api/health durante a carga (ms): {result['probe_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,36 @@ FastAPI Backend - RAG Estatísticas
 API REST para previsões de partidas de futebol.
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
 import sys
 import os
 
-# Adicionar path do projeto
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import hmac
+import logging
+import threading
+import time
 
-from core.league_stats import LeagueStats
-from core.team_model import TeamModel
-from core.player_model import PlayerModel
-from engine.parameters import ParameterCalculator
-from engine.monte_carlo import MonteCarloSimulator
-from engine.context import MatchContext, TipoCompeticao, ImportanciaJogo
-from engine.lineup_adjuster import LineupAdjuster
-from analysis.predictions import MatchPredictor
-from analysis.calibration import ModelCalibrator
+# Adicionar raiz do projeto (imports com prefixo src., os mesmos do resto do
+# código: um único módulo de cada, com caches e pools compartilhados)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from psycopg2.extras import RealDictCursor
+
+from src.core import artifact, db, metrics
+from src.core.data_version import DataVersion
+from src.core.snapshot import SnapshotStore
+from src.engine.context import MatchContext, TipoCompeticao
+from src.analysis.predictions import MatchPredictor
+from src.analysis.calibration import ModelCalibrator
+from src.api import columnar, streaming
+from src.api.concurrency import SingleFlight, WorkPool, offload
+from src.api.http_cache import VersionedResponseCache
 
 # Configuração do banco
 DB_CONFIG = {
@@ -35,6 +44,29 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASS', 'estatisticas_pass')
 }
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Warm-up na inicialização (API_WARMUP=0 desliga, ex: desenvolvimento com --reload)
+WARMUP_ENABLED = os.getenv('API_WARMUP', '1').lower() not in ('0', 'false', 'no')
+WARMUP_LEAGUES = [int(x) for x in os.getenv('API_WARMUP_LEAGUES', '1').split(',') if x.strip()]
+WARMUP_SEASON = os.getenv('API_WARMUP_SEASON', '2025')
+
+# Artefato compilado do modelo (src.core.artifact): forças/médias/ratings
+# carregados do arquivo na inicialização, sem recalcular pelo banco
+MODEL_ARTIFACT = os.getenv('MODEL_ARTIFACT', '')
+
+# Snapshot compartilhado entre workers (ex: SNAPSHOT_DIR=/dev/shm/estatisticas);
+# vazio = cada processo carrega do banco
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '')
+SNAPSHOT_LEAGUES = [
+    int(x) for x in os.getenv('SNAPSHOT_LEAGUES', ','.join(map(str, WARMUP_LEAGUES))).split(',') if x.strip()
+]
+
+# Token compartilhado com os scrapers para POST /api/cache/invalidate
+# (vazio = endpoint desativado)
+CACHE_INVALIDATE_TOKEN = os.getenv('CACHE_INVALIDATE_TOKEN', '')
+
 # Inicializar FastAPI
 app = FastAPI(
     title="RAG Estatísticas",
@@ -54,25 +86,279 @@ app.add_middleware(
 # Servir arquivos estáticos
 app.mount("/static", StaticFiles(directory="src/frontend/static"), name="static")
 
+# Executores: trabalho bloqueante fora do event loop
+# - db: consultas (psycopg2) e respostas montadas a partir de cache
+# - sim: Monte Carlo / calibração (CPU)
+# - stream: leitura dos eventos de /api/predict/stream (espera as simulações,
+#   que rodam no sim); limita também os streams simultâneos
+db_pool = WorkPool(
+    'db',
+    max_workers=int(os.getenv('API_DB_WORKERS', 16)),
+    max_queue=int(os.getenv('API_DB_QUEUE', 256))
+)
+sim_pool = WorkPool(
+    'sim',
+    max_workers=int(os.getenv('API_SIM_WORKERS', os.cpu_count() or 2)),
+    max_queue=int(os.getenv('API_SIM_QUEUE', 64))
+)
+stream_pool = WorkPool(
+    'stream',
+    max_workers=int(os.getenv('API_STREAM_WORKERS', 16)),
+    max_queue=int(os.getenv('API_STREAM_QUEUE', 64))
+)
+
+# Previsões idênticas simultâneas: uma execução só, resultado em cache por alguns segundos
+predictions = SingleFlight('predictions', ttl=float(os.getenv('API_PREDICT_CACHE_TTL', 10)))
+
+# Estado do modelo mapeado de SNAPSHOT_DIR (mesmos arquivos em todos os workers)
+# (ignorado com MODEL_ARTIFACT: o artefato já é a fonte)
+snapshots = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR and not MODEL_ARTIFACT else None
+
 # Inicializar componentes (lazy loading)
 _predictor = None
 _calibrator = None
+_init_lock = threading.Lock()
 
 
 def get_predictor() -> MatchPredictor:
     global _predictor
     if _predictor is None:
-        _predictor = MatchPredictor(DB_CONFIG, n_simulations=50_000)
+        with _init_lock:
+            if _predictor is None:
+                predictor = MatchPredictor(DB_CONFIG, n_simulations=50_000)
+                if MODEL_ARTIFACT:
+                    predictor.attach_snapshot(artifact.load(MODEL_ARTIFACT))
+                elif snapshots is not None:
+                    predictor.attach_snapshot(snapshots)
+                _predictor = predictor
     return _predictor
 
 
+# ==================== MÉTRICAS ====================
+
+HTTP_SECONDS = metrics.histogram(
+    'http_request_seconds', 'Latência das requisições', ['metodo', 'rota', 'status']
+)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Latência por rota (template do path, não o path com ids)."""
+    if not metrics.ENABLED:
+        return await call_next(request)
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        HTTP_SECONDS.observe(
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            rota=getattr(route, 'path', 'desconhecida'),
+            status=status
+        )
+
+
+def _collect_runtime() -> list:
+    """Caches do modelo e filas dos executores, lidos na exportação."""
+    linhas = []
+    if _predictor is not None:
+        caches = _predictor.team_model.cache_stats()
+        caches = [caches['team_model'], caches['league_stats']]
+        for campo, tipo in (('hits', 'counter'), ('misses', 'counter'), ('size', 'gauge')):
+            linhas += metrics.gauge_lines(
+                f'cache_{campo}' + ('_total' if tipo == 'counter' else ''),
+                f'Cache do modelo: {campo}',
+                [({'cache': c['name']}, c[campo]) for c in caches],
+                kind=tipo
+            )
+        linhas += metrics.gauge_lines(
+            'cache_hit_ratio', 'Fração de hits desde o início',
+            [({'cache': c['name']}, c['hit_rate']) for c in caches]
+        )
+        ratings = _predictor.player_model.cache_stats()
+        linhas += metrics.gauge_lines(
+            'player_ratings_cached', 'Jogadores com rating em memória',
+            [({}, ratings['size'])]
+        )
+    
+    pools = [db_pool.stats(), sim_pool.stats(), stream_pool.stats()]
+    for campo, nome in (('na_fila', 'queue_depth'), ('executando', 'running')):
+        linhas += metrics.gauge_lines(
+            f'workpool_{nome}', f'Executor: {campo}',
+            [({'pool': p['name']}, p[campo]) for p in pools]
+        )
+    linhas += metrics.gauge_lines(
+        'workpool_rejected_total', 'Executor: requisições recusadas (503)',
+        [({'pool': p['name']}, p['recusadas']) for p in pools], kind='counter'
+    )
+    coalescer = predictions.stats()
+    for campo, nome in (('execucoes', 'executions'), ('agrupadas', 'coalesced'), ('cache_hits', 'cache_hits')):
+        linhas += metrics.gauge_lines(
+            f'predictions_{nome}_total', f'Previsões: {campo}',
+            [({}, coalescer[campo])], kind='counter'
+        )
+    conexoes = db.pool_stats()
+    linhas += metrics.gauge_lines(
+        'db_connections_in_use', 'Conexões emprestadas do pool',
+        [({'database': c['database']}, c['em_uso']) for c in conexoes]
+    )
+    return linhas
+
+
+metrics.register_collector(_collect_runtime)
+
+
+# Versão dos dados (ETag) e respostas de leitura em cache por versão
+data_version = DataVersion(DB_CONFIG)
+responses = VersionedResponseCache(data_version)
+
+
+def _on_data_change(anterior: str, novo: str) -> None:
+    """Dados mudaram (scraper rodou): descarta forças e ratings em cache."""
+    logger.info("Versão dos dados mudou (%s -> %s): invalidando caches", anterior, novo)
+    if _predictor is not None:
+        _predictor.team_model.invalidate()
+        _predictor.player_model.invalidate()
+    if snapshots is not None:
+        # Os modelos leem o snapshot antes dos caches: reconstrói para a versão
+        # nova (em segundo plano; um worker constrói, os outros remapeiam)
+        rebuild_snapshot_async(novo)
+    predictions.clear()
+
+
+data_version.on_change(_on_data_change)
+
+
+def rebuild_snapshot():
+    """
+    Reconstrói e publica o snapshot (um worker por vez; os outros apenas
+    remapeiam). Não faz nada se o publicado já é da versão atual dos dados.
+    """
+    return snapshots.rebuild(
+        DB_CONFIG, SNAPSHOT_LEAGUES, WARMUP_SEASON,
+        versao_dados=data_version.current(force=True)
+    )
+
+
+def rebuild_snapshot_async(versao_dados: str) -> None:
+    """rebuild_snapshot() em segundo plano, para `versao_dados` (sem bloquear a requisição)."""
+    snapshots.rebuild_async(DB_CONFIG, SNAPSHOT_LEAGUES, WARMUP_SEASON, versao_dados=versao_dados)
+
+
+def cached_json(request: Request, key: tuple, build) -> Response:
+    """
+    Resposta de leitura com ETag da versão dos dados: 304 se o cliente já
+    tem esta versão, senão o corpo em cache (montado por build() uma vez
+    por versão).
+    """
+    try:
+        return responses.respond(request, key, build)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 def get_calibrator() -> ModelCalibrator:
     global _calibrator
     if _calibrator is None:
-        _calibrator = ModelCalibrator(DB_CONFIG, get_predictor())
+        predictor = get_predictor()
+        with _init_lock:
+            if _calibrator is None:
+                _calibrator = ModelCalibrator(DB_CONFIG, predictor)
     return _calibrator
 
 
+def build_context(
+    mandante_id: int,
+    visitante_id: int,
+    league_id: int,
+    tipo_competicao: Optional[str]
+) -> Optional[MatchContext]:
+    """Contexto da partida a partir do tipo de competição da requisição."""
+    if not tipo_competicao:
+        return None
+    tipo_map = {
+        "pontos_corridos": TipoCompeticao.PONTOS_CORRIDOS,
+        "mata_mata": TipoCompeticao.MATA_MATA,
+        "grupo": TipoCompeticao.GRUPO
+    }
+    return MatchContext(
+        mandante_id=mandante_id,
+        visitante_id=visitante_id,
+        league_id=league_id,
+        competicao=tipo_map.get(tipo_competicao, TipoCompeticao.PONTOS_CORRIDOS)
+    )
+
+
+# Estado da inicialização: /api/health só responde 200 com status 'ready'
+_readiness = {'status': 'starting', 'duracao_ms': None, 'etapas': {}, 'tentativas': 0, 'erro': None}
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def warm_up() -> dict:
+    """Constrói o preditor e aquece cada liga configurada."""
+    inicio = time.perf_counter()
+    predictor = get_predictor()
+    if snapshots is not None:
+        # Primeiro worker a subir constrói; os demais (e reinícios com os dados
+        # inalterados) encontram o publicado da versão atual
+        rebuild_snapshot()
+    etapas = {
+        f"liga_{league_id}": {
+            k: round(v, 1)
+            for k, v in predictor.warm_up(league_id, WARMUP_SEASON).items()
+        }
+        for league_id in WARMUP_LEAGUES
+    }
+    return {'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1), 'etapas': etapas}
+
+
+async def _run_warm_up():
+    """Warm-up em segundo plano; tenta de novo (com espera crescente) se o banco falhar."""
+    espera = 1.0
+    while True:
+        _readiness['tentativas'] += 1
+        try:
+            resultado = await sim_pool.run(warm_up)
+        except Exception as e:
+            _readiness['erro'] = str(e)
+            logger.warning("Warm-up falhou (tentativa %d): %s", _readiness['tentativas'], e)
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30.0)
+            continue
+        _readiness.update(status='ready', erro=None, **resultado)
+        logger.info("Warm-up concluído em %.0f ms: %s", resultado['duracao_ms'], resultado['etapas'])
+        return
+
+
+@app.on_event("startup")
+async def startup():
+    """Pré-carrega estado da liga e roda uma simulação antes de ficar pronto."""
+    global _warmup_task
+    if not WARMUP_ENABLED:
+        _readiness['status'] = 'ready'
+        return
+    _readiness['status'] = 'warming'
+    # Em segundo plano: o servidor já aceita conexões (health responde 503)
+    _warmup_task = asyncio.create_task(_run_warm_up())
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """Libera executores e conexões do pool."""
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+    db_pool.shutdown()
+    sim_pool.shutdown()
+    stream_pool.shutdown()
+    db.close_all()
+
+
 # ==================== SCHEMAS ====================
 
 class PredictionRequest(BaseModel):
@@ -82,11 +368,56 @@ class PredictionRequest(BaseModel):
     lineup_mandante: Optional[List[int]] = None
     lineup_visitante: Optional[List[int]] = None
     tipo_competicao: Optional[str] = "pontos_corridos"
-    n_simulations: Optional[int] = 50_000  # Número de simulações Monte Carlo
+    n_simulations: Optional[int] = Field(50_000, ge=1000, le=500_000)  # Número de simulações Monte Carlo
+    lineup_confidence_mandante: Optional[float] = 1.0
+    lineup_confidence_visitante: Optional[float] = 1.0
+
+
+class AbsenceImpactRequest(BaseModel):
+    mandante_id: int
+    visitante_id: int
+    league_id: int = 1
+    temporada: str = "2025"
+    lineup_mandante: Optional[List[int]] = None
+    lineup_visitante: Optional[List[int]] = None
+    tipo_competicao: Optional[str] = "pontos_corridos"
+
+
+class BatchMatch(BaseModel):
+    mandante_id: int
+    visitante_id: int
+    lineup_mandante: Optional[List[int]] = None
+    lineup_visitante: Optional[List[int]] = None
     lineup_confidence_mandante: Optional[float] = 1.0
     lineup_confidence_visitante: Optional[float] = 1.0
 
 
+class BatchPredictionRequest(BaseModel):
+    matches: List[BatchMatch] = Field(..., min_length=1, max_length=500)
+    league_id: int = 1
+    temporada: str = "2025"
+    tipo_competicao: Optional[str] = "pontos_corridos"
+    n_simulations: Optional[int] = Field(50_000, ge=1000, le=200_000)
+    seed: Optional[int] = None
+    formato: str = "records"  # records | columnar | npz | arrow
+
+
+class StreamPredictionRequest(BaseModel):
+    matches: List[BatchMatch] = Field(..., min_length=1, max_length=500)
+    league_id: int = 1
+    temporada: str = "2025"
+    tipo_competicao: Optional[str] = "pontos_corridos"
+    n_simulations: Optional[int] = Field(50_000, ge=1000, le=500_000)
+    seed: Optional[int] = None
+    chunk_size: Optional[int] = Field(None, ge=1000)  # estimativas parciais a cada bloco
+    formato: str = "ndjson"  # ndjson | sse
+
+
+class CacheInvalidationRequest(BaseModel):
+    team_ids: Optional[List[int]] = None
+    league_id: Optional[int] = None
+
+
 class TeamResponse(BaseModel):
     id: int
     nome: str
@@ -106,14 +437,25 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    """Verifica se a API está funcionando."""
-    return {"status": "ok", "version": "2.0.0"}
+    """
+    Prontidão da API: 503 até o warm-up terminar (load balancer não
+    manda tráfego para uma instância com caches frios).
+    """
+    body = {
+        "status": "ok" if _readiness['status'] == 'ready' else _readiness['status'],
+        "version": "2.0.0",
+        "warmup": {k: v for k, v in _readiness.items() if k != 'status'}
+    }
+    if _readiness['status'] != 'ready':
+        return JSONResponse(body, status_code=503)
+    return body
 
 
 @app.get("/api/teams")
-async def get_teams(league_id: int = 1):
+@offload(db_pool)
+def get_teams(request: Request, league_id: int = 1):
     """Lista todos os times de uma liga."""
-    try:
+    def build() -> dict:
         predictor = get_predictor()
         teams = predictor.team_model.get_all_teams_strength(league_id)
         
@@ -130,14 +472,14 @@ async def get_teams(league_id: int = 1):
                 for t in teams
             ]
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return cached_json(request, ('teams', league_id), build)
 
 
 @app.get("/api/teams/{team_id}")
-async def get_team_detail(team_id: int, league_id: int = 1):
+@offload(db_pool)
+def get_team_detail(request: Request, team_id: int, league_id: int = 1):
     """Detalhes de um time específico."""
-    try:
+    def build() -> dict:
         predictor = get_predictor()
         team = predictor.team_model.calculate_team_strength(team_id, league_id)
         players = predictor.player_model.get_team_players_ratings(team_id)
@@ -166,8 +508,7 @@ async def get_team_detail(team_id: int, league_id: int = 1):
                 for p in sorted(players, key=lambda x: x.rating_geral, reverse=True)[:20]
             ]
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return cached_json(request, ('team', team_id, league_id), build)
 
 
 @app.post("/api/predict")
@@ -176,28 +517,32 @@ async def predict_match(request: PredictionRequest):
     Gera previsão completa para uma partida.
     
     Retorna probabilidades de resultado, gols, cartões e escanteios.
+    Pedidos idênticos simultâneos compartilham uma única simulação.
     """
+    key = (
+        'predict',
+        request.mandante_id,
+        request.visitante_id,
+        request.league_id,
+        request.tipo_competicao,
+        tuple(sorted(request.lineup_mandante)) if request.lineup_mandante else None,
+        tuple(sorted(request.lineup_visitante)) if request.lineup_visitante else None,
+        request.lineup_confidence_mandante or 1.0,
+        request.lineup_confidence_visitante or 1.0,
+        request.n_simulations
+    )
+    return await predictions.run(key, lambda: sim_pool.run(_predict_match, request))
+
+
+def _predict_match(request: PredictionRequest) -> dict:
     try:
-        # Usar predictor customizado se n_simulations diferente do padrão
-        if request.n_simulations and request.n_simulations != 50_000:
-            predictor = MatchPredictor(DB_CONFIG, n_simulations=request.n_simulations)
-        else:
-            predictor = get_predictor()
+        # Preditor compartilhado (caches quentes); precisão definida por chamada
+        predictor = get_predictor()
         
         # Criar contexto se especificado
-        context = None
-        if request.tipo_competicao:
-            tipo_map = {
-                "pontos_corridos": TipoCompeticao.PONTOS_CORRIDOS,
-                "mata_mata": TipoCompeticao.MATA_MATA,
-                "grupo": TipoCompeticao.GRUPO
-            }
-            context = MatchContext(
-                mandante_id=request.mandante_id,
-                visitante_id=request.visitante_id,
-                league_id=request.league_id,
-                competicao=tipo_map.get(request.tipo_competicao, TipoCompeticao.PONTOS_CORRIDOS)
-            )
+        context = build_context(
+            request.mandante_id, request.visitante_id, request.league_id, request.tipo_competicao
+        )
         
         prediction = predictor.predict(
             mandante_id=request.mandante_id,
@@ -207,7 +552,8 @@ async def predict_match(request: PredictionRequest):
             lineup_mandante=request.lineup_mandante,
             lineup_visitante=request.lineup_visitante,
             lineup_confidence_mandante=request.lineup_confidence_mandante or 1.0,
-            lineup_confidence_visitante=request.lineup_confidence_visitante or 1.0
+            lineup_confidence_visitante=request.lineup_confidence_visitante or 1.0,
+            n_simulations=request.n_simulations
         )
         
         return prediction.to_dict()
@@ -216,6 +562,152 @@ async def predict_match(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/predict/batch")
+@offload(sim_pool)
+def predict_batch(request: BatchPredictionRequest):
+    """
+    Previsão de várias partidas da mesma liga em uma chamada.
+    
+    Estado da liga carregado uma vez e simulação em lote. Probabilidades
+    em 0-1 (não em %). Formatos:
+    - records: lista de partidas (JSON)
+    - columnar: uma lista por coluna (JSON)
+    - npz: arrays NumPy (np.load)
+    - arrow: Arrow IPC stream (requer pyarrow no servidor)
+    """
+    if request.formato not in columnar.FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido: use um de {', '.join(columnar.FORMATOS)}"
+        )
+    if request.formato == 'arrow' and not columnar.arrow_available():
+        raise HTTPException(status_code=501, detail="Formato arrow indisponível: pyarrow não instalado")
+    
+    try:
+        predictor = get_predictor()
+        matches = [
+            {
+                **m.model_dump(),
+                'lineup_confidence_mandante': m.lineup_confidence_mandante or 1.0,
+                'lineup_confidence_visitante': m.lineup_confidence_visitante or 1.0,
+                'context': build_context(
+                    m.mandante_id, m.visitante_id, request.league_id, request.tipo_competicao
+                )
+            }
+            for m in request.matches
+        ]
+        colunas = predictor.predict_batch(
+            matches,
+            league_id=request.league_id,
+            temporada=request.temporada,
+            seed=request.seed,
+            n_simulations=request.n_simulations
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if request.formato == 'npz':
+        return Response(columnar.to_npz(colunas), media_type=columnar.MEDIA_TYPES['npz'])
+    if request.formato == 'arrow':
+        return Response(columnar.to_arrow(colunas), media_type=columnar.MEDIA_TYPES['arrow'])
+    
+    cabecalho = {
+        'partidas': len(request.matches),
+        'simulacoes': request.n_simulations or predictor.simulator.n_simulations
+    }
+    if request.formato == 'columnar':
+        return {**cabecalho, 'colunas': columnar.to_columns(colunas)}
+    return {**cabecalho, 'previsoes': columnar.to_records(colunas)}
+
+
+@app.post("/api/predict/stream")
+async def predict_stream(request: StreamPredictionRequest):
+    """
+    Previsões emitidas à medida que cada partida termina (NDJSON ou SSE).
+    
+    Com chunk_size, emite também estimativas parciais dos mercados com
+    erro padrão a cada bloco de simulações. Eventos: inicio, parcial,
+    partida, erro, fim (ver MatchPredictor.predict_stream).
+    """
+    if request.formato not in streaming.FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido: use um de {', '.join(streaming.FORMATOS)}"
+        )
+    
+    predictor = await sim_pool.run(get_predictor)
+    matches = [
+        {
+            **m.model_dump(),
+            'lineup_confidence_mandante': m.lineup_confidence_mandante or 1.0,
+            'lineup_confidence_visitante': m.lineup_confidence_visitante or 1.0,
+            'context': build_context(
+                m.mandante_id, m.visitante_id, request.league_id, request.tipo_competicao
+            )
+        }
+        for m in request.matches
+    ]
+    cancel = threading.Event()
+    eventos = predictor.predict_stream(
+        matches,
+        league_id=request.league_id,
+        temporada=request.temporada,
+        seed=request.seed,
+        n_simulations=request.n_simulations,
+        chunk_size=request.chunk_size,
+        cancel=cancel,
+        max_workers=sim_pool.max_workers,
+        executor=sim_pool
+    )
+    # Simulações no sim_pool; a leitura dos eventos (que só espera a fila do
+    # preditor) no stream_pool, sem ocupar vagas de simulação.
+    # Primeiro evento (depois da carga da liga e das primeiras partidas
+    # enviadas ao sim_pool) antes de responder: fila cheia ainda vira 503 e
+    # falha na carga vira 500; depois disso o relay emite erro + fim
+    try:
+        primeiro = await stream_pool.run(next, eventos)
+    except HTTPException:
+        cancel.set()
+        raise
+    except Exception as e:
+        cancel.set()
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        streaming.relay(stream_pool, eventos, request.formato, cancel, primeiro),
+        media_type=streaming.MEDIA_TYPES[request.formato],
+        headers=streaming.HEADERS
+    )
+
+
+@app.post("/api/predict/absence-impact")
+@offload(sim_pool)
+def predict_absence_impact(request: AbsenceImpactRequest):
+    """
+    Impacto em cada mercado da ausência de cada jogador.
+    
+    Sem escalações, considera o elenco completo dos dois times.
+    """
+    try:
+        predictor = get_predictor()
+        
+        context = build_context(
+            request.mandante_id, request.visitante_id, request.league_id, request.tipo_competicao
+        )
+        
+        return predictor.absence_impact(
+            mandante_id=request.mandante_id,
+            visitante_id=request.visitante_id,
+            league_id=request.league_id,
+            temporada=request.temporada,
+            context=context,
+            lineup_mandante=request.lineup_mandante,
+            lineup_visitante=request.lineup_visitante
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/predict/quick")
 async def predict_quick(
     mandante_id: int,
@@ -223,6 +715,13 @@ async def predict_quick(
     league_id: int = 1
 ):
     """Previsão rápida (só probabilidades de resultado)."""
+    return await predictions.run(
+        ('quick', mandante_id, visitante_id, league_id),
+        lambda: sim_pool.run(_predict_quick, mandante_id, visitante_id, league_id)
+    )
+
+
+def _predict_quick(mandante_id: int, visitante_id: int, league_id: int) -> dict:
     try:
         predictor = get_predictor()
         result = predictor.predict_quick(mandante_id, visitante_id, league_id)
@@ -231,68 +730,61 @@ async def predict_quick(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Totais do sistema em uma consulta: partidas por competição calculadas uma
+# vez (CTE) e reaproveitadas para o total e o número de competições
+STATS_QUERY = """
+    WITH por_liga AS (
+        SELECT liga, COUNT(*) AS partidas
+        FROM matches
+        WHERE sofascore_event_id IS NOT NULL
+        GROUP BY liga
+    )
+    SELECT
+        (SELECT COALESCE(SUM(partidas), 0)::int FROM por_liga) AS total_partidas,
+        (SELECT COUNT(liga) FROM por_liga) AS competicoes,
+        (SELECT COUNT(*) FROM teams WHERE ativo = true) AS times_ativos,
+        (SELECT COUNT(*) FROM players) AS total_jogadores,
+        (
+            SELECT COALESCE(
+                json_agg(json_build_object('liga', liga, 'partidas', partidas) ORDER BY partidas DESC),
+                '[]'::json
+            )
+            FROM por_liga
+        ) AS por_competicao
+"""
+
+
 @app.get("/api/stats")
-async def get_stats():
-    """Retorna estatísticas gerais do sistema."""
-    try:
-        import psycopg2
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        # Total de partidas
-        cursor.execute("""
-            SELECT COUNT(*) FROM matches 
-            WHERE sofascore_event_id IS NOT NULL
-        """)
-        total_partidas = cursor.fetchone()[0]
-        
-        # Competições
-        cursor.execute("""
-            SELECT COUNT(DISTINCT liga) FROM matches 
-            WHERE sofascore_event_id IS NOT NULL
-        """)
-        competicoes = cursor.fetchone()[0]
-        
-        # Times ativos
-        cursor.execute("SELECT COUNT(*) FROM teams WHERE ativo = true")
-        times_ativos = cursor.fetchone()[0]
-        
-        # Total jogadores
-        cursor.execute("SELECT COUNT(DISTINCT id) FROM players")
-        total_jogadores = cursor.fetchone()[0]
-        
-        # Por competição
-        cursor.execute("""
-            SELECT 
-                liga,
-                COUNT(*) as partidas
-            FROM matches 
-            WHERE sofascore_event_id IS NOT NULL
-            GROUP BY liga
-            ORDER BY partidas DESC
-        """)
-        por_competicao = [
-            {"liga": row[0], "partidas": row[1]}
-            for row in cursor.fetchall()
-        ]
-        
+@offload(db_pool)
+def get_stats(request: Request):
+    """
+    Retorna estatísticas gerais do sistema.
+    
+    Uma consulta só (matches lido uma vez), pelo pool de conexões; a
+    resposta fica em cache até a versão dos dados mudar.
+    """
+    def build() -> dict:
+        conn = db.connect(DB_CONFIG)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(STATS_QUERY)
+        row = cursor.fetchone()
         conn.close()
         
         return {
-            "total_partidas": total_partidas,
-            "competicoes": competicoes,
-            "times_ativos": times_ativos,
-            "total_jogadores": total_jogadores,
-            "por_competicao": por_competicao
+            "total_partidas": row['total_partidas'],
+            "competicoes": row['competicoes'],
+            "times_ativos": row['times_ativos'],
+            "total_jogadores": row['total_jogadores'],
+            "por_competicao": row['por_competicao']
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return cached_json(request, ('stats',), build)
 
 
 @app.get("/api/league/stats")
-async def get_league_stats(league_id: int = 1, temporada: str = "2025"):
+@offload(db_pool)
+def get_league_stats(request: Request, league_id: int = 1, temporada: str = "2025"):
     """Retorna estatísticas da liga (médias de referência)."""
-    try:
+    def build() -> dict:
         predictor = get_predictor()
         stats = predictor.league_stats.calculate_averages(league_id, temporada)
         variance = predictor.league_stats.get_variance_stats(league_id, temporada)
@@ -309,12 +801,12 @@ async def get_league_stats(league_id: int = 1, temporada: str = "2025"):
             "variancia": variance,
             "temporada": temporada
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return cached_json(request, ('league_stats', league_id, temporada), build)
 
 
 @app.get("/api/calibration")
-async def get_calibration(league_id: int = 1):
+@offload(sim_pool)
+def get_calibration(league_id: int = 1):
     """Retorna métricas de calibração do modelo."""
     try:
         calibrator = get_calibrator()
@@ -327,7 +819,8 @@ async def get_calibration(league_id: int = 1):
 
 
 @app.get("/api/simulate")
-async def simulate_manual(
+@offload(sim_pool)
+def simulate_manual(
     lambda_mandante: float = Query(1.5, ge=0.1, le=5.0),
     lambda_visitante: float = Query(1.0, ge=0.1, le=5.0),
     n_simulations: int = Query(10000, ge=1000, le=100000)
@@ -338,8 +831,10 @@ async def simulate_manual(
     Útil para testes e análises.
     """
     try:
-        simulator = MonteCarloSimulator(n_simulations)
-        result = simulator.quick_simulate(lambda_mandante, lambda_visitante)
+        simulator = get_predictor().simulator
+        result = simulator.quick_simulate(
+            lambda_mandante, lambda_visitante, n_simulations=n_simulations
+        )
         
         return {
             "parametros": {
@@ -353,10 +848,77 @@ async def simulate_manual(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def require_invalidate_token(x_cache_token: Optional[str] = Header(None)) -> None:
+    """Confere o cabeçalho X-Cache-Token contra CACHE_INVALIDATE_TOKEN (antes de ocupar o pool)."""
+    if not CACHE_INVALIDATE_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalidação desativada (CACHE_INVALIDATE_TOKEN não configurado)")
+    if x_cache_token is None or not hmac.compare_digest(x_cache_token, CACHE_INVALIDATE_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de invalidação inválido")
+
+
+@app.post("/api/cache/invalidate", dependencies=[Depends(require_invalidate_token)])
+@offload(db_pool)
+def invalidate_cache(request: CacheInvalidationRequest):
+    """
+    Descarta forças/médias em cache após novos jogos.
+    
+    Chamado pelos scrapers depois de inserir partidas, com o cabeçalho
+    X-Cache-Token igual a CACHE_INVALIDATE_TOKEN.
+    """
+    try:
+        predictor = get_predictor()
+        removed = predictor.team_model.invalidate(
+            team_ids=request.team_ids,
+            league_id=request.league_id
+        )
+        # Ratings de jogadores: próxima consulta confere o updated_at no banco
+        predictor.player_model.invalidate()
+        # Respostas de leitura: nova versão dos dados na próxima requisição
+        data_version.invalidate()
+        responses.clear()
+        predictions.clear()
+        if snapshots is not None:
+            # Em segundo plano: o scraper não espera a reconstrução. Demais
+            # workers veem o novo link em até SnapshotStore.CHECK_INTERVAL_SECONDS
+            rebuild_snapshot_async(data_version.current(force=True))
+        return {"removidos": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/queues")
+async def get_queue_stats():
+    """Profundidade das filas dos executores e uso do pool de conexões."""
+    return {
+        "executores": [db_pool.stats(), sim_pool.stats(), stream_pool.stats()],
+        "conexoes": db.pool_stats()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas no formato de texto do Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Contadores de hit/miss dos caches do modelo."""
+    predictor = get_predictor()
+    stats = predictor.team_model.cache_stats()
+    stats['player_ratings'] = predictor.player_model.cache_stats()
+    stats['responses'] = responses.stats()
+    stats['predictions'] = predictions.stats()
+    stats['data_version'] = data_version.stats()
+    stats['snapshot'] = predictor.snapshot.stats() if predictor.snapshot is not None else None
+    return stats
+
+
 @app.get("/api/players/{team_id}")
-async def get_team_players(team_id: int):
+@offload(db_pool)
+def get_team_players(request: Request, team_id: int):
     """Lista jogadores de um time com ratings."""
-    try:
+    def build() -> dict:
         predictor = get_predictor()
         players = predictor.player_model.get_team_players_ratings(team_id)
         
@@ -377,8 +939,7 @@ async def get_team_players(team_id: int):
                 for p in sorted(players, key=lambda x: x.rating_geral, reverse=True)
             ]
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return cached_json(request, ('players', team_id), build)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+"""
+Respostas em streaming (NDJSON ou Server-Sent Events).
+
+O gerador de eventos do preditor é síncrono e bloqueante; cada next()
+roda no WorkPool, então o event loop continua livre e os limites/métricas
+de fila valem também para o streaming. next() só espera a fila de eventos
+(as simulações rodam em outro pool), por isso a API usa um pool próprio
+para a leitura.
+"""
+
+import json
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+
+from src.api.concurrency import WorkPool
+
+
+FORMATOS = ('ndjson', 'sse')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+# Sem buffer em proxies (nginx) para os eventos chegarem na hora
+HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def encode(evento: Dict, formato: str) -> str:
+    """Serializa um evento: uma linha JSON (ndjson) ou um bloco SSE."""
+    data = json.dumps(evento, ensure_ascii=False)
+    if formato == 'sse':
+        return f"event: {evento.get('evento', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def relay(
+    pool: WorkPool,
+    eventos: Iterator[Dict],
+    formato: str,
+    cancel: threading.Event,
+    primeiro: Optional[Dict] = None
+) -> AsyncIterator[str]:
+    """
+    Consome o gerador síncrono no pool e repassa os eventos serializados.
+    
+    Depois do primeiro evento os cabeçalhos (200) já foram enviados: uma
+    falha do gerador ou do pool (ex: 503) vira um evento 'erro' seguido de
+    'fim' com interrompido=True, em vez de cortar a resposta no meio.
+    
+    Args:
+        cancel: Evento de cancelamento do gerador, sinalizado quando o
+                cliente desconecta
+        primeiro: Evento já lido pelo endpoint (para responder 503 antes
+                  de iniciar o streaming)
+    """
+    fim = object()
+    inicio = time.perf_counter()
+    erros = 0
+    try:
+        if primeiro is not None:
+            yield encode(primeiro, formato)
+        while True:
+            try:
+                evento = await pool.run(next, eventos, fim)
+            except Exception as e:
+                detalhe = e.detail if isinstance(e, HTTPException) else str(e)
+                yield encode({'evento': 'erro', 'indice': None, 'detalhe': detalhe}, formato)
+                yield encode({
+                    'evento': 'fim',
+                    'partidas': primeiro.get('partidas') if primeiro else None,
+                    'erros': erros + 1,
+                    'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+                    'interrompido': True
+                }, formato)
+                break
+            if evento is fim:
+                break
+            erros += evento.get('evento') == 'erro'
+            yield encode(evento, formato)
+    finally:
+        # Cliente desconectou ou terminou: encerra simulações pendentes
+        cancel.set()
+        try:
+            eventos.close()
+        except ValueError:
+            # next() ainda rodando em outra thread: o cancel encerra
+            pass
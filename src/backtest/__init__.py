@@ -2,4 +2,5 @@
 Módulo de Backtest e Calibração.
 """
 from .backtest_engine import BacktestEngine
-from .calibration import Calibrator, PlattScaling, IsotonicCalibrator
+from .calibration import Calibrator, CompiledCalibrator, PlattScaling, IsotonicCalibrator
+from .walk_forward import WalkForwardRunner, compare_variants
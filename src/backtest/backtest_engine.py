@@ -7,6 +7,10 @@ Funcionalidades:
 - Comparar com resultados reais
 - Calcular métricas de performance
 - Treinar calibradores
+
+Sem vazamento: as forças e âncoras de cada partida usam só jogos de datas
+anteriores (LeagueTimeline com somas acumuladas). Todas as partidas são
+montadas e precificadas de uma vez, como operações em arrays.
 """
 
 import json
@@ -20,15 +24,39 @@ from dataclasses import dataclass, asdict
 import numpy as np
 
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from config_times import TIMES_BRASILEIRAO, BRASILEIRAO_TOURNAMENT_ID
+from src.core.league_stats import LeagueStats
+from src.core.team_model import TeamModel
+from src.core.timeline import LeagueTimeline
+from src.engine.parameters import ParameterCalculator
+from src.engine.pricing import (
+    ALPHA, DEFAULT_DIST, MAX_CONTAGEM, MAX_GOLS,
+    count_pmf, outcome_probabilities, prob_total_over
+)
 
 BASE_URL = "https://api.sofascore.com/api/v1"
 MIN_DELAY = 1.5
 MAX_DELAY = 2.5
 TIMEOUT = 25
 
+# Mercados de linha: mercado -> (estatística, linha do total)
+LINHAS = {
+    'over_05_goals': ('gols', 0.5),
+    'over_15_goals': ('gols', 1.5),
+    'over_25_goals': ('gols', 2.5),
+    'over_35_goals': ('gols', 3.5),
+    'over_85_corners': ('escanteios', 8.5),
+    'over_95_corners': ('escanteios', 9.5),
+    'over_105_corners': ('escanteios', 10.5),
+}
+
+# Mercados avaliados (campos booleanos de HistoricalMatch)
+MARKETS = (*LINHAS, 'btts', 'home_win', 'draw', 'away_win')
+
+# Limite das probabilidades no log-loss (evita log(0))
+EPS_LOG_LOSS = 1e-6
+
 USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
@@ -70,6 +98,7 @@ class BacktestResult:
     predictions: List[float]  # Probabilidades previstas
     outcomes: List[int]  # Resultados reais (0 ou 1)
     brier_score: float
+    log_loss: float
     accuracy: float  # % de acertos quando prob > 0.5
     n_samples: int
     
@@ -77,6 +106,18 @@ class BacktestResult:
     bins_analysis: Dict[str, dict]
 
 
+def score(preds: np.ndarray, outcomes: np.ndarray) -> Dict[str, float]:
+    """Brier, log-loss e acerto (prob > 0.5 = "sim") de probabilidades vs resultados 0/1."""
+    preds = np.asarray(preds, dtype=float)
+    outcomes = np.asarray(outcomes, dtype=int)
+    p = np.clip(preds, EPS_LOG_LOSS, 1 - EPS_LOG_LOSS)
+    return {
+        'brier': float(np.mean((preds - outcomes) ** 2)),
+        'log_loss': float(-np.mean(outcomes * np.log(p) + (1 - outcomes) * np.log(1 - p))),
+        'accuracy': float(np.mean((preds > 0.5).astype(int) == outcomes)),
+    }
+
+
 class BacktestEngine:
     """Engine principal de backtest."""
     
@@ -119,6 +160,8 @@ class BacktestEngine:
         Returns:
             Número de partidas adicionadas
         """
+        from src._deprecated.config_times import TIMES_BRASILEIRAO, BRASILEIRAO_TOURNAMENT_ID
+        
         print(f"🔍 Buscando partidas históricas do Brasileirão...")
         
         added = 0
@@ -230,12 +273,133 @@ class BacktestEngine:
         except:
             return {'home': 0, 'away': 0}
     
-    def run_backtest(self, analyzer) -> Dict[str, BacktestResult]:
+    def build_timeline(self, matches: Optional[List[HistoricalMatch]] = None) -> Tuple[LeagueTimeline, Dict[str, int]]:
+        """
+        Linha do tempo das partidas históricas (times identificados pelo nome).
+        
+        Returns:
+            (timeline, nome do time -> id na timeline)
+        """
+        matches = self.matches if matches is None else matches
+        nomes = sorted({m.home_team for m in matches} | {m.away_team for m in matches})
+        ids = {nome: i for i, nome in enumerate(nomes)}
+        
+        # Sem cartões na base histórica: colunas ficam zeradas
+        timeline = LeagueTimeline(
+            dates=[m.date for m in matches],
+            home_ids=[ids[m.home_team] for m in matches],
+            away_ids=[ids[m.away_team] for m in matches],
+            stats={
+                'gols_mandante': [m.home_score for m in matches],
+                'gols_visitante': [m.away_score for m in matches],
+                'escanteios_mandante': [m.home_corners for m in matches],
+                'escanteios_visitante': [m.away_corners for m in matches],
+            },
+            team_ids=ids.values(),
+            team_names={i: nome for nome, i in ids.items()}
+        )
+        return timeline, ids
+    
+    def as_of_parameters(
+        self,
+        matches: Optional[List[HistoricalMatch]] = None,
+        timeline: Optional[Tuple[LeagueTimeline, Dict[str, int]]] = None,
+        as_of: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Parâmetros λ, μ, κ de cada partida usando só jogos de datas anteriores.
+        
+        Uma passada: índices "as-of" por busca binária, somas acumuladas da
+        liga e dos times nesses índices, forças e parâmetros vetorizados.
+        
+        Args:
+            matches: Partidas avaliadas (padrão: todas)
+            timeline: Linha do tempo já montada (build_timeline), ex: a base
+                      inteira ao avaliar só um trecho
+            as_of: Data de corte de cada partida (padrão: a própria data;
+                   walk-forward usa o início da rodada)
+            
+        Returns:
+            (parâmetros por coluna, jogos anteriores do time com menos histórico)
+        """
+        matches = self.matches if matches is None else matches
+        timeline, ids = timeline or self.build_timeline(matches)
+        
+        k = timeline.indices_as_of(as_of if as_of is not None else [m.date for m in matches])
+        mandante = np.array([timeline.team_index[ids[m.home_team]] for m in matches], dtype=np.int64)
+        visitante = np.array([timeline.team_index[ids[m.away_team]] for m in matches], dtype=np.int64)
+        
+        league_stats = LeagueStats(db_config=None)
+        team_model = TeamModel(db_config=None, league_stats=league_stats)
+        league_avg = league_stats.averages_at(timeline, k)
+        
+        def _forcas(team_idx: np.ndarray) -> Dict[str, np.ndarray]:
+            casa, fora = timeline.team_totals_at(team_idx, k)
+            return team_model.strength_arrays(league_avg, team_model.means(casa), team_model.means(fora))
+        
+        forca_m, forca_v = _forcas(mandante), _forcas(visitante)
+        params = ParameterCalculator(league_stats, team_model).parameter_arrays(league_avg, forca_m, forca_v)
+        historico = np.minimum(
+            forca_m['jogos_casa'] + forca_m['jogos_fora'],
+            forca_v['jogos_casa'] + forca_v['jogos_fora']
+        )
+        return params, historico
+    
+    @staticmethod
+    def price(
+        params: Dict[str, np.ndarray],
+        distribution_prefs: Optional[Dict[str, str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Probabilidade de cada mercado de MARKETS para N partidas (analítico)."""
+        prefs = {**DEFAULT_DIST, **(distribution_prefs or {})}
+        
+        def _pmfs(mercado: str, prefixo: str, max_k: int):
+            return (
+                count_pmf(params[f'{prefixo}_mandante'], max_k, prefs[mercado], ALPHA[mercado]),
+                count_pmf(params[f'{prefixo}_visitante'], max_k, prefs[mercado], ALPHA[mercado])
+            )
+        
+        pmfs = {
+            'gols': _pmfs('gols', 'lambda', MAX_GOLS),
+            'escanteios': _pmfs('escanteios', 'kappa', MAX_CONTAGEM)
+        }
+        resultado = outcome_probabilities(params['lambda_mandante'], params['lambda_visitante'], prefs)
+        gols_m, gols_v = pmfs['gols']
+        
+        probs = {
+            market: prob_total_over(*pmfs[estatistica], linha)
+            for market, (estatistica, linha) in LINHAS.items()
+        }
+        probs.update({
+            'btts': (1.0 - gols_m[:, 0]) * (1.0 - gols_v[:, 0]),
+            'home_win': resultado['vitoria_mandante'],
+            'draw': resultado['empate'],
+            'away_win': resultado['vitoria_visitante'],
+        })
+        return probs
+    
+    @staticmethod
+    def outcomes(matches: List[HistoricalMatch]) -> Dict[str, np.ndarray]:
+        """Resultado real (0/1) de cada mercado de MARKETS."""
+        return {
+            market: np.array([getattr(m, market) for m in matches], dtype=int)
+            for market in MARKETS
+        }
+    
+    def run_backtest(
+        self,
+        distribution_prefs: Optional[Dict[str, str]] = None,
+        min_jogos: int = 1,
+        verbose: bool = True
+    ) -> Dict[str, BacktestResult]:
         """
         Executa backtest completo.
         
         Args:
-            analyzer: Instância de PoissonAnalyzer
+            distribution_prefs: Distribuição por mercado (padrão: DEFAULT_DIST)
+            min_jogos: Jogos anteriores exigidos de cada time (partidas com
+                       menos histórico ficam de fora)
+            verbose: Imprime o resumo por mercado
         
         Returns:
             Dict com resultados por mercado
@@ -244,79 +408,45 @@ class BacktestEngine:
             print("⚠️ Nenhuma partida histórica. Execute fetch_historical_matches() primeiro.")
             return {}
         
-        print(f"🔬 Executando backtest em {len(self.matches)} partidas...")
+        inicio = time.perf_counter()
+        params, historico = self.as_of_parameters()
+        probs = self.price(params, distribution_prefs)
+        reais = self.outcomes(self.matches)
         
-        results = {
-            'over_25_goals': {'preds': [], 'outcomes': []},
-            'over_35_goals': {'preds': [], 'outcomes': []},
-            'btts': {'preds': [], 'outcomes': []},
-            'over_95_corners': {'preds': [], 'outcomes': []},
-            'over_105_corners': {'preds': [], 'outcomes': []},
-            'home_win': {'preds': [], 'outcomes': []},
+        mask = historico >= min_jogos
+        backtest_results = {
+            market: self.evaluate(market, probs[market][mask], reais[market][mask])
+            for market in MARKETS
         }
         
-        for match in self.matches:
-            # Verificar se temos dados dos times
-            if match.home_team not in analyzer.times_stats or match.away_team not in analyzer.times_stats:
-                continue
-            
-            # Gerar previsão
-            pred = analyzer.prever_partida(match.home_team, match.away_team)
-            if not pred:
-                continue
-            
-            # Coletar resultados
-            results['over_25_goals']['preds'].append(pred.prob_over_25_goals)
-            results['over_25_goals']['outcomes'].append(int(match.over_25_goals))
-            
-            results['over_35_goals']['preds'].append(pred.prob_over_35_goals)
-            results['over_35_goals']['outcomes'].append(int(match.over_35_goals))
-            
-            results['btts']['preds'].append(pred.prob_btts)
-            results['btts']['outcomes'].append(int(match.btts))
-            
-            results['over_95_corners']['preds'].append(pred.prob_over_95_corners)
-            results['over_95_corners']['outcomes'].append(int(match.over_95_corners))
-            
-            results['over_105_corners']['preds'].append(pred.prob_over_105_corners)
-            results['over_105_corners']['outcomes'].append(int(match.over_105_corners))
-            
-            results['home_win']['preds'].append(pred.prob_home_win)
-            results['home_win']['outcomes'].append(int(match.home_win))
-        
-        # Calcular métricas por mercado
-        backtest_results = {}
-        
-        for market, data in results.items():
-            if not data['preds']:
-                continue
-            
-            preds = np.array(data['preds'])
-            outcomes = np.array(data['outcomes'])
-            
-            brier = float(np.mean((preds - outcomes) ** 2))
-            
-            # Accuracy: quando prob > 0.5, prevemos "sim"
-            predicted = (preds > 0.5).astype(int)
-            accuracy = float(np.mean(predicted == outcomes))
-            
-            # Análise por faixa
-            bins_analysis = self._analyze_bins(preds, outcomes)
-            
-            backtest_results[market] = BacktestResult(
-                market=market,
-                predictions=preds.tolist(),
-                outcomes=outcomes.tolist(),
-                brier_score=brier,
-                accuracy=accuracy,
-                n_samples=len(preds),
-                bins_analysis=bins_analysis
-            )
-            
-            print(f"  📊 {market}: Brier={brier:.4f}, Accuracy={accuracy*100:.1f}%, N={len(preds)}")
+        if verbose:
+            print(f"🔬 Backtest em {int(mask.sum())} de {len(self.matches)} partidas "
+                  f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+            for market, result in backtest_results.items():
+                print(f"  📊 {market}: Brier={result.brier_score:.4f}, LogLoss={result.log_loss:.4f}, "
+                      f"Accuracy={result.accuracy*100:.1f}%, N={result.n_samples}")
         
         return backtest_results
     
+    def evaluate(self, market: str, preds: np.ndarray, outcomes: np.ndarray) -> BacktestResult:
+        """Brier, log-loss, acerto e análise por faixa de um mercado."""
+        preds = np.asarray(preds, dtype=float)
+        outcomes = np.asarray(outcomes, dtype=int)
+        if len(preds) == 0:
+            return BacktestResult(market, [], [], float('nan'), float('nan'), float('nan'), 0, {})
+        
+        metricas = score(preds, outcomes)
+        return BacktestResult(
+            market=market,
+            predictions=preds.tolist(),
+            outcomes=outcomes.tolist(),
+            brier_score=metricas['brier'],
+            log_loss=metricas['log_loss'],
+            accuracy=metricas['accuracy'],
+            n_samples=len(preds),
+            bins_analysis=self._analyze_bins(preds, outcomes)
+        )
+    
     def _analyze_bins(self, preds: np.ndarray, outcomes: np.ndarray) -> Dict[str, dict]:
         """Analisa performance por faixa de probabilidade."""
         bins = {
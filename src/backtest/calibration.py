@@ -5,14 +5,16 @@ Implementa:
 - Platt Scaling (Regressão Logística)
 - Isotonic Regression
 - Métricas de calibração (Brier Score, ECE)
+
+O sklearn só é usado para treinar: o calibrador treinado vira coeficientes
+(Platt) ou pontos da curva (isotônico), aplicados com sigmoid/np.interp
+sobre vetores inteiros de probabilidades. Carregar e aplicar calibradores
+não importa o sklearn.
 """
 
 import numpy as np
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Union
 from dataclasses import dataclass
-from sklearn.linear_model import LogisticRegression
-from sklearn.isotonic import IsotonicRegression
-from sklearn.calibration import calibration_curve
 import json
 from pathlib import Path
 
@@ -28,6 +30,40 @@ class CalibrationMetrics:
     improvement_pct: float  # % de melhoria
 
 
+@dataclass(frozen=True)
+class CompiledCalibrator:
+    """
+    Calibrador treinado em forma de arrays (sem sklearn).
+    
+    - platt: sigmoid(coef * prob + intercept)
+    - isotonic: interpolação linear nos pontos (x, y) da curva, constante fora deles
+    """
+    type: str
+    coef: float = 0.0
+    intercept: float = 0.0
+    x: Optional[np.ndarray] = None
+    y: Optional[np.ndarray] = None
+    
+    @classmethod
+    def from_dict(cls, cal: dict) -> 'CompiledCalibrator':
+        """Formato salvo em calibrators.json (e nos metadados do artefato do modelo)."""
+        if cal['type'] == 'platt':
+            return cls('platt', coef=float(cal['coef']), intercept=float(cal['intercept']))
+        return cls('isotonic', x=np.asarray(cal['x'], dtype=float), y=np.asarray(cal['y'], dtype=float))
+    
+    def to_dict(self) -> dict:
+        if self.type == 'platt':
+            return {'type': 'platt', 'coef': self.coef, 'intercept': self.intercept}
+        return {'type': 'isotonic', 'x': self.x.tolist(), 'y': self.y.tolist()}
+    
+    def apply(self, probs: np.ndarray) -> np.ndarray:
+        """Calibra um vetor de probabilidades."""
+        probs = np.asarray(probs, dtype=float)
+        if self.type == 'platt':
+            return 1 / (1 + np.exp(-(self.coef * probs + self.intercept)))
+        return np.interp(probs, self.x, self.y)
+
+
 class PlattScaling:
     """
     Calibração usando Platt Scaling (Regressão Logística).
@@ -41,7 +77,8 @@ class PlattScaling:
     """
     
     def __init__(self):
-        self.model = LogisticRegression(solver='lbfgs', max_iter=1000)
+        self.model = None
+        self.compiled: Optional[CompiledCalibrator] = None
         self.is_fitted = False
     
     def fit(self, probs: np.ndarray, outcomes: np.ndarray) -> 'PlattScaling':
@@ -55,11 +92,19 @@ class PlattScaling:
         if len(probs) < 10:
             raise ValueError("Precisa de pelo menos 10 amostras para calibração")
         
+        from sklearn.linear_model import LogisticRegression
+        
         # Reshape para sklearn
-        X = probs.reshape(-1, 1)
-        y = outcomes.astype(int)
+        X = np.asarray(probs, dtype=float).reshape(-1, 1)
+        y = np.asarray(outcomes).astype(int)
         
+        self.model = LogisticRegression(solver='lbfgs', max_iter=1000)
         self.model.fit(X, y)
+        self.compiled = CompiledCalibrator(
+            'platt',
+            coef=float(self.model.coef_[0][0]),
+            intercept=float(self.model.intercept_[0])
+        )
         self.is_fitted = True
         return self
     
@@ -68,8 +113,7 @@ class PlattScaling:
         if not self.is_fitted:
             raise RuntimeError("Calibrador não foi treinado. Use fit() primeiro.")
         
-        X = probs.reshape(-1, 1)
-        return self.model.predict_proba(X)[:, 1]
+        return self.compiled.apply(probs)
     
     def calibrate_single(self, prob: float) -> float:
         """Calibra uma única probabilidade."""
@@ -89,7 +133,8 @@ class IsotonicCalibrator:
     """
     
     def __init__(self):
-        self.model = IsotonicRegression(out_of_bounds='clip')
+        self.model = None
+        self.compiled: Optional[CompiledCalibrator] = None
         self.is_fitted = False
     
     def fit(self, probs: np.ndarray, outcomes: np.ndarray) -> 'IsotonicCalibrator':
@@ -97,7 +142,16 @@ class IsotonicCalibrator:
         if len(probs) < 10:
             raise ValueError("Precisa de pelo menos 10 amostras para calibração")
         
+        from sklearn.isotonic import IsotonicRegression
+        
+        self.model = IsotonicRegression(out_of_bounds='clip')
         self.model.fit(probs, outcomes)
+        # predict() com out_of_bounds='clip' é exatamente np.interp nesses pontos
+        self.compiled = CompiledCalibrator(
+            'isotonic',
+            x=np.asarray(self.model.X_thresholds_, dtype=float),
+            y=np.asarray(self.model.y_thresholds_, dtype=float)
+        )
         self.is_fitted = True
         return self
     
@@ -106,7 +160,7 @@ class IsotonicCalibrator:
         if not self.is_fitted:
             raise RuntimeError("Calibrador não foi treinado. Use fit() primeiro.")
         
-        return self.model.predict(probs)
+        return self.compiled.apply(probs)
     
     def calibrate_single(self, prob: float) -> float:
         """Calibra uma única probabilidade."""
@@ -123,21 +177,60 @@ class Calibrator:
     - btts
     - over_95_corners
     - etc.
+    
+    Os calibradores carregados ficam compilados (CompiledCalibrator) e
+    aceitam tanto uma probabilidade quanto vetores de previsões.
     """
     
-    def __init__(self, calibrators_path: str = 'data/calibrators.json'):
-        self.path = Path(calibrators_path)
+    # Campo da previsão -> mercado
+    FIELDS = {
+        'prob_over_25_goals': 'over_25_goals',
+        'prob_over_35_goals': 'over_35_goals',
+        'prob_over_15_goals': 'over_15_goals',
+        'prob_btts': 'btts',
+        'prob_over_95_corners': 'over_95_corners',
+        'prob_over_105_corners': 'over_105_corners',
+        'prob_home_win': 'home_win',
+        'prob_draw': 'draw',
+        'prob_away_win': 'away_win',
+    }
+    
+    def __init__(self, calibrators_path: Optional[str] = 'data/calibrators.json'):
+        """
+        Args:
+            calibrators_path: JSON dos calibradores (None = só em memória, ver from_dict)
+        """
+        self.path = Path(calibrators_path) if calibrators_path else None
         self.calibrators: Dict[str, dict] = {}  # mercado -> {params, type}
+        self._compiled: Dict[str, CompiledCalibrator] = {}
         self._load()
     
+    @classmethod
+    def from_dict(cls, calibrators: Dict[str, dict]) -> 'Calibrator':
+        """Calibrador a partir de dicts já carregados (ex: LeagueSnapshot.calibrators do artefato)."""
+        calibrator = cls(None)
+        calibrator.calibrators = dict(calibrators)
+        calibrator._compile()
+        return calibrator
+    
     def _load(self):
         """Carrega calibradores salvos."""
-        if self.path.exists():
+        if self.path is not None and self.path.exists():
             with open(self.path, 'r') as f:
                 self.calibrators = json.load(f)
+        self._compile()
+    
+    def _compile(self):
+        self._compiled = {
+            market: CompiledCalibrator.from_dict(cal)
+            for market, cal in self.calibrators.items()
+        }
     
     def _save(self):
         """Salva calibradores."""
+        self._compile()
+        if self.path is None:
+            return
         self.path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.path, 'w') as f:
             json.dump(self.calibrators, f, indent=2)
@@ -173,27 +266,10 @@ class Calibrator:
             # Platt para poucos dados, Isotonic para muitos
             method = 'platt' if len(probs) < 500 else 'isotonic'
         
-        # Treinar
-        if method == 'platt':
-            calibrator = PlattScaling()
-            calibrator.fit(probs, outcomes)
-            
-            # Salvar parâmetros (coef_ e intercept_)
-            self.calibrators[market] = {
-                'type': 'platt',
-                'coef': float(calibrator.model.coef_[0][0]),
-                'intercept': float(calibrator.model.intercept_[0])
-            }
-        else:
-            calibrator = IsotonicCalibrator()
-            calibrator.fit(probs, outcomes)
-            
-            # Salvar pontos da curva isotônica
-            self.calibrators[market] = {
-                'type': 'isotonic',
-                'x': calibrator.model.X_thresholds_.tolist(),
-                'y': calibrator.model.y_thresholds_.tolist()
-            }
+        # Treinar e salvar a forma compilada (coeficientes ou pontos da curva)
+        calibrator = PlattScaling() if method == 'platt' else IsotonicCalibrator()
+        calibrator.fit(probs, outcomes)
+        self.calibrators[market] = calibrator.compiled.to_dict()
         
         self._save()
         
@@ -213,66 +289,64 @@ class Calibrator:
             improvement_pct=improvement
         )
     
-    def calibrate(self, market: str, prob: float) -> float:
+    def calibrate(
+        self, market: str, prob: Union[float, np.ndarray]
+    ) -> Union[float, np.ndarray]:
         """
-        Aplica calibração a uma probabilidade.
+        Aplica calibração a uma probabilidade ou a um vetor delas.
         
         Args:
             market: Nome do mercado
-            prob: Probabilidade do modelo (0-1)
+            prob: Probabilidade do modelo (0-1), escalar ou vetor
         
         Returns:
-            Probabilidade calibrada
+            Probabilidade calibrada (float para escalar, vetor para vetor)
         """
-        if market not in self.calibrators:
+        compiled = self._compiled.get(market)
+        if compiled is None:
             return prob  # Sem calibrador, retorna original
         
-        cal = self.calibrators[market]
-        
-        if cal['type'] == 'platt':
-            # sigmoid(coef * prob + intercept)
-            z = cal['coef'] * prob + cal['intercept']
-            return 1 / (1 + np.exp(-z))
-        
-        elif cal['type'] == 'isotonic':
-            # Interpolação linear na curva isotônica
-            x_vals = np.array(cal['x'])
-            y_vals = np.array(cal['y'])
-            return float(np.interp(prob, x_vals, y_vals))
-        
-        return prob
+        calibrated = compiled.apply(prob)
+        return float(calibrated) if np.ndim(prob) == 0 else calibrated
     
     def calibrate_prediction(self, prediction: dict) -> dict:
         """
         Calibra todas as probabilidades de uma previsão.
         
         Args:
-            prediction: Dict com probabilidades (prob_over_25_goals, etc.)
+            prediction: Dict com probabilidades (prob_over_25_goals, etc.);
+                        os valores podem ser vetores (N previsões de uma vez)
         
         Returns:
             Dict com probabilidades calibradas
         """
         result = prediction.copy()
         
-        # Mapeamento de campos para mercados
-        mappings = {
-            'prob_over_25_goals': 'over_25_goals',
-            'prob_over_35_goals': 'over_35_goals',
-            'prob_over_15_goals': 'over_15_goals',
-            'prob_btts': 'btts',
-            'prob_over_95_corners': 'over_95_corners',
-            'prob_over_105_corners': 'over_105_corners',
-            'prob_home_win': 'home_win',
-            'prob_draw': 'draw',
-            'prob_away_win': 'away_win',
-        }
-        
-        for field, market in mappings.items():
-            if field in result and market in self.calibrators:
+        for field, market in self.FIELDS.items():
+            if field in result and market in self._compiled:
                 result[field] = self.calibrate(market, result[field])
         
         return result
     
+    def calibrate_predictions(self, predictions: List[dict]) -> List[dict]:
+        """
+        Calibra uma lista de previsões: um vetor por mercado, uma aplicação
+        do calibrador por mercado (não por previsão).
+        """
+        results = [p.copy() for p in predictions]
+        
+        for field, market in self.FIELDS.items():
+            if market not in self._compiled:
+                continue
+            rows = [i for i, p in enumerate(predictions) if field in p]
+            if not rows:
+                continue
+            calibrated = self._compiled[market].apply([predictions[i][field] for i in rows])
+            for i, value in zip(rows, calibrated.tolist()):
+                results[i][field] = value
+        
+        return results
+    
     def get_status(self) -> Dict[str, dict]:
         """Retorna status de todos os calibradores."""
         return {
@@ -314,6 +388,8 @@ def plot_calibration_curve(probs: np.ndarray, outcomes: np.ndarray, title: str =
     Returns:
         Dict com dados para plotagem
     """
+    from sklearn.calibration import calibration_curve
+    
     prob_true, prob_pred = calibration_curve(outcomes, probs, n_bins=10, strategy='uniform')
     
     return {
@@ -0,0 +1,325 @@
+"""
+Backtest walk-forward (origem móvel), rodada a rodada.
+
+Para cada rodada (fold):
+1. Forças e âncoras: só jogos anteriores ao início da rodada
+2. Calibradores: treinados com as previsões (também fora da amostra) e
+   resultados das rodadas anteriores
+3. Avalia a rodada com as probabilidades brutas e calibradas
+
+As previsões de todas as partidas saem de uma passada vetorizada
+(BacktestEngine.as_of_parameters com corte no início da rodada); o que
+custa por fold é treinar os calibradores, então os folds rodam em paralelo
+(um processo por núcleo). Cada fold é gravado em
+<saida>/<variante>/fold_NNN.json assim que termina: uma execução
+interrompida continua de onde parou, e variantes do modelo (distribuições,
+método de calibração) ficam lado a lado para comparação.
+
+Folds só são reaproveitados se as entradas forem as mesmas: um hash das
+partidas, da configuração da variante e do arquivo de parâmetros do modelo
+vai no config.json e em cada fold. Se mudar (partidas novas renumeram as
+rodadas, outro método de calibração...), os folds antigos são descartados.
+
+Uso:
+    runner = WalkForwardRunner(engine, variante='negbin', distribution_prefs={'gols': 'negbinomial'})
+    resumo = runner.run()
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.engine.parameters import ParameterCalculator
+
+from .backtest_engine import BacktestEngine, MARKETS, score
+
+
+# Amostras mínimas de treino para calibrar um mercado (como train_calibrators)
+MIN_AMOSTRAS_CALIBRACAO = 20
+
+
+@dataclass
+class FoldResult:
+    """Métricas de uma rodada."""
+    fold: int
+    inicio: str  # Primeira data da rodada (corte dos dados de treino)
+    fim: str
+    n_treino: int
+    n_teste: int
+    # mercado -> {brier, log_loss, accuracy, brier_calibrado, log_loss_calibrado, accuracy_calibrado, metodo}
+    mercados: Dict[str, Dict] = field(default_factory=dict)
+    duracao_ms: float = 0.0
+    entrada: str = ''  # Hash das entradas (WalkForwardRunner.input_hash)
+
+
+def round_keys(datas: List[str]) -> np.ndarray:
+    """Rodada de cada data: semana ISO (rodadas de fim de semana e de meio de semana separadas)."""
+    chaves = []
+    for d in datas:
+        dia = date.fromisoformat(d[:10])
+        ano, semana, dia_semana = dia.isocalendar()
+        # Seg-qui (meio de semana) e sex-dom (fim de semana)
+        chaves.append((ano, semana, dia_semana >= 5))
+    unicas = sorted(set(chaves))
+    indice = {chave: i for i, chave in enumerate(unicas)}
+    return np.array([indice[c] for c in chaves], dtype=np.int64)
+
+
+def _calibrar(metodo: str, probs: np.ndarray, outcomes: np.ndarray, alvo: np.ndarray):
+    """Treina um calibrador nas rodadas anteriores e aplica à rodada avaliada."""
+    from .calibration import PlattScaling, IsotonicCalibrator
+
+    if metodo == 'auto':
+        # Mesmo critério do Calibrator.train
+        metodo = 'platt' if len(probs) < 500 else 'isotonic'
+    calibrador = PlattScaling() if metodo == 'platt' else IsotonicCalibrator()
+    calibrador.fit(probs, outcomes)
+    return calibrador.calibrate(alvo), metodo
+
+
+def _run_fold(job: dict) -> dict:
+    """Um fold (roda em processo separado): calibra e avalia cada mercado."""
+    inicio = time.perf_counter()
+    treino, teste = job['treino'], job['teste']
+    mercados = {}
+
+    for market in MARKETS:
+        probs, reais = job['probs'][market], job['reais'][market]
+        p_teste, y_teste = probs[teste], reais[teste]
+        resultado = score(p_teste, y_teste)
+
+        p_treino, y_treino = probs[treino], reais[treino]
+        # Calibrador só com as duas classes presentes e amostras suficientes
+        if job['metodo'] != 'nenhum' and len(p_treino) >= MIN_AMOSTRAS_CALIBRACAO and 0 < y_treino.mean() < 1:
+            calibradas, metodo = _calibrar(job['metodo'], p_treino, y_treino, p_teste)
+        else:
+            calibradas, metodo = p_teste, None
+        resultado.update({f'{nome}_calibrado': v for nome, v in score(calibradas, y_teste).items()})
+        resultado['metodo'] = metodo
+        mercados[market] = resultado
+
+    return asdict(FoldResult(
+        fold=job['fold'],
+        inicio=job['inicio'],
+        fim=job['fim'],
+        n_treino=int(treino.sum()),
+        n_teste=int(teste.sum()),
+        mercados=mercados,
+        duracao_ms=(time.perf_counter() - inicio) * 1000,
+        entrada=job['entrada']
+    ))
+
+
+class WalkForwardRunner:
+    """Executa e persiste o walk-forward de uma variante do modelo."""
+
+    def __init__(
+        self,
+        engine: BacktestEngine,
+        variante: str = 'base',
+        distribution_prefs: Optional[Dict[str, str]] = None,
+        metodo: str = 'auto',
+        min_rodadas_treino: int = 3,
+        min_jogos: int = 1,
+        max_workers: Optional[int] = None,
+        output_dir: str = 'data/walk_forward'
+    ):
+        """
+        Args:
+            engine: BacktestEngine com as partidas históricas
+            variante: Nome da variante (subdiretório dos resultados)
+            distribution_prefs: Distribuição por mercado (padrão: DEFAULT_DIST)
+            metodo: Calibração: 'auto', 'platt', 'isotonic' ou 'nenhum'
+            min_rodadas_treino: Rodadas iniciais só de treino (sem avaliação)
+            min_jogos: Jogos anteriores exigidos de cada time na partida avaliada
+            max_workers: Processos em paralelo (padrão: núcleos da máquina)
+            output_dir: Raiz dos resultados por variante
+        """
+        self.engine = engine
+        self.variante = variante
+        self.distribution_prefs = distribution_prefs
+        self.metodo = metodo
+        self.min_rodadas_treino = min_rodadas_treino
+        self.min_jogos = min_jogos
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.path = Path(output_dir) / variante
+
+    def _config(self) -> dict:
+        return {
+            'variante': self.variante,
+            'distribution_prefs': self.distribution_prefs,
+            'metodo': self.metodo,
+            'min_rodadas_treino': self.min_rodadas_treino,
+            'min_jogos': self.min_jogos,
+        }
+
+    def input_hash(self) -> str:
+        """Hash do que define os folds: partidas, configuração e parâmetros do modelo."""
+        partidas = [
+            (m.event_id, m.date, m.home_team, m.away_team,
+             m.home_score, m.away_score, m.home_corners, m.away_corners)
+            for m in self.engine.matches
+        ]
+        params_path = Path(ParameterCalculator.PARAMS_PATH)
+        parametros = hashlib.sha1(params_path.read_bytes()).hexdigest() if params_path.exists() else None
+        conteudo = json.dumps(
+            {'config': self._config(), 'partidas': partidas, 'parametros': parametros},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha1(conteudo.encode()).hexdigest()[:16]
+
+    def _jobs(self, entrada: str) -> List[dict]:
+        """Previsões fora da amostra de todas as partidas (uma passada) e um job por rodada."""
+        matches = self.engine.matches
+        datas = [m.date for m in matches]
+        rodadas = round_keys(datas)
+        n_rodadas = int(rodadas.max()) + 1
+
+        inicio_rodada = [min(d for d, r in zip(datas, rodadas) if r == i) for i in range(n_rodadas)]
+        fim_rodada = [max(d for d, r in zip(datas, rodadas) if r == i) for i in range(n_rodadas)]
+
+        # Corte de cada partida = início da sua rodada (nada da própria rodada entra)
+        params, historico = self.engine.as_of_parameters(
+            matches, as_of=[inicio_rodada[r] for r in rodadas]
+        )
+        probs = self.engine.price(params, self.distribution_prefs)
+        reais = self.engine.outcomes(matches)
+        avaliavel = historico >= self.min_jogos
+
+        return [
+            {
+                'fold': r,
+                'inicio': inicio_rodada[r],
+                'fim': fim_rodada[r],
+                'treino': rodadas < r,
+                'teste': (rodadas == r) & avaliavel,
+                'probs': probs,
+                'reais': reais,
+                'metodo': self.metodo,
+                'entrada': entrada,
+            }
+            for r in range(self.min_rodadas_treino, n_rodadas)
+            if ((rodadas == r) & avaliavel).any()
+        ]
+
+    def _fold_path(self, fold: int) -> Path:
+        return self.path / f'fold_{fold:03d}.json'
+
+    def _fold_done(self, fold: int, entrada: str) -> bool:
+        """Fold já gravado com as mesmas entradas."""
+        path = self._fold_path(fold)
+        if not path.exists():
+            return False
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('entrada') == entrada
+
+    def _discard(self) -> int:
+        """Apaga folds e resumo gravados (entradas mudaram)."""
+        paths = list(self.path.glob('fold_*.json')) + list(self.path.glob('resumo.json'))
+        for path in paths:
+            path.unlink()
+        return len(paths)
+
+    def _save(self, path: Path, data: dict) -> None:
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def run(self, refazer: bool = False, verbose: bool = True) -> dict:
+        """
+        Roda os folds pendentes em paralelo e grava o resumo.
+
+        Args:
+            refazer: Recalcula folds já gravados
+
+        Returns:
+            Resumo agregado (ver summarize)
+        """
+        inicio = time.perf_counter()
+        self.path.mkdir(parents=True, exist_ok=True)
+        entrada = self.input_hash()
+
+        config_path = self.path / 'config.json'
+        anterior = None
+        if config_path.exists():
+            with open(config_path, 'r', encoding='utf-8') as f:
+                anterior = json.load(f).get('entrada')
+        if anterior != entrada:
+            descartados = self._discard()
+            if verbose and descartados:
+                print(f"♻️ Entradas de '{self.variante}' mudaram: {descartados} arquivos antigos descartados")
+        self._save(config_path, {
+            **self._config(),
+            'n_partidas': len(self.engine.matches),
+            'entrada': entrada,
+        })
+
+        jobs = [j for j in self._jobs(entrada) if refazer or not self._fold_done(j['fold'], entrada)]
+        if verbose:
+            print(f"🔁 Walk-forward '{self.variante}': {len(jobs)} rodadas pendentes, {self.max_workers} processos")
+
+        if self.max_workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                self._save(self._fold_path(job['fold']), _run_fold(job))
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [pool.submit(_run_fold, job) for job in jobs]
+                for future in as_completed(futures):
+                    resultado = future.result()
+                    self._save(self._fold_path(resultado['fold']), resultado)
+
+        resumo = self.summarize()
+        resumo['duracao_ms'] = (time.perf_counter() - inicio) * 1000
+        self._save(self.path / 'resumo.json', resumo)
+        if verbose:
+            print(f"✅ {resumo['folds']} rodadas, {resumo['partidas']} partidas em {resumo['duracao_ms']:.0f} ms")
+        return resumo
+
+    def load_folds(self, entrada: Optional[str] = None) -> List[dict]:
+        """Folds gravados desta variante, em ordem (só os das entradas informadas, se houver)."""
+        folds = []
+        for path in sorted(self.path.glob('fold_*.json')):
+            with open(path, 'r', encoding='utf-8') as f:
+                fold = json.load(f)
+            if entrada is None or fold.get('entrada') == entrada:
+                folds.append(fold)
+        return folds
+
+    def summarize(self) -> dict:
+        """Métricas por mercado ponderadas pelo número de partidas de cada rodada."""
+        entrada = self.input_hash()
+        folds = self.load_folds(entrada)
+        pesos = np.array([f['n_teste'] for f in folds], dtype=float)
+        mercados = {}
+        for market in MARKETS:
+            if not folds:
+                break
+            mercados[market] = {
+                nome: float(np.average([f['mercados'][market][nome] for f in folds], weights=pesos))
+                for nome in ('brier', 'log_loss', 'accuracy', 'brier_calibrado', 'log_loss_calibrado', 'accuracy_calibrado')
+            }
+        return {
+            'variante': self.variante,
+            'entrada': entrada,
+            'folds': len(folds),
+            'partidas': int(pesos.sum()),
+            'mercados': mercados,
+        }
+
+
+def compare_variants(output_dir: str = 'data/walk_forward') -> Dict[str, dict]:
+    """Resumos gravados de todas as variantes (variante -> resumo)."""
+    resumos = {}
+    for path in sorted(Path(output_dir).glob('*/resumo.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            resumos[path.parent.name] = json.load(f)
+    return resumos
@@ -2,12 +2,14 @@
 Core - Módulos fundamentais do modelo estatístico
 """
 from .league_stats import LeagueStats
+from .timeline import LeagueTimeline
 from .team_model import TeamModel
 from .player_model import PlayerModel
 from .distributions import PoissonModel, NegBinomialModel
 
 __all__ = [
     'LeagueStats',
+    'LeagueTimeline',
     'TeamModel', 
     'PlayerModel',
     'PoissonModel',
@@ -0,0 +1,138 @@
+"""
+Artefato compilado do modelo (.npz).
+
+Um arquivo versionado com tudo que o MatchPredictor lê do banco para
+prever: âncoras da liga, forças dos times por mando, matriz de ratings
+dos jogadores, momentos de overdispersão (e a distribuição escolhida por
+mercado) e os calibradores treinados. Usa o mesmo layout de arrays do
+snapshot compartilhado (src.core.snapshot); os metadados vão em JSON
+dentro do próprio .npz, sem pickle.
+
+Carregar leva milissegundos e não abre conexão: API, scripts de backtest
+e apps Streamlit podem partir do artefato, e nós de previsão podem rodar
+sem banco.
+
+Construção (depois dos scrapers):
+    python -m src.core.artifact --saida data/modelo.npz --ligas 1 --temporada 2025
+
+Uso:
+    predictor = MatchPredictor.from_artifact('data/modelo.npz')
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import snapshot
+from .snapshot import LeagueSnapshot
+
+
+# Versão do layout; artefatos de outro formato precisam ser reconstruídos
+FORMATO = 1
+
+CALIBRATORS_PATH = 'data/calibrators.json'
+
+_META = '__meta__'
+
+
+def build(
+    db_config: dict,
+    league_ids: List[int],
+    temporada: str = "2025",
+    calibrators_path: Optional[str] = CALIBRATORS_PATH
+) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Calcula o conteúdo do artefato a partir do banco.
+
+    Args:
+        calibrators_path: JSON dos calibradores (src.backtest.calibration.Calibrator);
+                          ausente = artefato sem calibradores
+
+    Returns:
+        (arrays, meta) para save()
+    """
+    arrays, meta = snapshot.build(db_config, league_ids, temporada)
+    calibradores = {}
+    if calibrators_path and Path(calibrators_path).exists():
+        with open(calibrators_path, 'r') as f:
+            calibradores = json.load(f)
+    meta.update(formato=FORMATO, calibradores=calibradores)
+    return arrays, meta
+
+
+def save(path: str, arrays: Dict[str, np.ndarray], meta: dict) -> str:
+    """Grava o .npz (arquivo temporário + os.replace: leitores nunca veem um parcial)."""
+    destino = Path(path)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.modelo-', suffix='.npz', dir=destino.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **{nome: arrays[nome] for nome in snapshot.ARRAYS},
+                     **{_META: np.array(json.dumps(meta, ensure_ascii=False))})
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return str(destino)
+
+
+def load(path: str) -> LeagueSnapshot:
+    """
+    Abre o artefato (arrays em memória, sem banco).
+
+    Raises:
+        ValueError: Artefato de outro formato
+    """
+    with np.load(path, allow_pickle=False) as arquivo:
+        meta = json.loads(str(arquivo[_META]))
+        if meta.get('formato') != FORMATO:
+            raise ValueError(
+                f"Artefato {path} no formato {meta.get('formato')}, esperado {FORMATO}: reconstrua"
+            )
+        arrays = {nome: arquivo[nome] for nome in snapshot.ARRAYS}
+    return LeagueSnapshot(arrays, meta, path)
+
+
+def main():
+    """CLI: constrói o artefato a partir do banco."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Compila o modelo em um artefato .npz")
+    parser.add_argument('--saida', default='data/modelo.npz', help='Arquivo de saída')
+    parser.add_argument('--ligas', default='1', help='IDs das ligas, separados por vírgula')
+    parser.add_argument('--temporada', default='2025')
+    parser.add_argument('--calibradores', default=CALIBRATORS_PATH, help='JSON dos calibradores')
+    args = parser.parse_args()
+
+    db_config = {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': int(os.getenv('DB_PORT', 5432)),
+        'database': os.getenv('DB_NAME', 'estatisticas'),
+        'user': os.getenv('DB_USER', 'estatisticas_user'),
+        'password': os.getenv('DB_PASS', 'estatisticas_pass')
+    }
+
+    inicio = time.perf_counter()
+    arrays, meta = build(
+        db_config,
+        [int(x) for x in args.ligas.split(',') if x.strip()],
+        args.temporada,
+        args.calibradores
+    )
+    destino = save(args.saida, arrays, meta)
+
+    modelo = load(destino)
+    stats = modelo.stats()
+    print(f"✅ Artefato {destino} (versão {meta['versao']}) em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    print(f"   Ligas: {stats['ligas']} | Times: {stats['times']} | Jogadores: {stats['jogadores']}"
+          f" | Calibradores: {len(meta['calibradores'])} | {os.path.getsize(destino) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
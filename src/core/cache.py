@@ -0,0 +1,117 @@
+"""
+Cache em memória com limite de tamanho (LRU) e expiração (TTL).
+
+Usado pelos modelos (TeamModel, LeagueStats) para não consultar o banco
+a cada previsão, sem servir dados velhos para sempre:
+- LRU: ao passar de `maxsize`, descarta a entrada usada há mais tempo
+- TTL: entradas mais antigas que `ttl` segundos são recalculadas
+- Invalidação explícita por predicado (ex: todas as chaves de um time)
+- Contadores de hits/misses para monitoramento
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU com TTL, thread-safe.
+
+    Exemplo:
+        cache = TTLCache(maxsize=512, ttl=600)
+        cache.set(('strength', 10, 1, '2025'), strength)
+        cache.get(('strength', 10, 1, '2025'))
+        cache.invalidate(lambda key: key[1] == 10)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, name: str = "cache"):
+        """
+        Args:
+            maxsize: Número máximo de entradas
+            ttl: Tempo de vida em segundos (None = sem expiração)
+            name: Nome para identificar o cache nas métricas
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor da chave (ou `default` se ausente/expirado)."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena valor, descartando a entrada menos usada se necessário."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Remove todas as chaves para as quais `predicate(key)` é verdadeiro.
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
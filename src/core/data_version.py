@@ -0,0 +1,118 @@
+"""
+Versão dos dados (marca d'água do banco).
+
+Os dados só mudam quando os scrapers rodam. Um token curto derivado do
+maior updated_at e da contagem de linhas das tabelas lidas pela API
+(partidas, times, jogadores e estatísticas de jogadores) identifica a
+versão atual: serve de ETag e de chave para caches de resposta.
+
+A consulta é barata (agregados) e feita no máximo a cada
+CHECK_INTERVAL_SECONDS; entre verificações o token fica em memória.
+Contagens entram no token para detectar remoções, que não mexem no
+updated_at.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from . import db
+
+
+class DataVersion:
+    """Token da versão dos dados, com aviso quando muda."""
+
+    # Intervalo mínimo entre consultas ao banco (segundos)
+    CHECK_INTERVAL_SECONDS = float(os.getenv('DATA_VERSION_INTERVAL', 5))
+
+    QUERY = """
+        SELECT
+            (SELECT MAX(updated_at) FROM matches),
+            (SELECT COUNT(*) FROM matches),
+            (SELECT MAX(updated_at) FROM teams),
+            (SELECT COUNT(*) FROM teams),
+            (SELECT MAX(updated_at) FROM players),
+            (SELECT COUNT(*) FROM players),
+            (SELECT MAX(updated_at) FROM player_stats),
+            (SELECT COUNT(*) FROM player_stats)
+    """
+
+    def __init__(self, db_config: dict, check_interval: Optional[float] = None):
+        """
+        Args:
+            db_config: Configuração do banco de dados
+            check_interval: Segundos entre verificações (padrão: CHECK_INTERVAL_SECONDS)
+        """
+        self.db_config = db_config
+        self.check_interval = self.CHECK_INTERVAL_SECONDS if check_interval is None else check_interval
+        self._token: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.checks = 0
+        self.changes = 0
+
+    def current(self, force: bool = False) -> str:
+        """
+        Token da versão atual (consulta o banco se o intervalo passou).
+
+        Args:
+            force: Ignora o intervalo mínimo entre verificações
+        """
+        agora = time.monotonic()
+        if (
+            not force
+            and self._token is not None
+            and self._checked_at is not None
+            and agora - self._checked_at < self.check_interval
+        ):
+            return self._token
+
+        with self._lock:
+            # Outra thread pode ter acabado de verificar
+            if not force and self._checked_at is not None and agora - self._checked_at < self.check_interval:
+                return self._token
+
+            token = self._fetch()
+            anterior = self._token
+            if anterior is not None and anterior != token:
+                # Listeners rodam antes de publicar o token: quem vê a versão
+                # nova já encontra os caches dependentes limpos
+                self.changes += 1
+                for listener in list(self._listeners):
+                    listener(anterior, token)
+            self._token = token
+            self._checked_at = time.monotonic()
+            self.checks += 1
+            return token
+
+    def on_change(self, listener: Callable[[str, str], None]) -> None:
+        """Registra listener(anterior, novo) chamado quando a versão muda."""
+        self._listeners.append(listener)
+
+    def invalidate(self) -> None:
+        """Próxima chamada de current() consulta o banco."""
+        self._checked_at = None
+
+    def stats(self) -> dict:
+        return {
+            'versao': self._token,
+            'verificacoes': self.checks,
+            'mudancas': self.changes,
+            'intervalo_s': self.check_interval
+        }
+
+    def _fetch(self) -> str:
+        conn = db.connect(self.db_config)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.QUERY)
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        marca = '|'.join('' if v is None else str(v) for v in row)
+        return hashlib.sha1(marca.encode()).hexdigest()[:16]
@@ -0,0 +1,221 @@
+"""
+Pool de conexões com o PostgreSQL.
+
+Os modelos abrem uma conexão por consulta (get_connection → close).
+Com o pool, close() devolve a conexão em vez de encerrá-la, então o
+handshake/autenticação é pago uma vez por conexão do pool e o número de
+conexões simultâneas fica limitado (quem passa do limite espera).
+
+Cada consulta (cursor.execute) entra no histograma db_query_seconds,
+rotulado pelo módulo que a chamou (team_model, league_stats, ...).
+
+Configuração (variáveis de ambiente):
+- DB_POOL_MIN: conexões abertas de início (padrão 1)
+- DB_POOL_MAX: máximo de conexões simultâneas (padrão 20)
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Dict
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+from . import metrics
+
+
+POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', 20))
+
+_pools: Dict[tuple, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+QUERY_SECONDS = metrics.histogram(
+    'db_query_seconds', 'Duração de cada consulta ao banco', ['origem']
+)
+CHECKOUT_WAIT_SECONDS = metrics.histogram(
+    'db_checkout_wait_seconds', 'Espera por uma conexão livre do pool'
+)
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool com espera: getconn bloqueia quando todas as
+    conexões estão em uso (o pool do psycopg2 lançaria PoolError).
+    """
+
+    def __init__(self, db_config: dict, minconn: int = POOL_MIN, maxconn: int = POOL_MAX):
+        self.maxconn = maxconn
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **db_config)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+
+    def getconn(self):
+        inicio = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+        self._slots.acquire()
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_ms_total += espera * 1000
+        CHECKOUT_WAIT_SECONDS.observe(espera)
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._release()
+            raise
+
+    def putconn(self, conn) -> None:
+        try:
+            if not conn.closed:
+                # Não devolve transação aberta para o próximo usuário
+                conn.rollback()
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except psycopg2.Error:
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+        self._slots.release()
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+
+    def stats(self) -> dict:
+        return {
+            'max': self.maxconn,
+            'em_uso': self.in_use,
+            'aguardando': self.waiting,
+            'checkouts': self.checkouts,
+            'espera_media_ms': round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0
+        }
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool. Comporta-se como a conexão do psycopg2;
+    close() devolve ao pool.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already closed")
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, cursor_factory=None, **kwargs):
+        """Cursor cujas consultas são medidas (mantém o cursor_factory pedido)."""
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already closed")
+        if not metrics.ENABLED:
+            return self._conn.cursor(*args, cursor_factory=cursor_factory, **kwargs)
+        factory = _timed_factory(cursor_factory or psycopg2.extensions.cursor)
+        return self._conn.cursor(*args, cursor_factory=factory, **kwargs)
+    
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Conexão esquecida aberta (ex: exceção antes do close) volta ao pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_timed_factories: Dict[type, type] = {}
+
+
+def _timed_factory(base: type) -> type:
+    """Subclasse do cursor (ex: RealDictCursor) que mede execute/executemany."""
+    factory = _timed_factories.get(base)
+    if factory is None:
+        def execute(self, query, vars=None):
+            origem = sys._getframe(1).f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+            inicio = time.perf_counter()
+            try:
+                return base.execute(self, query, vars)
+            finally:
+                QUERY_SECONDS.observe(time.perf_counter() - inicio, origem=origem)
+        
+        def executemany(self, query, vars_list):
+            origem = sys._getframe(1).f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+            inicio = time.perf_counter()
+            try:
+                return base.executemany(self, query, vars_list)
+            finally:
+                QUERY_SECONDS.observe(time.perf_counter() - inicio, origem=origem)
+        
+        factory = type(f'Timed{base.__name__}', (base,), {
+            'execute': execute, 'executemany': executemany
+        })
+        _timed_factories[base] = factory
+    return factory
+
+
+def _key(db_config: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in db_config.items()))
+
+
+def get_pool(db_config: dict) -> ConnectionPool:
+    """Pool compartilhado do processo para esta configuração de banco."""
+    key = _key(db_config)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_config)
+                _pools[key] = pool
+    return pool
+
+
+def connect(db_config: dict) -> PooledConnection:
+    """Substituto de psycopg2.connect(**db_config) usando o pool."""
+    if db_config is None:
+        # Preditor carregado de artefato, sem banco: o dado pedido não está no artefato
+        raise RuntimeError("Sem banco configurado: dado não disponível no artefato do modelo")
+    pool = get_pool(db_config)
+    return PooledConnection(pool, pool.getconn())
+
+
+def pool_stats() -> list:
+    """Uso de cada pool aberto (para métricas)."""
+    return [
+        {'database': dict(key).get('database'), **pool.stats()}
+        for key, pool in list(_pools.items())
+    ]
+
+
+def close_all() -> None:
+    """Fecha todas as conexões de todos os pools (shutdown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
@@ -49,8 +49,8 @@ class BaseDistribution(ABC):
         pass
     
     @abstractmethod
-    def sample(self, n: int = 1) -> np.ndarray:
-        """Gera n amostras da distribuição."""
+    def sample(self, n: int = 1, random_state=None) -> np.ndarray:
+        """Gera n amostras da distribuição (random_state: Generator opcional)."""
         pass
     
     @abstractmethod
@@ -101,8 +101,8 @@ class PoissonModel(BaseDistribution):
     def cdf(self, k: int) -> float:
         return self._dist.cdf(k)
     
-    def sample(self, n: int = 1) -> np.ndarray:
-        return self._dist.rvs(size=n)
+    def sample(self, n: int = 1, random_state=None) -> np.ndarray:
+        return self._dist.rvs(size=n, random_state=random_state)
     
     def get_stats(self) -> DistributionResult:
         # Calcular probabilidades até valor onde acumula 99.9%
@@ -168,8 +168,8 @@ class NegBinomialModel(BaseDistribution):
     def cdf(self, k: int) -> float:
         return self._dist.cdf(k)
     
-    def sample(self, n: int = 1) -> np.ndarray:
-        return self._dist.rvs(size=n)
+    def sample(self, n: int = 1, random_state=None) -> np.ndarray:
+        return self._dist.rvs(size=n, random_state=random_state)
     
     def get_stats(self) -> DistributionResult:
         max_k = int(self.mu * 4 + 15)
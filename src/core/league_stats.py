@@ -9,12 +9,15 @@ Calcula as âncoras estatísticas:
 Essas médias servem como referência para times com poucos jogos.
 """
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from dataclasses import dataclass
 from typing import Optional, Dict
 import numpy as np
 
+from .timeline import LeagueTimeline, STAT_COLUMNS
+from .cache import TTLCache
+from . import db
+
 
 @dataclass
 class LeagueAverages:
@@ -48,12 +51,19 @@ class LeagueStats:
     - Times com poucos jogos não fogem muito dessas médias
     """
     
+    # Cache: médias, linha do tempo e overdispersão por liga
+    CACHE_MAXSIZE = 128
+    CACHE_TTL_SECONDS = 600
+    
     def __init__(self, db_config: dict):
         self.db_config = db_config
-        self._cache: dict = {}
+        # Chaves: (tipo, league_id, temporada, ...)
+        self._cache = TTLCache(self.CACHE_MAXSIZE, self.CACHE_TTL_SECONDS, name='league_stats')
+        # Snapshot compartilhado entre processos (src.core.snapshot), se anexado
+        self.snapshot = None
     
     def get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return db.connect(self.db_config)
     
     def calculate_averages(self, league_id: int, temporada: str = "2025") -> LeagueAverages:
         """
@@ -66,9 +76,16 @@ class LeagueStats:
         Returns:
             LeagueAverages com todas as médias calculadas
         """
-        cache_key = f"{league_id}_{temporada}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        if snapshot is not None:
+            averages = snapshot.league_averages(league_id, temporada)
+            if averages is not None:
+                return averages
+        
+        cache_key = ('averages', league_id, temporada)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         conn = self.get_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -119,9 +136,141 @@ class LeagueStats:
             temporada=temporada
         )
         
-        self._cache[cache_key] = averages
+        self._cache.set(cache_key, averages)
         return averages
     
+    def get_timeline(self, league_id: int, temporada: str = "2025") -> LeagueTimeline:
+        """
+        Carrega (uma vez) a linha do tempo da liga: partidas finalizadas
+        ordenadas por data, com somas acumuladas para consultas "as-of".
+        """
+        cache_key = ('timeline', league_id, temporada)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        conn = self.get_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        cursor.execute("SELECT id, nome FROM teams WHERE league_id = %s", (league_id,))
+        teams = cursor.fetchall()
+        
+        # Partidas em que mandante ou visitante pertence à liga
+        cursor.execute("""
+            SELECT 
+                m.data,
+                m.home_team_id,
+                m.away_team_id,
+                m.home_goals as gols_mandante,
+                m.away_goals as gols_visitante,
+                (m.home_yellow_cards + m.home_red_cards) as cartoes_mandante,
+                (m.away_yellow_cards + m.away_red_cards) as cartoes_visitante,
+                m.home_corners as escanteios_mandante,
+                m.away_corners as escanteios_visitante
+            FROM matches m
+            JOIN teams th ON m.home_team_id = th.id
+            JOIN teams ta ON m.away_team_id = ta.id
+            WHERE (th.league_id = %s OR ta.league_id = %s)
+            AND m.status = 'finished'
+            ORDER BY m.data
+        """, (league_id, league_id))
+        
+        partidas = cursor.fetchall()
+        conn.close()
+        
+        timeline = LeagueTimeline(
+            dates=[p['data'] for p in partidas],
+            home_ids=[p['home_team_id'] for p in partidas],
+            away_ids=[p['away_team_id'] for p in partidas],
+            stats={
+                col: [p[col] for p in partidas]
+                for col in STAT_COLUMNS
+            },
+            team_ids=[t['id'] for t in teams],
+            team_names={t['id']: t['nome'] for t in teams}
+        )
+        
+        self._cache.set(cache_key, timeline)
+        return timeline
+    
+    def averages_as_of(self, league_id: int, as_of, temporada: str = "2025") -> LeagueAverages:
+        """
+        Médias da liga considerando apenas partidas anteriores a `as_of`.
+        
+        Evita vazamento de dados em backtests: a partida avaliada
+        (e as futuras) não entram nas âncoras. `as_of=None` usa todas as partidas.
+        """
+        timeline = self.get_timeline(league_id, temporada)
+        totals = timeline.league_totals(timeline.index_as_of(as_of))
+        n = int(totals['jogos'])
+        
+        if n == 0:
+            return self._get_default_averages(temporada)
+        
+        medias = {col: totals[col] / n for col in STAT_COLUMNS}
+        
+        return LeagueAverages(
+            gols_mandante=medias['gols_mandante'],
+            gols_visitante=medias['gols_visitante'],
+            gols_total=medias['gols_mandante'] + medias['gols_visitante'],
+            cartoes_mandante=medias['cartoes_mandante'],
+            cartoes_visitante=medias['cartoes_visitante'],
+            cartoes_total=medias['cartoes_mandante'] + medias['cartoes_visitante'],
+            escanteios_mandante=medias['escanteios_mandante'],
+            escanteios_visitante=medias['escanteios_visitante'],
+            escanteios_total=medias['escanteios_mandante'] + medias['escanteios_visitante'],
+            total_jogos=n,
+            temporada=temporada
+        )
+    
+    def averages_at(self, timeline: LeagueTimeline, k: np.ndarray, temporada: str = "2025") -> LeagueAverages:
+        """
+        Versão vetorizada de averages_as_of: médias nas k primeiras partidas
+        da linha do tempo para um vetor de índices k (campos viram vetores).
+        Onde não há partidas anteriores, usa as médias padrão.
+        """
+        totals = timeline.league_totals_at(np.asarray(k))
+        n = totals['jogos']
+        default = self._get_default_averages(temporada)
+        medias = {
+            col: np.divide(totals[col], n, out=np.full(len(n), float(getattr(default, col))), where=n > 0)
+            for col in STAT_COLUMNS
+        }
+        
+        return LeagueAverages(
+            gols_mandante=medias['gols_mandante'],
+            gols_visitante=medias['gols_visitante'],
+            gols_total=medias['gols_mandante'] + medias['gols_visitante'],
+            cartoes_mandante=medias['cartoes_mandante'],
+            cartoes_visitante=medias['cartoes_visitante'],
+            cartoes_total=medias['cartoes_mandante'] + medias['cartoes_visitante'],
+            escanteios_mandante=medias['escanteios_mandante'],
+            escanteios_visitante=medias['escanteios_visitante'],
+            escanteios_total=medias['escanteios_mandante'] + medias['escanteios_visitante'],
+            total_jogos=n.astype(int),
+            temporada=temporada
+        )
+    
+    def invalidate(self, league_id: Optional[int] = None) -> int:
+        """
+        Descarta médias/linha do tempo/overdispersão em cache.
+        
+        Args:
+            league_id: Liga afetada (None = todas)
+            
+        Returns:
+            Número de entradas removidas
+        """
+        if league_id is None:
+            removed = len(self._cache)
+            self._cache.clear()
+            return removed
+        return self._cache.invalidate(lambda key: key[1] == league_id)
+    
+    def cache_stats(self) -> dict:
+        """Contadores de hit/miss do cache da liga."""
+        return self._cache.stats()
+    
     def _get_default_averages(self, temporada: str) -> LeagueAverages:
         """
         Médias históricas típicas do Brasileirão quando não há dados.
@@ -193,79 +342,174 @@ class LeagueStats:
             'recomendacao': 'poisson'
         }
 
+    # Limiar var/média acima do qual cada mercado passa para Binomial Negativa
+    LIMIAR_OVERDISPERSAO = {'gols': 1.4, 'cartoes': 1.2, 'escanteios': 1.3}
+    
+    # Expressões SQL por mercado/lado (NULL conta como 0, como nas médias)
+    _EXPR_MERCADOS = {
+        'gols': ('m.home_goals', 'm.away_goals'),
+        'cartoes': ('m.home_yellow_cards + m.home_red_cards', 'm.away_yellow_cards + m.away_red_cards'),
+        'escanteios': ('m.home_corners', 'm.away_corners'),
+    }
+
+    def _rec(self, mercado: str, mean: float, var: float) -> str:
+        thresh = self.LIMIAR_OVERDISPERSAO[mercado]
+        return 'negbinomial' if mean > 0 and var > mean * thresh else 'poisson'
+
     def get_overdispersion_by_market(self, league_id: int, temporada: str = "2025", window: int = 200) -> Dict[str, Dict]:
         """
         Calcula média/variância por mercado (gols, cartões, escanteios) e recomenda distribuição.
         Usa janela recente para refletir forma atual e respeitar overdispersão específica de cada variável.
+        
+        Os momentos (AVG / VAR_SAMP) são calculados no próprio banco e o resultado
+        fica em cache junto com as médias da liga.
         """
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        if snapshot is not None:
+            overdisp = snapshot.overdispersion_by_market(league_id, temporada, window)
+            if overdisp is not None:
+                return overdisp
+        
+        cache_key = ('overdisp', league_id, temporada, window)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        colunas = []
+        momentos = []
+        for mercado, (expr_m, expr_v) in self._EXPR_MERCADOS.items():
+            for lado, expr in (('mandante', expr_m), ('visitante', expr_v)):
+                alias = f"{mercado}_{lado}"
+                colunas.append(f"COALESCE({expr}, 0) AS {alias}")
+                momentos.append(f"AVG({alias}) AS {alias}_media, VAR_SAMP({alias}) AS {alias}_var")
+
         conn = self.get_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
 
         cursor.execute(
-            """
-            SELECT 
-                m.home_goals as gols_mandante,
-                m.away_goals as gols_visitante,
-                (m.home_yellow_cards + m.home_red_cards) as cartoes_mandante,
-                (m.away_yellow_cards + m.away_red_cards) as cartoes_visitante,
-                m.home_corners as escanteios_mandante,
-                m.away_corners as escanteios_visitante
-            FROM matches m
-            JOIN teams t ON m.home_team_id = t.id
-            WHERE t.league_id = %s
-            AND m.status = 'finished'
-            ORDER BY m.data DESC
-            LIMIT %s
+            f"""
+            WITH recentes AS (
+                SELECT {', '.join(colunas)}
+                FROM matches m
+                JOIN teams t ON m.home_team_id = t.id
+                WHERE t.league_id = %s
+                AND m.status = 'finished'
+                ORDER BY m.data DESC
+                LIMIT %s
+            )
+            SELECT COUNT(*) AS jogos, {', '.join(momentos)}
+            FROM recentes
             """,
             (league_id, window)
         )
 
-        partidas = cursor.fetchall()
+        row = cursor.fetchone()
         conn.close()
 
-        if not partidas:
+        if not row or not row['jogos']:
             default = self._get_default_variance()
-            return {
+            resultado = {
                 'gols': {**default['gols'], 'recomendacao': default['recomendacao']},
                 'cartoes': {'mandante': {'media': 2.1, 'variancia': 2.5}, 'visitante': {'media': 2.4, 'variancia': 2.9}, 'recomendacao': 'negbinomial'},
                 'escanteios': {'mandante': {'media': 5.2, 'variancia': 6.0}, 'visitante': {'media': 4.3, 'variancia': 5.0}, 'recomendacao': 'poisson'}
             }
+            # Liga sem jogos também fica em cache: sem isso cada chamada refaz a query
+            self._cache.set(cache_key, resultado)
+            return resultado
 
-        def _mean_var(values):
-            arr = np.array(values, dtype=float)
-            return float(np.mean(arr)), float(np.var(arr))
+        resultado = {}
+        for mercado in self._EXPR_MERCADOS:
+            lados = {
+                lado: {
+                    'media': float(row[f"{mercado}_{lado}_media"] or 0),
+                    'variancia': float(row[f"{mercado}_{lado}_var"] or 0)
+                }
+                for lado in ('mandante', 'visitante')
+            }
+            media = (lados['mandante']['media'] + lados['visitante']['media']) / 2
+            variancia = (lados['mandante']['variancia'] + lados['visitante']['variancia']) / 2
+            resultado[mercado] = {**lados, 'recomendacao': self._rec(mercado, media, variancia)}
 
-        gols_m = [p['gols_mandante'] or 0 for p in partidas]
-        gols_v = [p['gols_visitante'] or 0 for p in partidas]
-        cart_m = [p['cartoes_mandante'] or 0 for p in partidas]
-        cart_v = [p['cartoes_visitante'] or 0 for p in partidas]
-        esc_m = [p['escanteios_mandante'] or 0 for p in partidas]
-        esc_v = [p['escanteios_visitante'] or 0 for p in partidas]
+        self._cache.set(cache_key, resultado)
+        return resultado
 
-        m_gm, v_gm = _mean_var(gols_m)
-        m_gv, v_gv = _mean_var(gols_v)
-        m_cm, v_cm = _mean_var(cart_m)
-        m_cv, v_cv = _mean_var(cart_v)
-        m_em, v_em = _mean_var(esc_m)
-        m_ev, v_ev = _mean_var(esc_v)
+    def get_overdispersion_by_team(self, league_id: int, temporada: str = "2025", window: int = 19) -> Dict[int, Dict]:
+        """
+        Média/variância por time (gols marcados, cartões recebidos, escanteios a favor)
+        nos últimos `window` jogos de cada um, casa e fora juntos.
+        
+        Uma única query com ROW_NUMBER() por time; resultado em cache.
+        
+        Returns:
+            Dict team_id -> {'jogos', 'gols', 'cartoes', 'escanteios'}
+        """
+        cache_key = ('overdisp_times', league_id, temporada, window)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        def _rec(mean, var, thresh=1.4):
-            return 'negbinomial' if mean > 0 and var > mean * thresh else 'poisson'
+        def _lado(lado: int) -> str:
+            team_col = 'm.home_team_id' if lado == 0 else 'm.away_team_id'
+            exprs = ', '.join(
+                f"COALESCE({pares[lado]}, 0) AS {mercado}"
+                for mercado, pares in self._EXPR_MERCADOS.items()
+            )
+            return f"""
+                SELECT {team_col} AS team_id, m.data, {exprs}
+                FROM matches m
+                JOIN teams t ON {team_col} = t.id
+                WHERE t.league_id = %s
+                AND m.status = 'finished'
+            """
 
-        return {
-            'gols': {
-                'mandante': {'media': m_gm, 'variancia': v_gm},
-                'visitante': {'media': m_gv, 'variancia': v_gv},
-                'recomendacao': _rec((m_gm + m_gv) / 2, (v_gm + v_gv) / 2)
-            },
-            'cartoes': {
-                'mandante': {'media': m_cm, 'variancia': v_cm},
-                'visitante': {'media': m_cv, 'variancia': v_cv},
-                'recomendacao': _rec((m_cm + m_cv) / 2, (v_cm + v_cv) / 2, thresh=1.2)
-            },
-            'escanteios': {
-                'mandante': {'media': m_em, 'variancia': v_em},
-                'visitante': {'media': m_ev, 'variancia': v_ev},
-                'recomendacao': _rec((m_em + m_ev) / 2, (v_em + v_ev) / 2, thresh=1.3)
-            }
-        }
+        momentos = ', '.join(
+            f"AVG({mercado}) AS {mercado}_media, VAR_SAMP({mercado}) AS {mercado}_var"
+            for mercado in self._EXPR_MERCADOS
+        )
+
+        conn = self.get_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        cursor.execute(
+            f"""
+            WITH jogos AS ({_lado(0)} UNION ALL {_lado(1)}),
+            recentes AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY team_id ORDER BY data DESC) AS rn
+                FROM jogos
+            )
+            SELECT team_id, COUNT(*) AS jogos, {momentos}
+            FROM recentes
+            WHERE rn <= %s
+            GROUP BY team_id
+            """,
+            (league_id, league_id, window)
+        )
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        resultado = {}
+        for row in rows:
+            team = {'jogos': int(row['jogos'])}
+            for mercado in self._EXPR_MERCADOS:
+                media = float(row[f"{mercado}_media"] or 0)
+                variancia = float(row[f"{mercado}_var"] or 0)
+                team[mercado] = {
+                    'media': media,
+                    'variancia': variancia,
+                    'recomendacao': self._rec(mercado, media, variancia)
+                }
+            resultado[row['team_id']] = team
+
+        self._cache.set(cache_key, resultado)
+        return resultado
+
+    def get_distribution_prefs(self, league_id: int, temporada: str = "2025") -> Dict[str, str]:
+        """Distribuição recomendada por mercado (deriva do cache de overdispersão)."""
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        if snapshot is not None:
+            prefs = snapshot.distribution_prefs(league_id, temporada)
+            if prefs is not None:
+                return prefs
+        overdisp = self.get_overdispersion_by_market(league_id, temporada)
+        return {mercado: overdisp[mercado]['recomendacao'] for mercado in self._EXPR_MERCADOS}
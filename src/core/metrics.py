@@ -0,0 +1,278 @@
+"""
+Métricas de latência e uso (formato de texto do Prometheus).
+
+Instrumentação leve, sem dependências externas:
+- Histogram: distribuição de latências/tamanhos (buckets cumulativos)
+- Counter: contadores monotônicos
+- Coletores: funções chamadas na exportação (ex: hits dos caches, filas)
+- timed(): context manager/decorador que mede um trecho em um histograma
+
+Modo no-op: METRICS_ENABLED=0 desliga a coleta. observe()/inc() retornam
+na primeira linha e timed() devolve um context manager vazio compartilhado,
+então o custo nos pontos instrumentados fica desprezível.
+
+Exemplo:
+    QUERY = metrics.histogram('db_query_seconds', 'Tempo por consulta', ['origem'])
+    with metrics.timed(QUERY, origem='team_model'):
+        cursor.execute(...)
+    print(metrics.render())
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Buckets de latência em segundos (1 ms a 10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pares = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base: nome, ajuda, rótulos e séries protegidas por lock."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Contador monotônico por combinação de rótulos."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}'
+            for key, v in series
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos (contagens cumulativas na exportação)."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(key)
+            if serie is None:
+                # [contagem por bucket (+Inf no fim), soma, total]
+                serie = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][i] += 1
+            serie[1] += value
+            serie[2] += 1
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        """Contagem e soma de uma série (para testes/diagnóstico)."""
+        serie = self._series.get(self._key(labels))
+        if serie is None:
+            return None
+        return {'count': serie[2], 'sum': serie[1]}
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            series = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        linhas = self.header()
+        for key, (contagens, soma, total) in series:
+            acumulado = 0
+            for limite, c in zip(self.buckets + (float('inf'),), contagens):
+                acumulado += c
+                le = 'le="' + _format_value(float(limite)) + '"'
+                linhas.append(
+                    f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {acumulado}'
+                )
+            rotulos = _format_labels(self.labelnames, key)
+            linhas.append(f'{self.name}_sum{rotulos} {_format_value(soma)}')
+            linhas.append(f'{self.name}_count{rotulos} {total}')
+        return linhas
+
+
+# ==================== REGISTRO ====================
+
+_registry: Dict[str, _Metric] = {}
+_collectors: List[Callable[[], Iterable[str]]] = []
+_registry_lock = threading.Lock()
+
+
+def _register(cls, name: str, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Contador registrado (mesmo nome devolve a mesma instância)."""
+    return _register(Counter, name, help, labelnames)
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    """Histograma registrado (mesmo nome devolve a mesma instância)."""
+    return _register(Histogram, name, help, labelnames, buckets)
+
+
+def register_collector(fn: Callable[[], Iterable[str]]) -> None:
+    """
+    Registra uma função chamada a cada exportação; deve devolver linhas
+    no formato do Prometheus (ver gauge_lines).
+    """
+    with _registry_lock:
+        _collectors.append(fn)
+
+
+def gauge_lines(name: str, help: str, samples: Iterable[Tuple[dict, float]], kind: str = 'gauge') -> List[str]:
+    """Linhas de uma métrica calculada na hora: samples = [(rótulos, valor)]."""
+    linhas = [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+    for labels, value in samples:
+        nomes = tuple(labels)
+        linhas.append(
+            f'{name}{_format_labels(nomes, tuple(labels[n] for n in nomes))} {_format_value(value)}'
+        )
+    return linhas
+
+
+def render() -> str:
+    """Todas as métricas no formato de texto do Prometheus (0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+        collectors = list(_collectors)
+    linhas: List[str] = []
+    for metric in metrics:
+        linhas.extend(metric.collect())
+    for collector in collectors:
+        try:
+            linhas.extend(collector())
+        except Exception as e:  # um coletor com erro não derruba a exportação
+            linhas.append(f'# coletor {getattr(collector, "__name__", "?")} falhou: {e}')
+    return '\n'.join(linhas) + '\n'
+
+
+def reset() -> None:
+    """Zera todas as séries (mantém as métricas registradas)."""
+    with _registry_lock:
+        for metric in _registry.values():
+            metric.reset()
+
+
+# ==================== INSTRUMENTAÇÃO ====================
+
+def timed(hist: Histogram, **labels):
+    """
+    Mede a duração de um trecho no histograma (em segundos).
+
+    Uso como context manager (`with metrics.timed(H, etapa='x'):`) ou
+    decorador (`@metrics.timed(H, etapa='x')`).
+    """
+    return _Timer(hist, labels) if ENABLED else _NOOP_TIMER
+
+
+class _Timer:
+    __slots__ = ('hist', 'labels', '_inicio')
+
+    def __init__(self, hist: Histogram, labels: dict):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self._inicio, **self.labels)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        hist, labels = self.hist, self.labels
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - inicio, **labels)
+        return wrapper
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        return fn
+
+
+_NOOP_TIMER = _NoopTimer()
@@ -10,12 +10,16 @@ Cria ratings individuais por jogador:
 Usado para ajustar as previsões baseado na escalação.
 """
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple
 import numpy as np
 import json
+import threading
+import time
+
+from . import db
 
 
 @dataclass
@@ -69,97 +73,374 @@ class PlayerModel:
     def __init__(self, db_config: dict):
         self.db_config = db_config
         self._cache: Dict[int, PlayerRating] = {}
+        
+        # Cache por updated_at: carimbo por jogador, índice por time e marca d'água
+        self._stamps: Dict[int, Optional[datetime]] = {}
+        self._team_of: Dict[int, Optional[int]] = {}
+        self._team_players: Dict[Optional[int], List[int]] = {}
+        self._watermark: Optional[datetime] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.RLock()
+        
+        # Snapshot compartilhado entre processos (src.core.snapshot), se anexado
+        self.snapshot = None
+        
+        # Contadores
+        self.full_loads = 0
+        self.incremental_loads = 0
+        self.reloaded_players = 0
     
     def get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return db.connect(self.db_config)
+    
+    # Chaves do raw_stats (JSONB) por estatística: usa a primeira com valor
+    STAT_KEYS = {
+        'minutos': ('minutos_jogados', 'minutes_played'),
+        'jogos': ('jogos', 'appearances'),
+        'gols': ('gols', 'goals'),
+        'assistencias': ('assistencias', 'assists'),
+        'finalizacoes': ('finalizacoes', 'shots'),
+        'escanteios_batidos': ('escanteios_batidos', 'corners', 'crosses'),
+        'desarmes': ('desarmes', 'tackles'),
+        'interceptacoes': ('interceptacoes', 'interceptions'),
+        'faltas': ('faltas_cometidas', 'fouls'),
+        'cartoes_amarelos': ('cartoes_amarelos', 'yellow_cards'),
+        'cartoes_vermelhos': ('cartoes_vermelhos', 'red_cards'),
+    }
+    
+    # Intervalo mínimo entre consultas da marca d'água (updated_at) no banco
+    CHECK_INTERVAL_SECONDS = 60
+    
+    # Sobreposição da busca incremental: o trigger carimba CURRENT_TIMESTAMP
+    # (início da transação), então um commit lento pode aparecer com carimbo
+    # anterior à marca d'água já lida
+    WATERMARK_OVERLAP_SECONDS = 300
     
     def calculate_player_rating(self, player_id: int) -> PlayerRating:
         """
         Calcula o rating completo de um jogador.
         
-        Usa as estatísticas raw_stats armazenadas em JSONB.
+        Usa as estatísticas raw_stats armazenadas em JSONB. Os ratings ficam
+        em memória e só são recalculados quando o updated_at do jogador muda.
         """
-        if player_id in self._cache:
-            return self._cache[player_id]
+        snapshot = self._players_snapshot()
+        if snapshot is not None:
+            return snapshot.player_ratings_for([player_id])[0] or self._default_rating(player_id)
         
+        self.refresh()
+        rating = self._cache.get(player_id)
+        return rating if rating is not None else self._default_rating(player_id)
+    
+    def get_ratings(self, player_ids: List[int]) -> List[PlayerRating]:
+        """Ratings de vários jogadores, direto do cache em memória."""
+        snapshot = self._players_snapshot()
+        if snapshot is not None:
+            return [
+                rating or self._default_rating(pid)
+                for pid, rating in zip(player_ids, snapshot.player_ratings_for(player_ids))
+            ]
+        
+        self.refresh()
+        return [
+            self._cache.get(pid) or self._default_rating(pid)
+            for pid in player_ids
+        ]
+    
+    def refresh(self, force: bool = False) -> int:
+        """
+        Mantém o cache de ratings sincronizado com o banco.
+        
+        - Cache vazio: carrega todos os jogadores em uma query
+        - Depois: no máximo a cada CHECK_INTERVAL_SECONDS busca os jogadores com
+          updated_at >= marca d'água − WATERMARK_OVERLAP_SECONDS e recarrega
+          apenas os que têm carimbo diferente do guardado em memória
+        - Se o número de jogadores mudou (remoções), recarrega tudo
+        
+        Args:
+            force: Ignora o intervalo mínimo entre verificações
+            
+        Returns:
+            Número de jogadores (re)carregados
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and \
+                now - self._checked_at < self.CHECK_INTERVAL_SECONDS:
+            return 0
+        
+        with self._lock:
+            if not force and self._checked_at is not None and \
+                    time.monotonic() - self._checked_at < self.CHECK_INTERVAL_SECONDS:
+                return 0
+            
+            conn = self.get_connection()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("SELECT COUNT(*) as jogadores FROM players")
+            row = cursor.fetchone()
+            conn.close()
+            
+            if self._watermark is None or row['jogadores'] != len(self._stamps):
+                loaded = self._load(full=True)
+            else:
+                loaded = self._load(
+                    since=self._watermark - timedelta(seconds=self.WATERMARK_OVERLAP_SECONDS)
+                )
+            
+            self._checked_at = time.monotonic()
+            return loaded
+    
+    def invalidate(self) -> None:
+        """Força a verificação do banco na próxima consulta de rating."""
+        self._checked_at = None
+    
+    def all_ratings(self) -> Tuple[Dict[int, PlayerRating], Dict[int, Optional[int]]]:
+        """Todos os ratings (sincronizados com o banco) e o time atual de cada jogador."""
+        self.refresh()
+        with self._lock:
+            return dict(self._cache), dict(self._team_of)
+    
+    def _players_snapshot(self):
+        """Snapshot anexado, se tiver ratings de jogadores."""
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        return snapshot if snapshot is not None and snapshot.has_players else None
+    
+    def cache_stats(self) -> dict:
+        """Tamanho e marca d'água do cache de ratings."""
+        return {
+            'name': 'player_ratings',
+            'size': len(self._cache),
+            'times': len(self._team_players),
+            'watermark': self._watermark.isoformat() if self._watermark else None,
+            'cargas_completas': self.full_loads,
+            'cargas_incrementais': self.incremental_loads,
+            'jogadores_recarregados': self.reloaded_players
+        }
+    
+    def _load(self, full: bool = False, since=None) -> int:
+        """
+        Recarrega todos os jogadores (full) ou os alterados a partir de `since`.
+        
+        No modo incremental, jogadores cujo carimbo é igual ao já guardado em
+        `_stamps` (vistos numa carga anterior, dentro da sobreposição) são ignorados.
+        """
+        rows = self._fetch_rows(
+            "WHERE GREATEST(p.updated_at, ps.updated_at) >= %s" if since is not None else "",
+            [since] if since is not None else []
+        )
+        
+        if full:
+            self._cache = {}
+            self._stamps = {}
+            self._team_of = {}
+            self._watermark = None
+            self.full_loads += 1
+        else:
+            rows = [
+                row for row in rows
+                if row['id'] not in self._stamps or row['stamp'] != self._stamps[row['id']]
+            ]
+            if not rows:
+                return 0
+            self.incremental_loads += 1
+        
+        self._store(rows)
+        self.reloaded_players += len(rows)
+        return len(rows)
+    
+    def _store(self, rows: List[dict]) -> Dict[int, PlayerRating]:
+        """Guarda ratings, carimbos updated_at e o índice time -> jogadores."""
+        ratings = {r.player_id: r for r in self._ratings_from_rows(rows)}
+        self._cache.update(ratings)
+        
+        for row in rows:
+            self._team_of[row['id']] = row['time_atual_id']
+            if row['stamp'] is not None:
+                self._stamps[row['id']] = row['stamp']
+                if self._watermark is None or row['stamp'] > self._watermark:
+                    self._watermark = row['stamp']
+            else:
+                self._stamps.setdefault(row['id'], None)
+        
+        team_players: Dict[int, List[int]] = {}
+        for pid, team_id in self._team_of.items():
+            team_players.setdefault(team_id, []).append(pid)
+        self._team_players = team_players
+        return ratings
+    
+    def _fetch_rows(self, where: str, params: list) -> List[dict]:
+        """Um registro por jogador (estatísticas do período mais recente)."""
         conn = self.get_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Buscar jogador e estatísticas
-        cursor.execute("""
-            SELECT 
-                p.id, p.nome, p.posicao,
-                ps.raw_stats
+        cursor.execute(f"""
+            SELECT DISTINCT ON (p.id)
+                p.id, p.nome, p.posicao, p.time_atual_id,
+                ps.raw_stats,
+                GREATEST(p.updated_at, ps.updated_at) as stamp
             FROM players p
+            LEFT JOIN teams t ON p.time_atual_id = t.id
             LEFT JOIN player_stats ps ON ps.player_id = p.id
-            WHERE p.id = %s
-        """, (player_id,))
+            {where}
+            ORDER BY p.id, ps.updated_at DESC NULLS LAST
+        """, params)
         
-        result = cursor.fetchone()
+        rows = cursor.fetchall()
         conn.close()
+        return rows
+    
+    def load_ratings(
+        self,
+        team_id: Optional[int] = None,
+        league_id: Optional[int] = None,
+        player_ids: Optional[List[int]] = None
+    ) -> Dict[int, PlayerRating]:
+        """
+        Carrega e calcula ratings em lote direto do banco: uma query, cálculo vetorizado.
+        
+        Args:
+            team_id: Jogadores do elenco atual do time
+            league_id: Jogadores de todos os times da liga
+            player_ids: Jogadores específicos
+            
+        Returns:
+            Dict player_id -> PlayerRating (também guardados no cache)
+        """
+        filtros = []
+        params = []
+        if team_id is not None:
+            filtros.append("p.time_atual_id = %s")
+            params.append(team_id)
+        if league_id is not None:
+            filtros.append("t.league_id = %s")
+            params.append(league_id)
+        if player_ids is not None:
+            filtros.append("p.id = ANY(%s)")
+            params.append(list(player_ids))
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        
+        rows = self._fetch_rows(where, params)
+        with self._lock:
+            return self._store(rows)
+    
+    def _ratings_from_rows(self, rows: List[dict]) -> List[PlayerRating]:
+        """Transforma linhas (id, nome, posicao, raw_stats) em PlayerRatings."""
+        if not rows:
+            return []
+        
+        stats = [r['raw_stats'] or {} for r in rows]
+        posicoes = [self._normalize_position(r['posicao']) for r in rows]
+        
+        # Colunas: uma por estatística, uma linha por jogador
+        cols = {
+            nome: np.array([self._first_stat(st, keys) for st in stats], dtype=float)
+            for nome, keys in self.STAT_KEYS.items()
+        }
+        # Nota média (0-10); sem 'nota_media' assume 6.0
+        cols['nota'] = np.array([
+            float(st.get('nota_media', 6.0) or st.get('rating', 6.0) or 6.0) for st in stats
+        ])
+        
+        arr = self.rating_arrays(cols, posicoes)
+        
+        return [
+            PlayerRating(
+                player_id=r['id'],
+                nome=r['nome'],
+                posicao=posicoes[i],
+                rating_geral=float(arr['rating_geral'][i]),
+                rating_ataque=float(arr['rating_ataque'][i]),
+                rating_defesa=float(arr['rating_defesa'][i]),
+                rating_disciplina=float(arr['rating_disciplina'][i]),
+                rating_escanteios=float(arr['rating_escanteios'][i]),
+                gols_p90=float(arr['gols_p90'][i]),
+                assistencias_p90=float(arr['assistencias_p90'][i]),
+                finalizacoes_p90=float(arr['finalizacoes_p90'][i]),
+                desarmes_p90=float(arr['desarmes_p90'][i]),
+                interceptacoes_p90=float(arr['interceptacoes_p90'][i]),
+                faltas_p90=float(arr['faltas_p90'][i]),
+                cartoes_p90=float(arr['cartoes_p90'][i]),
+                minutos_jogados=int(cols['minutos'][i]),
+                jogos=int(cols['jogos'][i])
+            )
+            for i, r in enumerate(rows)
+        ]
+    
+    @staticmethod
+    def _first_stat(stats: dict, keys: tuple) -> float:
+        """Primeiro valor não-nulo entre as chaves alternativas (PT/EN)."""
+        for key in keys:
+            value = stats.get(key, 0)
+            if value:
+                return value
+        return 0
+    
+    def rating_arrays(self, cols: Dict[str, np.ndarray], posicoes: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Calcula todos os ratings de uma vez (0-100), um elemento por jogador.
         
-        if not result:
-            return self._default_rating(player_id)
+        Args:
+            cols: Vetores de STAT_KEYS (totais da temporada) + 'nota' (0-10)
+            posicoes: Posições já normalizadas
+        """
+        jogos = cols['jogos']
+        minutos = cols['minutos']
+        tem_jogos = jogos > 0
+        pj = np.maximum(jogos, 1)  # Divisor seguro; resultados sem jogos são mascarados
         
-        stats = result['raw_stats'] or {}
-        posicao = self._normalize_position(result['posicao'])
+        def _peso(tipo: str, default: float) -> np.ndarray:
+            return np.array([self.PESOS_POSICAO.get(p, {}).get(tipo, default) for p in posicoes])
         
-        # Extrair estatísticas relevantes
-        minutos = stats.get('minutos_jogados', 0) or stats.get('minutes_played', 0) or 0
-        jogos = stats.get('jogos', 0) or stats.get('appearances', 0) or 0
+        def _score(value: np.ndarray, sem_dados: float, mask: np.ndarray) -> np.ndarray:
+            return np.where(mask, np.clip(value, 0, 100), sem_dados)
         
-        # Calcular por 90 minutos
-        p90_factor = 90 / max(minutos / max(jogos, 1), 1) if minutos > 0 else 0
+        # Por jogo
+        gols_pj = cols['gols'] / pj
+        assists_pj = cols['assistencias'] / pj
+        shots_pj = cols['finalizacoes'] / pj
+        desarmes_pj = cols['desarmes'] / pj
+        inter_pj = cols['interceptacoes'] / pj
+        esc_pj = cols['escanteios_batidos'] / pj
+        cartoes_pj = (cols['cartoes_amarelos'] + cols['cartoes_vermelhos'] * 3) / pj
+        
+        # Ataque — referência: atacante elite = 0.7 gols/jogo, 0.4 assists/jogo
+        peso_ataque = _peso('ataque', 0.5)
+        ataque = (
+            (gols_pj / 0.7) * 40 +      # Peso maior para gols
+            (assists_pj / 0.4) * 35 +    # Assistências
+            (shots_pj / 3.0) * 25        # Finalizações
+        ) * peso_ataque
         
-        gols = (stats.get('gols', 0) or stats.get('goals', 0) or 0)
-        assistencias = (stats.get('assistencias', 0) or stats.get('assists', 0) or 0)
-        finalizacoes = (stats.get('finalizacoes', 0) or stats.get('shots', 0) or 0)
-        escanteios_batidos = (stats.get('escanteios_batidos', 0) or stats.get('corners', 0) or stats.get('crosses', 0) or 0)
-        desarmes = (stats.get('desarmes', 0) or stats.get('tackles', 0) or 0)
-        interceptacoes = (stats.get('interceptacoes', 0) or stats.get('interceptions', 0) or 0)
-        faltas = (stats.get('faltas_cometidas', 0) or stats.get('fouls', 0) or 0)
-        cartoes_amarelos = (stats.get('cartoes_amarelos', 0) or stats.get('yellow_cards', 0) or 0)
-        cartoes_vermelhos = (stats.get('cartoes_vermelhos', 0) or stats.get('red_cards', 0) or 0)
+        # Defesa — zagueiro elite = 3 desarmes + 2 interceptações por jogo
+        peso_defesa = _peso('defesa', 0.5)
+        defesa = ((desarmes_pj / 3.0) * 50 + (inter_pj / 2.0) * 50) * peso_defesa
         
-        # Ratings
-        rating_geral = stats.get('nota_media', 6.0) or stats.get('rating', 6.0) or 6.0
+        # Escanteios — especialista bate ~2.5 escanteios/jogo
+        peso_esc = np.array([0.6 if p in ('Lateral', 'Meia') else 0.4 for p in posicoes])
+        escanteios = ((esc_pj / 2.5) * 70 + (shots_pj / 3.0) * 30) * peso_esc
         
-        # Calcular ratings específicos
-        rating_ataque = self._calculate_attack_rating(
-            gols, assistencias, finalizacoes, jogos, posicao
-        )
-        rating_defesa = self._calculate_defense_rating(
-            desarmes, interceptacoes, jogos, posicao
-        )
-        rating_disciplina = self._calculate_discipline_rating(
-            faltas, cartoes_amarelos, cartoes_vermelhos, jogos
-        )
-        rating_escanteios = self._calculate_corners_rating(
-            escanteios_batidos, finalizacoes, jogos, posicao
-        )
+        # Disciplina — 0 cartões = 100, 1 cartão/jogo (vermelho = 3x) = 0
+        disciplina = 100 - cartoes_pj * 100
         
-        rating = PlayerRating(
-            player_id=player_id,
-            nome=result['nome'],
-            posicao=posicao,
-            rating_geral=min(rating_geral * 10, 100),  # Converter 0-10 para 0-100
-            rating_ataque=rating_ataque,
-            rating_defesa=rating_defesa,
-            rating_disciplina=rating_disciplina,
-            rating_escanteios=rating_escanteios,
-            gols_p90=gols * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            assistencias_p90=assistencias * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            finalizacoes_p90=finalizacoes * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            desarmes_p90=desarmes * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            interceptacoes_p90=interceptacoes * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            faltas_p90=faltas * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            cartoes_p90=(cartoes_amarelos + cartoes_vermelhos * 2) * p90_factor / max(jogos, 1) if jogos > 0 else 0,
-            minutos_jogados=minutos,
-            jogos=jogos
-        )
+        # Estatísticas por 90 minutos
+        p90_factor = np.where(minutos > 0, 90 / np.maximum(minutos / pj, 1), 0.0)
         
-        self._cache[player_id] = rating
-        return rating
+        def _p90(total: np.ndarray) -> np.ndarray:
+            return np.where(tem_jogos, total * p90_factor / pj, 0.0)
+        
+        return {
+            'rating_geral': np.minimum(cols['nota'] * 10, 100),  # Converter 0-10 para 0-100
+            # Goleiro não é cobrado por ataque, atacante não é cobrado por defesa
+            'rating_ataque': _score(ataque, 50.0, tem_jogos & (peso_ataque > 0)),
+            'rating_defesa': _score(defesa, 50.0, tem_jogos & (peso_defesa > 0)),
+            'rating_disciplina': _score(disciplina, 70.0, tem_jogos),  # Sem dados, assume razoável
+            'rating_escanteios': _score(escanteios, 50.0, tem_jogos),
+            'gols_p90': _p90(cols['gols']),
+            'assistencias_p90': _p90(cols['assistencias']),
+            'finalizacoes_p90': _p90(cols['finalizacoes']),
+            'desarmes_p90': _p90(cols['desarmes']),
+            'interceptacoes_p90': _p90(cols['interceptacoes']),
+            'faltas_p90': _p90(cols['faltas']),
+            'cartoes_p90': _p90(cols['cartoes_amarelos'] + cols['cartoes_vermelhos'] * 2)
+        }
     
     def _normalize_position(self, posicao: str) -> str:
         """Normaliza posição para categorias padrão."""
@@ -183,92 +464,6 @@ class PlayerModel:
         else:
             return 'Meia'
     
-    def _calculate_attack_rating(
-        self, gols: int, assists: int, shots: int, jogos: int, posicao: str
-    ) -> float:
-        """
-        Calcula rating ofensivo (0-100).
-        Ajustado pela posição.
-        """
-        if jogos == 0:
-            return 50.0
-        
-        # Gols e assistências por jogo
-        gols_pj = gols / jogos
-        assists_pj = assists / jogos
-        shots_pj = shots / jogos
-        
-        # Score base (ajustado por posição)
-        peso = self.PESOS_POSICAO.get(posicao, {'ataque': 0.5})['ataque']
-        
-        if peso == 0:  # Goleiro
-            return 50.0
-        
-        # Normalizar para 0-100
-        # Referência: atacante elite = 0.7 gols/jogo, 0.4 assists/jogo
-        score = (
-            (gols_pj / 0.7) * 40 +      # Peso maior para gols
-            (assists_pj / 0.4) * 35 +    # Assistências
-            (shots_pj / 3.0) * 25        # Finalizações
-        ) * peso
-        
-        return min(max(score, 0), 100)
-    
-    def _calculate_defense_rating(
-        self, desarmes: int, interceptacoes: int, jogos: int, posicao: str
-    ) -> float:
-        """Calcula rating defensivo (0-100)."""
-        if jogos == 0:
-            return 50.0
-        
-        peso = self.PESOS_POSICAO.get(posicao, {'defesa': 0.5})['defesa']
-        
-        if peso == 0:  # Atacante não é cobrado por defesa
-            return 50.0
-        
-        # Por jogo
-        desarmes_pj = desarmes / jogos
-        inter_pj = interceptacoes / jogos
-        
-        # Normalizar (zagueiro elite = 3 desarmes + 2 interceptações por jogo)
-        score = (
-            (desarmes_pj / 3.0) * 50 +
-            (inter_pj / 2.0) * 50
-        ) * peso
-        
-        return min(max(score, 0), 100)
-
-    def _calculate_corners_rating(
-        self, escanteios_batidos: int, finalizacoes: int, jogos: int, posicao: str
-    ) -> float:
-        """Calcula influência em escanteios (0-100) combinando bolas paradas e volume ofensivo."""
-        if jogos == 0:
-            return 50.0
-        # Referência: especialista bate ~2.5 escanteios/jogo
-        esc_pj = escanteios_batidos / jogos
-        fin_pj = finalizacoes / jogos
-        peso = 0.6 if posicao in ['Lateral', 'Meia'] else 0.4
-        score = (esc_pj / 2.5) * 70 + (fin_pj / 3.0) * 30
-        return min(max(score * peso, 0), 100)
-    
-    def _calculate_discipline_rating(
-        self, faltas: int, amarelos: int, vermelhos: int, jogos: int
-    ) -> float:
-        """
-        Calcula rating de disciplina (0-100).
-        100 = sem cartões, 0 = muitos cartões.
-        """
-        if jogos == 0:
-            return 70.0  # Sem dados, assume razoável
-        
-        # Cartões por jogo (vermelho = 3x amarelo)
-        cartoes_pj = (amarelos + vermelhos * 3) / jogos
-        
-        # 0 cartões = 100, 1 cartão/jogo = 0
-        score = 100 - (cartoes_pj * 100)
-        
-        return min(max(score, 0), 100)
-    
     def _default_rating(self, player_id: int) -> PlayerRating:
         """Rating padrão quando não há dados."""
         return PlayerRating(
@@ -282,18 +477,17 @@ class PlayerModel:
         )
     
     def get_team_players_ratings(self, team_id: int) -> List[PlayerRating]:
-        """Retorna ratings de todos os jogadores de um time."""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT id FROM players WHERE time_atual_id = %s
-        """, (team_id,))
-        
-        players = cursor.fetchall()
-        conn.close()
+        """Retorna ratings de todos os jogadores de um time (do cache em memória)."""
+        snapshot = self._players_snapshot()
+        if snapshot is not None:
+            return snapshot.team_players(team_id)
         
-        return [self.calculate_player_rating(p['id']) for p in players]
+        self.refresh()
+        return [self._cache[pid] for pid in self._team_players.get(team_id, [])]
+    
+    def get_league_players_ratings(self, league_id: int) -> List[PlayerRating]:
+        """Retorna ratings de todos os jogadores da liga (uma única query)."""
+        return list(self.load_ratings(league_id=league_id).values())
     
     def calculate_lineup_strength(self, player_ids: List[int]) -> dict:
         """
@@ -310,7 +504,7 @@ class PlayerModel:
                 'rating_medio': 50.0
             }
         
-        ratings = [self.calculate_player_rating(pid) for pid in player_ids]
+        ratings = self.get_ratings(player_ids)
         
         return {
             'ataque': np.mean([r.rating_ataque for r in ratings]),
@@ -324,18 +518,27 @@ class PlayerModel:
     def calculate_lineup_ratios(self, player_ids: List[int]) -> dict:
         """Converte força da escalação em multiplicadores (ratios) para λ/κ/μ."""
         strength = self.calculate_lineup_strength(player_ids)
-        ataque = strength['ataque']
-        esc = strength.get('escanteios', 50.0)
-        disciplina = strength['disciplina']
+        ratios = self.ratios_from_strength(
+            strength['ataque'], strength.get('escanteios', 50.0), strength['disciplina']
+        )
+        ratios['strength_snapshot'] = strength
+        return ratios
+    
+    @staticmethod
+    def ratios_from_strength(ataque, escanteios, disciplina) -> dict:
+        """
+        Multiplicadores a partir das médias da escalação (escalares ou vetores).
         
-        def _ratio(value: float, base: float, sens: float, low: float = 0.7, high: float = 1.35) -> float:
+        Returns:
+            Dict com off_ratio, cross_ratio, foul_ratio
+        """
+        def _ratio(value, base: float, sens: float, low: float = 0.7, high: float = 1.35):
             delta = (value - base) / 100.0
-            return max(low, min(high, 1.0 + delta * sens))
+            return np.clip(1.0 + delta * sens, low, high)
         
-        indisciplina = max(0.0, 70.0 - disciplina)
+        indisciplina = np.maximum(0.0, 70.0 - np.asarray(disciplina, dtype=float))
         return {
             'off_ratio': _ratio(ataque, 50.0, 0.8),
-            'cross_ratio': _ratio(esc, 50.0, 0.6),
-            'foul_ratio': _ratio(indisciplina, 0.0, 0.8, low=0.85, high=1.6),
-            'strength_snapshot': strength
+            'cross_ratio': _ratio(escanteios, 50.0, 0.6),
+            'foul_ratio': _ratio(indisciplina, 0.0, 0.8, low=0.85, high=1.6)
         }
@@ -0,0 +1,539 @@
+"""
+Snapshot da liga compartilhado entre processos.
+
+Com vários workers (uvicorn --workers N) cada processo carregaria e
+guardaria em cache as mesmas forças, médias e ratings. O snapshot reúne
+esse estado em arrays NumPy somente leitura, gravados como arquivos .npy
+num diretório versionado:
+
+    <raiz>/<versao>/meta.json          temporada, ligas, preferências de distribuição
+    <raiz>/<versao>/<array>.npy        âncoras, dispersão, forças e ratings
+    <raiz>/current -> <versao>         link simbólico da versão publicada
+
+Os workers abrem os arquivos com mmap (np.load(mmap_mode='r')): as páginas
+ficam no page cache do sistema e são compartilhadas por todos os processos,
+sem cópia. Com a raiz em /dev/shm os arquivos ficam direto em memória
+compartilhada.
+
+Publicação atômica: a nova versão é gravada num diretório temporário,
+renomeada e só então o link `current` é trocado com os.replace. Leitores
+veem a versão antiga ou a nova, nunca uma parcial; quem ainda mapeia uma
+versão removida continua lendo (o mapeamento sobrevive ao unlink).
+
+Exemplo (após os scrapers):
+    store = SnapshotStore('/dev/shm/estatisticas')
+    store.rebuild(DB_CONFIG, league_ids=[1], temporada='2025')
+    predictor.attach_snapshot(store)
+
+Quando a versão dos dados muda, rebuild_async() reconstrói em segundo
+plano; até a publicação os leitores continuam na versão anterior.
+"""
+
+import dataclasses
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .league_stats import LeagueStats, LeagueAverages
+from .team_model import TeamModel, TeamStrength
+from .player_model import PlayerModel, PlayerRating
+
+logger = logging.getLogger(__name__)
+
+
+def _numeric_fields(cls, skip: Sequence[str]) -> Tuple[Tuple[str, type], ...]:
+    """Campos numéricos do dataclass (nome, conversor), na ordem das colunas."""
+    conversores = {int: int, bool: bool}
+    return tuple(
+        (f.name, conversores.get(f.type, float))
+        for f in dataclasses.fields(cls)
+        if f.name not in skip
+    )
+
+
+# Colunas das matrizes (uma linha por liga/time/jogador)
+ANCHOR_FIELDS = _numeric_fields(LeagueAverages, skip=('temporada',))
+STRENGTH_FIELDS = _numeric_fields(TeamStrength, skip=('team_id', 'team_name'))
+RATING_FIELDS = _numeric_fields(PlayerRating, skip=('player_id', 'nome', 'posicao'))
+
+# Momentos por liga: league_dispersion[liga, mercado, lado] = (media, variancia)
+MERCADOS = ('gols', 'cartoes', 'escanteios')
+LADOS = ('mandante', 'visitante')
+
+# Janela (jogos recentes) dos momentos de overdispersão guardados
+JANELA_DISPERSAO = 200
+
+ARRAYS = (
+    'league_ids', 'league_anchors', 'league_dispersion',
+    'team_ids', 'team_offsets', 'team_names', 'team_strengths',
+    'player_ids', 'player_team', 'player_names', 'player_positions', 'player_ratings'
+)
+
+# Time atual desconhecido em player_team
+SEM_TIME = -1
+
+
+def _unpack(fields: Tuple[Tuple[str, type], ...], row: np.ndarray) -> dict:
+    return {nome: conv(v) for (nome, conv), v in zip(fields, row.tolist())}
+
+
+class LeagueSnapshot:
+    """
+    Estado do modelo em arrays somente leitura.
+
+    As consultas devolvem None para o que não está no snapshot (outra
+    temporada, liga ou time não incluídos); quem chama cai no caminho
+    normal (banco/cache).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: dict, path: Optional[str] = None):
+        """
+        Args:
+            arrays: Arrays em ARRAYS (mapeados do disco ou em memória)
+            meta: Metadados (versao, temporada, ligas, ...)
+            path: Diretório de origem, se veio de publish()
+        """
+        self.meta = meta
+        self.path = path
+        self.versao = meta['versao']
+        self.temporada = meta['temporada']
+
+        self.league_ids = arrays['league_ids']
+        self.league_anchors = arrays['league_anchors']
+        self.league_dispersion = arrays['league_dispersion']
+        self.team_ids = arrays['team_ids']
+        self.team_offsets = arrays['team_offsets']
+        self.team_names = arrays['team_names']
+        self.team_strengths = arrays['team_strengths']
+        self.player_ids = arrays['player_ids']
+        self.player_team = arrays['player_team']
+        self.player_names = arrays['player_names']
+        self.player_positions = arrays['player_positions']
+        self.player_ratings = arrays['player_ratings']
+
+        # Índice das ligas (poucas entradas, por processo)
+        self._league_pos = {int(lid): i for i, lid in enumerate(self.league_ids.tolist())}
+        self._ligas = {int(k): v for k, v in meta['ligas'].items()}
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> 'LeagueSnapshot':
+        """Abre um diretório publicado (arrays mapeados em memória)."""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {
+            # view(np.ndarray): mesma memória mapeada, sem o custo de
+            # indexação da subclasse np.memmap
+            nome: np.load(
+                os.path.join(path, f'{nome}.npy'),
+                mmap_mode='r' if mmap else None,
+                allow_pickle=False
+            ).view(np.ndarray)
+            for nome in ARRAYS
+        }
+        return cls(arrays, meta, path)
+
+    def current(self) -> 'LeagueSnapshot':
+        """Um snapshot carregado é a própria fonte (mesma interface do SnapshotStore)."""
+        return self
+
+    @property
+    def has_players(self) -> bool:
+        return len(self.player_ids) > 0
+
+    @property
+    def calibrators(self) -> Dict[str, dict]:
+        """Calibradores por mercado (só em artefatos; formato do Calibrator)."""
+        return self.meta.get('calibradores', {})
+
+    def _league(self, league_id: int, temporada: str) -> Optional[int]:
+        if temporada != self.temporada:
+            return None
+        return self._league_pos.get(league_id)
+
+    # ==================== LIGA ====================
+
+    def league_averages(self, league_id: int, temporada: str = "2025") -> Optional[LeagueAverages]:
+        i = self._league(league_id, temporada)
+        if i is None:
+            return None
+        return LeagueAverages(temporada=temporada, **_unpack(ANCHOR_FIELDS, self.league_anchors[i]))
+
+    def distribution_prefs(self, league_id: int, temporada: str = "2025") -> Optional[Dict[str, str]]:
+        if self._league(league_id, temporada) is None:
+            return None
+        return dict(self._ligas[league_id]['distribution_prefs'])
+
+    def overdispersion_by_market(
+        self, league_id: int, temporada: str = "2025", window: int = JANELA_DISPERSAO
+    ) -> Optional[Dict[str, Dict]]:
+        """Mesmo formato de LeagueStats.get_overdispersion_by_market."""
+        i = self._league(league_id, temporada)
+        if i is None or window != self.meta.get('janela_dispersao'):
+            return None
+        prefs = self._ligas[league_id]['distribution_prefs']
+        momentos = self.league_dispersion[i].tolist()
+        return {
+            mercado: {
+                **{
+                    lado: {'media': momentos[m][l][0], 'variancia': momentos[m][l][1]}
+                    for l, lado in enumerate(LADOS)
+                },
+                'recomendacao': prefs[mercado]
+            }
+            for m, mercado in enumerate(MERCADOS)
+        }
+
+    # ==================== TIMES ====================
+
+    def _team(self, j: int) -> TeamStrength:
+        return TeamStrength(
+            team_id=int(self.team_ids[j]),
+            team_name=str(self.team_names[j]),
+            **_unpack(STRENGTH_FIELDS, self.team_strengths[j])
+        )
+
+    def team_strength(self, team_id: int, league_id: int, temporada: str = "2025") -> Optional[TeamStrength]:
+        i = self._league(league_id, temporada)
+        if i is None:
+            return None
+        inicio, fim = int(self.team_offsets[i]), int(self.team_offsets[i + 1])
+        # Times de cada liga ficam contíguos e ordenados por id
+        j = inicio + int(np.searchsorted(self.team_ids[inicio:fim], team_id))
+        if j >= fim or self.team_ids[j] != team_id:
+            return None
+        return self._team(j)
+
+    def league_strengths(self, league_id: int, temporada: str = "2025") -> Optional[Dict[int, TeamStrength]]:
+        i = self._league(league_id, temporada)
+        if i is None:
+            return None
+        return {
+            int(self.team_ids[j]): self._team(j)
+            for j in range(int(self.team_offsets[i]), int(self.team_offsets[i + 1]))
+        }
+
+    # ==================== JOGADORES ====================
+
+    def _player(self, k: int) -> PlayerRating:
+        return PlayerRating(
+            player_id=int(self.player_ids[k]),
+            nome=str(self.player_names[k]),
+            posicao=str(self.player_positions[k]),
+            **_unpack(RATING_FIELDS, self.player_ratings[k])
+        )
+
+    def player_ratings_for(self, player_ids: List[int]) -> List[Optional[PlayerRating]]:
+        """Ratings na ordem pedida (None para quem não está no snapshot)."""
+        if not player_ids or not self.has_players:
+            return [None] * len(player_ids)
+        ids = np.asarray(player_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.player_ids, ids), len(self.player_ids) - 1)
+        encontrados = self.player_ids[pos] == ids
+        return [self._player(int(k)) if ok else None for k, ok in zip(pos, encontrados)]
+
+    def team_players(self, team_id: int) -> List[PlayerRating]:
+        return [self._player(int(k)) for k in np.flatnonzero(self.player_team == team_id)]
+
+    def stats(self) -> dict:
+        return {
+            'versao': self.versao,
+            'temporada': self.temporada,
+            'criado_em': self.meta.get('criado_em'),
+            'versao_dados': self.meta.get('versao_dados'),
+            'ligas': len(self.league_ids),
+            'times': len(self.team_ids),
+            'jogadores': len(self.player_ids),
+            'bytes': int(sum(
+                getattr(self, nome).nbytes for nome in ARRAYS
+            ))
+        }
+
+
+# ==================== CONSTRUÇÃO ====================
+
+def build(
+    db_config: dict,
+    league_ids: List[int],
+    temporada: str = "2025",
+    versao_dados: Optional[str] = None
+) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Calcula o estado atual a partir do banco (modelos novos, sem cache).
+
+    Args:
+        league_ids: Ligas incluídas
+        versao_dados: Token da versão dos dados (DataVersion) usado na construção
+
+    Returns:
+        (arrays, meta) para publish() ou LeagueSnapshot(arrays, meta)
+    """
+    league_stats = LeagueStats(db_config)
+    team_model = TeamModel(db_config, league_stats)
+    player_model = PlayerModel(db_config)
+
+    league_ids = sorted(set(league_ids))
+    anchors, dispersion, ligas = [], [], {}
+    team_ids, team_names, team_rows, offsets = [], [], [], [0]
+
+    for league_id in league_ids:
+        averages = league_stats.calculate_averages(league_id, temporada)
+        anchors.append([getattr(averages, nome) for nome, _ in ANCHOR_FIELDS])
+        overdisp = league_stats.get_overdispersion_by_market(league_id, temporada, JANELA_DISPERSAO)
+        dispersion.append([
+            [[overdisp[mercado][lado]['media'], overdisp[mercado][lado]['variancia']] for lado in LADOS]
+            for mercado in MERCADOS
+        ])
+        ligas[str(league_id)] = {
+            'distribution_prefs': league_stats.get_distribution_prefs(league_id, temporada)
+        }
+
+        strengths = team_model.preload_league(league_id, temporada)
+        for team_id in sorted(strengths):
+            strength = strengths[team_id]
+            team_ids.append(team_id)
+            team_names.append(strength.team_name)
+            team_rows.append([getattr(strength, nome) for nome, _ in STRENGTH_FIELDS])
+        offsets.append(len(team_ids))
+
+    ratings, team_of = player_model.all_ratings()
+    player_ids = sorted(ratings)
+
+    arrays = {
+        'league_ids': np.array(league_ids, dtype=np.int64),
+        'league_anchors': np.array(anchors, dtype=float).reshape(len(league_ids), len(ANCHOR_FIELDS)),
+        'league_dispersion': np.array(dispersion, dtype=float).reshape(len(league_ids), len(MERCADOS), len(LADOS), 2),
+        'team_ids': np.array(team_ids, dtype=np.int64),
+        'team_offsets': np.array(offsets, dtype=np.int64),
+        'team_names': np.array(team_names, dtype=str),
+        'team_strengths': np.array(team_rows, dtype=float).reshape(len(team_ids), len(STRENGTH_FIELDS)),
+        'player_ids': np.array(player_ids, dtype=np.int64),
+        'player_team': np.array(
+            [team_of.get(pid) if team_of.get(pid) is not None else SEM_TIME for pid in player_ids],
+            dtype=np.int64
+        ),
+        'player_names': np.array([ratings[pid].nome for pid in player_ids], dtype=str),
+        'player_positions': np.array([ratings[pid].posicao for pid in player_ids], dtype=str),
+        'player_ratings': np.array(
+            [[getattr(ratings[pid], nome) for nome, _ in RATING_FIELDS] for pid in player_ids],
+            dtype=float
+        ).reshape(len(player_ids), len(RATING_FIELDS)),
+    }
+    meta = {
+        'versao': f"{time.time_ns():x}",
+        'temporada': temporada,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'versao_dados': versao_dados,
+        'janela_dispersao': JANELA_DISPERSAO,
+        'ligas': ligas,
+    }
+    return arrays, meta
+
+
+def publish(root: str, arrays: Dict[str, np.ndarray], meta: dict, keep: int = 3) -> str:
+    """
+    Grava uma versão em <root>/<versao>/ e aponta `current` para ela.
+
+    Args:
+        keep: Versões antigas mantidas no disco (leitores em andamento)
+
+    Returns:
+        Diretório publicado
+    """
+    os.makedirs(root, exist_ok=True)
+    destino = os.path.join(root, meta['versao'])
+
+    tmp = tempfile.mkdtemp(prefix='.build-', dir=root)
+    try:
+        for nome in ARRAYS:
+            np.save(os.path.join(tmp, f'{nome}.npy'), np.ascontiguousarray(arrays[nome]), allow_pickle=False)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.chmod(tmp, 0o755)
+        os.rename(tmp, destino)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Troca atômica do link (link relativo: a raiz pode ser montada em outro caminho)
+    link_tmp = os.path.join(root, f'.current-{os.getpid()}-{threading.get_ident()}')
+    os.symlink(meta['versao'], link_tmp)
+    os.replace(link_tmp, os.path.join(root, 'current'))
+
+    _prune(root, keep)
+    return destino
+
+
+def _prune(root: str, keep: int) -> None:
+    """Remove versões antigas (mapeamentos abertos continuam válidos)."""
+    atual = os.readlink(os.path.join(root, 'current'))
+    versoes = sorted(
+        (d for d in os.listdir(root)
+         if not d.startswith('.') and d != 'current' and os.path.isdir(os.path.join(root, d))),
+        key=lambda d: int(d, 16) if all(c in '0123456789abcdef' for c in d) else 0
+    )
+    for versao in versoes[:-keep] if keep > 0 else versoes:
+        if versao != atual:
+            shutil.rmtree(os.path.join(root, versao), ignore_errors=True)
+
+
+# ==================== LEITURA ====================
+
+class SnapshotStore:
+    """
+    Versão publicada mais recente de uma raiz, mapeada neste processo.
+
+    current() confere o link `current` no máximo a cada
+    CHECK_INTERVAL_SECONDS (um readlink) e remapeia quando outro processo
+    publicou uma versão nova.
+    """
+
+    CHECK_INTERVAL_SECONDS = float(os.getenv('SNAPSHOT_CHECK_INTERVAL', 2))
+
+    def __init__(self, root: str, check_interval: Optional[float] = None, keep: int = 3):
+        """
+        Args:
+            root: Diretório raiz (ex: /dev/shm/estatisticas), compartilhado pelos workers
+            check_interval: Segundos entre verificações do link
+            keep: Versões antigas mantidas ao publicar
+        """
+        self.root = root
+        self.check_interval = self.CHECK_INTERVAL_SECONDS if check_interval is None else check_interval
+        self.keep = keep
+        self._snapshot: Optional[LeagueSnapshot] = None
+        self._target: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # Reconstrução em segundo plano: uma thread por processo, pedido mais recente pendente
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._pending: Optional[tuple] = None
+
+        # Contadores
+        self.loads = 0
+        self.rebuilds = 0
+        self.rebuild_errors = 0
+
+    def current(self) -> Optional[LeagueSnapshot]:
+        """Snapshot publicado (None se ainda não há nenhum)."""
+        agora = time.monotonic()
+        if self._checked_at is not None and agora - self._checked_at < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            try:
+                target = os.readlink(os.path.join(self.root, 'current'))
+                if target != self._target:
+                    self._snapshot = LeagueSnapshot.open(os.path.join(self.root, target))
+                    self._target = target
+                    self.loads += 1
+            except OSError:
+                # Sem snapshot publicado (ou removido entre readlink e open):
+                # mantém o que já estava mapeado
+                pass
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def refresh(self) -> Optional[LeagueSnapshot]:
+        """Confere o link agora (ignora o intervalo)."""
+        self._checked_at = None
+        return self.current()
+
+    def rebuild(
+        self,
+        db_config: dict,
+        league_ids: List[int],
+        temporada: str = "2025",
+        versao_dados: Optional[str] = None
+    ) -> Optional[LeagueSnapshot]:
+        """
+        Reconstrói a partir do banco e publica.
+
+        Um processo por vez (flock em <root>/.lock); se o snapshot publicado
+        já corresponde a `versao_dados` (outro worker acabou de reconstruir),
+        não faz nada.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                atual = self.refresh()
+                if (
+                    versao_dados is not None
+                    and atual is not None
+                    and atual.meta.get('versao_dados') == versao_dados
+                    and atual.temporada == temporada
+                    and set(league_ids) <= set(atual.league_ids.tolist())
+                ):
+                    return atual
+                arrays, meta = build(db_config, league_ids, temporada, versao_dados)
+                publish(self.root, arrays, meta, keep=self.keep)
+                self.rebuilds += 1
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return self.refresh()
+
+    def rebuild_async(
+        self,
+        db_config: dict,
+        league_ids: List[int],
+        temporada: str = "2025",
+        versao_dados: Optional[str] = None
+    ) -> bool:
+        """
+        Agenda rebuild() numa thread de fundo e retorna na hora.
+
+        Pedidos feitos enquanto uma reconstrução roda substituem o pendente:
+        ao terminar, a thread reconstrói só a versão mais recente. Entre
+        processos vale o mesmo flock de rebuild(): o primeiro constrói, os
+        demais encontram `versao_dados` já publicada e só remapeiam.
+
+        Returns:
+            True se iniciou uma thread, False se o pedido ficou pendente
+        """
+        with self._rebuild_lock:
+            self._pending = (db_config, list(league_ids), temporada, versao_dados)
+            if self._rebuild_thread is not None:
+                return False
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild_loop, name='snapshot-rebuild', daemon=True
+            )
+            self._rebuild_thread.start()
+            return True
+
+    def _rebuild_loop(self) -> None:
+        """Consome os pedidos pendentes de rebuild_async() até não sobrar nenhum."""
+        while True:
+            with self._rebuild_lock:
+                pedido, self._pending = self._pending, None
+                if pedido is None:
+                    self._rebuild_thread = None
+                    return
+            try:
+                self.rebuild(*pedido)
+            except Exception:
+                # Continua na versão publicada; a próxima mudança tenta de novo
+                self.rebuild_errors += 1
+                logger.exception("Falha ao reconstruir o snapshot em %s", self.root)
+
+    def stats(self) -> dict:
+        snapshot = self.current()
+        return {
+            'raiz': self.root,
+            'carregamentos': self.loads,
+            'reconstrucoes': self.rebuilds,
+            'falhas_reconstrucao': self.rebuild_errors,
+            'reconstruindo': self._rebuild_thread is not None,
+            **(snapshot.stats() if snapshot is not None else {'versao': None})
+        }
@@ -8,12 +8,13 @@ Calcula força ofensiva e defensiva de cada time:
 Separa por mando de campo (casa/fora).
 """
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict
 import numpy as np
 from .league_stats import LeagueStats, LeagueAverages
+from .cache import TTLCache
+from . import db
 
 
 @dataclass
@@ -57,13 +58,27 @@ class TeamModel:
     
     MIN_JOGOS_CONFIAVEL = 10  # Mínimo de jogos para confiar 100%
     
-    def __init__(self, db_config: dict, league_stats: LeagueStats):
+    # Cache de forças (LRU + TTL): novos jogos aparecem no máximo após o TTL,
+    # ou imediatamente via invalidate() chamado pelos scrapers
+    CACHE_MAXSIZE = 512
+    CACHE_TTL_SECONDS = 600
+    
+    def __init__(
+        self,
+        db_config: dict,
+        league_stats: LeagueStats,
+        cache_maxsize: int = CACHE_MAXSIZE,
+        cache_ttl: Optional[float] = CACHE_TTL_SECONDS
+    ):
         self.db_config = db_config
         self.league_stats = league_stats
-        self._cache: Dict[int, TeamStrength] = {}
+        # Chaves: ('strength', team_id, league_id, temporada) e ('asof', league_id, temporada, k)
+        self._cache = TTLCache(cache_maxsize, cache_ttl, name='team_model')
+        # Snapshot compartilhado entre processos (src.core.snapshot), se anexado
+        self.snapshot = None
     
     def get_connection(self):
-        return psycopg2.connect(**self.db_config)
+        return db.connect(self.db_config)
     
     def calculate_team_strength(
         self, 
@@ -79,9 +94,16 @@ class TeamModel:
         
         onde peso = min(jogos / MIN_JOGOS_CONFIAVEL, 1.0)
         """
-        cache_key = f"{team_id}_{league_id}_{temporada}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        if snapshot is not None:
+            strength = snapshot.team_strength(team_id, league_id, temporada)
+            if strength is not None:
+                return strength
+        
+        cache_key = ('strength', team_id, league_id, temporada)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Pegar médias da liga como referência
         league_avg = self.league_stats.calculate_averages(league_id, temporada)
@@ -129,83 +151,234 @@ class TeamModel:
         
         conn.close()
         
-        # Calcular forças relativas
-        jogos_casa = casa['jogos'] if casa and casa['jogos'] else 0
-        jogos_fora = fora['jogos'] if fora and fora['jogos'] else 0
-        total_jogos = jogos_casa + jogos_fora
+        def _row_arrays(row: Optional[dict]) -> Dict[str, np.ndarray]:
+            """Converte a linha da query (médias SQL) em vetores de 1 elemento."""
+            row = row or {}
+            arrays = {'jogos': np.array([float(row.get('jogos') or 0)])}
+            for col in ('gols_marcados', 'gols_sofridos', 'cartoes', 'escanteios'):
+                value = row.get(col)
+                arrays[col] = np.array([float(value) if value is not None else np.nan])
+            return arrays
+        
+        arrays = self.strength_arrays(league_avg, _row_arrays(casa), _row_arrays(fora))
+        strength = self._strength_from_arrays(team_id, team_name, arrays, 0)
+        
+        self._cache.set(cache_key, strength)
+        return strength
+    
+    def strength_arrays(
+        self,
+        league_avg,
+        casa: Dict[str, np.ndarray],
+        fora: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calcula as forças de vários times de uma vez (versão vetorizada).
+        
+        Args:
+            league_avg: LeagueAverages (ou objeto com os mesmos campos, escalares ou vetores)
+            casa: Vetores 'jogos' e médias por jogo em casa
+                  ('gols_marcados', 'gols_sofridos', 'cartoes', 'escanteios'; NaN = sem dados)
+            fora: Idem para jogos fora
+            
+        Returns:
+            Dict com um vetor por campo de TeamStrength
+        """
+        jogos_casa = np.asarray(casa['jogos'], dtype=float)
+        jogos_fora = np.asarray(fora['jogos'], dtype=float)
         
         # Pesos separados por mando para suavização
-        peso_casa = min(jogos_casa / self.MIN_JOGOS_CONFIAVEL, 1.0)
-        peso_fora = min(jogos_fora / self.MIN_JOGOS_CONFIAVEL, 1.0)
-        confianca = min(total_jogos / self.MIN_JOGOS_CONFIAVEL, 1.0)
+        peso_casa = np.minimum(jogos_casa / self.MIN_JOGOS_CONFIAVEL, 1.0)
+        peso_fora = np.minimum(jogos_fora / self.MIN_JOGOS_CONFIAVEL, 1.0)
+        confianca = np.minimum((jogos_casa + jogos_fora) / self.MIN_JOGOS_CONFIAVEL, 1.0)
+        
+        def _force(raw, weight) -> np.ndarray:
+            return self._clip(self._regress_to_mean(raw, weight))
         
         # Força de ataque
-        ataque_casa_raw = self._safe_div(
-            casa['gols_marcados'] if casa else None, 
-            league_avg.gols_mandante
-        )
-        ataque_fora_raw = self._safe_div(
-            fora['gols_marcados'] if fora else None,
-            league_avg.gols_visitante
-        )
+        ataque_casa_raw = self._safe_div(casa['gols_marcados'], league_avg.gols_mandante)
+        ataque_fora_raw = self._safe_div(fora['gols_marcados'], league_avg.gols_visitante)
         
         # Força de defesa (invertida: menos gols = melhor)
-        defesa_casa_raw = self._safe_div(
-            casa['gols_sofridos'] if casa else None,
-            league_avg.gols_visitante
-        )
-        defesa_fora_raw = self._safe_div(
-            fora['gols_sofridos'] if fora else None,
-            league_avg.gols_mandante
-        )
+        defesa_casa_raw = self._safe_div(casa['gols_sofridos'], league_avg.gols_visitante)
+        defesa_fora_raw = self._safe_div(fora['gols_sofridos'], league_avg.gols_mandante)
         
-        # Aplicar regressão à média
-        # Tratando valores None
-        cartoes_casa = float(casa['cartoes'] or 0) if casa and casa['cartoes'] else 0
-        cartoes_fora = float(fora['cartoes'] or 0) if fora and fora['cartoes'] else 0
-        escanteios_casa = float(casa['escanteios'] or 0) if casa and casa['escanteios'] else 0
-        escanteios_fora = float(fora['escanteios'] or 0) if fora and fora['escanteios'] else 0
+        # Cartões e escanteios sem dados contam como 0 (e o peso zero puxa para 1.0)
+        cartoes_casa = np.nan_to_num(np.asarray(casa['cartoes'], dtype=float))
+        cartoes_fora = np.nan_to_num(np.asarray(fora['cartoes'], dtype=float))
+        escanteios_casa = np.nan_to_num(np.asarray(casa['escanteios'], dtype=float))
+        escanteios_fora = np.nan_to_num(np.asarray(fora['escanteios'], dtype=float))
         
-        strength = TeamStrength(
+        return {
+            'ataque_casa': _force(ataque_casa_raw, peso_casa),
+            'ataque_fora': _force(ataque_fora_raw, peso_fora),
+            'ataque_geral': _force((ataque_casa_raw + ataque_fora_raw) / 2, confianca),
+            'defesa_casa': _force(defesa_casa_raw, peso_casa),
+            'defesa_fora': _force(defesa_fora_raw, peso_fora),
+            'defesa_geral': _force((defesa_casa_raw + defesa_fora_raw) / 2, confianca),
+            'cartoes_favor': _force(self._safe_div(cartoes_casa, league_avg.cartoes_mandante), peso_casa),
+            'cartoes_contra': _force(self._safe_div(cartoes_fora, league_avg.cartoes_visitante), peso_fora),
+            'escanteios_favor': _force(self._safe_div(escanteios_casa, league_avg.escanteios_mandante), peso_casa),
+            'escanteios_contra': _force(self._safe_div(escanteios_fora, league_avg.escanteios_visitante), peso_fora),
+            'jogos_casa': jogos_casa,
+            'jogos_fora': jogos_fora,
+            'confianca': confianca
+        }
+    
+    @staticmethod
+    def means(totals: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Somas da linha do tempo (TEAM_COLUMNS) -> médias por jogo (NaN sem jogos)."""
+        jogos = np.asarray(totals['jogos'], dtype=float)
+        means = {'jogos': jogos}
+        for col in ('gols_marcados', 'gols_sofridos', 'cartoes', 'escanteios'):
+            means[col] = np.divide(
+                totals[col], jogos, out=np.full_like(jogos, np.nan), where=jogos > 0
+            )
+        return means
+    
+    def _strength_from_arrays(
+        self, team_id: int, team_name: str, arrays: Dict[str, np.ndarray], i: int
+    ) -> TeamStrength:
+        """Monta o TeamStrength do i-ésimo time a partir de strength_arrays."""
+        return TeamStrength(
             team_id=team_id,
             team_name=team_name,
-            ataque_casa=self._clip(self._regress_to_mean(ataque_casa_raw, peso_casa)),
-            ataque_fora=self._clip(self._regress_to_mean(ataque_fora_raw, peso_fora)),
-            ataque_geral=self._clip(self._regress_to_mean(
-                (ataque_casa_raw + ataque_fora_raw) / 2, confianca
-            )),
-            defesa_casa=self._clip(self._regress_to_mean(defesa_casa_raw, peso_casa)),
-            defesa_fora=self._clip(self._regress_to_mean(defesa_fora_raw, peso_fora)),
-            defesa_geral=self._clip(self._regress_to_mean(
-                (defesa_casa_raw + defesa_fora_raw) / 2, confianca
-            )),
-            cartoes_favor=self._clip(self._regress_to_mean(
-                self._safe_div(cartoes_casa, league_avg.cartoes_mandante), peso_casa
-            )),
-            cartoes_contra=self._clip(self._regress_to_mean(
-                self._safe_div(cartoes_fora, league_avg.cartoes_visitante), peso_fora
-            )),
-            escanteios_favor=self._clip(self._regress_to_mean(
-                self._safe_div(escanteios_casa, league_avg.escanteios_mandante), peso_casa
-            )),
-            escanteios_contra=self._clip(self._regress_to_mean(
-                self._safe_div(escanteios_fora, league_avg.escanteios_visitante), peso_fora
-            )),
-            jogos_casa=jogos_casa,
-            jogos_fora=jogos_fora,
-            confianca=confianca
+            ataque_casa=float(arrays['ataque_casa'][i]),
+            ataque_fora=float(arrays['ataque_fora'][i]),
+            ataque_geral=float(arrays['ataque_geral'][i]),
+            defesa_casa=float(arrays['defesa_casa'][i]),
+            defesa_fora=float(arrays['defesa_fora'][i]),
+            defesa_geral=float(arrays['defesa_geral'][i]),
+            cartoes_favor=float(arrays['cartoes_favor'][i]),
+            cartoes_contra=float(arrays['cartoes_contra'][i]),
+            escanteios_favor=float(arrays['escanteios_favor'][i]),
+            escanteios_contra=float(arrays['escanteios_contra'][i]),
+            jogos_casa=int(arrays['jogos_casa'][i]),
+            jogos_fora=int(arrays['jogos_fora'][i]),
+            confianca=float(arrays['confianca'][i])
         )
+    
+    def strengths_as_of(
+        self,
+        league_id: int,
+        as_of,
+        temporada: str = "2025"
+    ) -> Dict[int, TeamStrength]:
+        """
+        Força de todos os times da liga usando apenas jogos anteriores a `as_of`.
         
-        self._cache[cache_key] = strength
-        return strength
+        Usa a linha do tempo da liga (somas acumuladas carregadas uma vez),
+        então avaliar cada rodada de uma temporada não gera novas queries.
+        `as_of=None` usa todas as partidas (força atual).
+        
+        Returns:
+            Dict team_id -> TeamStrength
+        """
+        timeline = self.league_stats.get_timeline(league_id, temporada)
+        k = timeline.index_as_of(as_of)
+        
+        cache_key = ('asof', league_id, temporada, k)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        league_avg = self.league_stats.averages_as_of(league_id, as_of, temporada)
+        casa_tot, fora_tot = timeline.team_totals(k)
+        
+        arrays = self.strength_arrays(league_avg, self.means(casa_tot), self.means(fora_tot))
+        strengths = {
+            int(tid): self._strength_from_arrays(
+                int(tid), timeline.team_names.get(int(tid), f"Time {tid}"), arrays, i
+            )
+            for i, tid in enumerate(timeline.team_ids)
+        }
+        
+        self._cache.set(cache_key, strengths)
+        return strengths
+    
+    def preload_league(self, league_id: int, temporada: str = "2025") -> Dict[int, TeamStrength]:
+        """
+        Carrega a força atual de todos os times da liga de uma vez.
+        
+        Calcula pela linha do tempo (uma query para a liga inteira) e
+        preenche o cache por time, então calculate_team_strength dos
+        times da liga não consulta mais o banco. Com snapshot anexado,
+        devolve as forças dele.
+        """
+        snapshot = self.snapshot.current() if self.snapshot is not None else None
+        if snapshot is not None:
+            strengths = snapshot.league_strengths(league_id, temporada)
+            if strengths is not None:
+                return strengths
+        
+        strengths = self.strengths_as_of(league_id, None, temporada)
+        for team_id, strength in strengths.items():
+            self._cache.set(('strength', team_id, league_id, temporada), strength)
+        return strengths
+    
+    def strength_as_of(
+        self,
+        team_id: int,
+        league_id: int,
+        as_of,
+        temporada: str = "2025"
+    ) -> TeamStrength:
+        """Força de um time usando apenas jogos anteriores a `as_of`."""
+        strengths = self.strengths_as_of(league_id, as_of, temporada)
+        if team_id in strengths:
+            return strengths[team_id]
+        # Time fora da liga: sem histórico, força neutra
+        return TeamStrength(team_id=team_id, team_name=f"Time {team_id}", confianca=0.0)
+    
+    def invalidate(
+        self,
+        team_ids: Optional[List[int]] = None,
+        league_id: Optional[int] = None
+    ) -> int:
+        """
+        Descarta forças em cache após novos jogos.
+        
+        Chamado pelos scrapers (via API) depois de inserir partidas.
+        Também invalida as médias da liga, que mudam com qualquer jogo novo;
+        os demais times são reancorados nessas médias quando o TTL expira.
+        
+        Args:
+            team_ids: Times afetados (None = todos)
+            league_id: Liga afetada (None = qualquer liga)
+            
+        Returns:
+            Número de entradas removidas
+        """
+        teams = set(team_ids) if team_ids else None
+        
+        def _match(key) -> bool:
+            if key[0] == 'asof':
+                # Snapshots as-of contêm todos os times da liga
+                return league_id is None or key[1] == league_id
+            _, team_id, key_league, _ = key
+            if league_id is not None and key_league != league_id:
+                return False
+            return teams is None or team_id in teams
+        
+        removed = self._cache.invalidate(_match)
+        removed += self.league_stats.invalidate(league_id)
+        return removed
+    
+    def cache_stats(self) -> dict:
+        """Contadores de hit/miss dos caches de times e liga."""
+        return {
+            'team_model': self._cache.stats(),
+            'league_stats': self.league_stats.cache_stats()
+        }
     
-    def _safe_div(self, value: Optional[float], divisor: float) -> float:
-        """Divisão segura que retorna 1.0 se não houver dados."""
-        if value is None or divisor == 0:
-            return 1.0
-        return float(value) / float(divisor)
+    def _safe_div(self, value, divisor) -> np.ndarray:
+        """Divisão segura que retorna 1.0 se não houver dados (None/NaN) ou divisor zero."""
+        value = np.asarray(value if value is not None else np.nan, dtype=float)
+        divisor = np.broadcast_to(np.asarray(divisor, dtype=float), value.shape)
+        ok = ~np.isnan(value) & (divisor != 0)
+        return np.divide(value, divisor, out=np.ones_like(value), where=ok)
     
-    def _regress_to_mean(self, value: float, weight: float) -> float:
+    def _regress_to_mean(self, value, weight):
         """
         Aplica regressão à média.
         
@@ -214,9 +387,9 @@ class TeamModel:
         """
         return weight * value + (1 - weight) * 1.0
 
-    def _clip(self, value: float, min_value: float = 0.6, max_value: float = 1.6) -> float:
+    def _clip(self, value, min_value: float = 0.6, max_value: float = 1.6):
         """Limita valores extremos para evitar lambdas irreais em amostras pequenas."""
-        return max(min_value, min(max_value, value))
+        return np.clip(value, min_value, max_value)
     
     def get_all_teams_strength(self, league_id: int, temporada: str = "2025") -> List[TeamStrength]:
         """Retorna força de todos os times da liga."""
@@ -0,0 +1,175 @@
+"""
+ETAPA 2.1 - Linha do Tempo da Liga (snapshots "as-of")
+
+Permite consultar médias da liga e estatísticas dos times como eram
+em uma data qualquer, sem vazar jogos futuros (nem o próprio jogo avaliado).
+
+Princípio: somas acumuladas
+- As partidas são ordenadas por data uma única vez
+- Cada estatística vira um vetor de somas acumuladas (cumsum)
+- Consultar "até a data D" é só achar o índice k (busca binária) e ler a coluna k
+
+Assim um backtest walk-forward da temporada inteira custa uma passada nos dados,
+e não uma query por partida.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+
+# Colunas por partida, na perspectiva mandante/visitante
+STAT_COLUMNS = (
+    'gols_mandante',
+    'gols_visitante',
+    'cartoes_mandante',
+    'cartoes_visitante',
+    'escanteios_mandante',
+    'escanteios_visitante',
+)
+
+# Estatísticas acumuladas por time (mesmos nomes usados nas queries do TeamModel)
+TEAM_COLUMNS = ('jogos', 'gols_marcados', 'gols_sofridos', 'cartoes', 'escanteios')
+
+
+def to_datetime64(value) -> np.datetime64:
+    """Converte date/datetime/str para datetime64 (resolução de segundos)."""
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[s]')
+    return np.datetime64(value, 's')
+
+
+class LeagueTimeline:
+    """
+    Somas acumuladas das partidas finalizadas de uma liga, ordenadas por data.
+
+    Segue a mesma semântica das queries do LeagueStats/TeamModel:
+    - Médias da liga: partidas cujo mandante pertence à liga
+    - Jogos em casa de um time: ele é o mandante (e pertence à liga)
+    - Jogos fora de um time: ele é o visitante (e pertence à liga)
+
+    Os índices k vão de 0 a n: k = número de partidas estritamente anteriores.
+    """
+
+    def __init__(
+        self,
+        dates: Sequence,
+        home_ids: Sequence[int],
+        away_ids: Sequence[int],
+        stats: Dict[str, Sequence[float]],
+        team_ids: Iterable[int],
+        team_names: Optional[Dict[int, str]] = None
+    ):
+        """
+        Args:
+            dates: Data de cada partida (date, datetime ou 'YYYY-MM-DD')
+            home_ids: ID do mandante de cada partida
+            away_ids: ID do visitante de cada partida
+            stats: Dict com as colunas de STAT_COLUMNS (None/NaN = 0)
+            team_ids: Times que pertencem à liga
+            team_names: Nomes dos times (opcional)
+        """
+        dates = np.array([to_datetime64(d) for d in dates], dtype='datetime64[s]')
+        order = np.argsort(dates, kind='stable')
+
+        self.dates = dates[order]
+        self.home_ids = np.asarray(home_ids, dtype=np.int64)[order]
+        self.away_ids = np.asarray(away_ids, dtype=np.int64)[order]
+        self.n_matches = len(self.dates)
+
+        self.team_ids = np.array(sorted(set(int(t) for t in team_ids)), dtype=np.int64)
+        self.team_index = {int(t): i for i, t in enumerate(self.team_ids)}
+        self.team_names = dict(team_names or {})
+
+        cols = {}
+        for col in STAT_COLUMNS:
+            values = np.asarray(stats.get(col, np.zeros(self.n_matches)), dtype=float)
+            cols[col] = np.nan_to_num(values[order])
+        # Valores por partida, em ordem de data (observados no ajuste de fatores)
+        self.stats = cols
+
+        home_in = np.isin(self.home_ids, self.team_ids)
+
+        # Médias da liga: somas acumuladas com zero à esquerda (k = 0 → nada)
+        self._league_cum = {
+            col: self._cumsum(np.where(home_in, cols[col], 0.0)) for col in STAT_COLUMNS
+        }
+        self._league_cum['jogos'] = self._cumsum(home_in.astype(float))
+
+        # Times: matrizes (n_times × n+1) de somas acumuladas por mando
+        home_idx = np.array([self.team_index.get(int(t), -1) for t in self.home_ids], dtype=np.int64)
+        away_idx = np.array([self.team_index.get(int(t), -1) for t in self.away_ids], dtype=np.int64)
+
+        self._home_cum = self._team_cumsums(home_idx, {
+            'jogos': np.ones(self.n_matches),
+            'gols_marcados': cols['gols_mandante'],
+            'gols_sofridos': cols['gols_visitante'],
+            'cartoes': cols['cartoes_mandante'],
+            'escanteios': cols['escanteios_mandante'],
+        })
+        self._away_cum = self._team_cumsums(away_idx, {
+            'jogos': np.ones(self.n_matches),
+            'gols_marcados': cols['gols_visitante'],
+            'gols_sofridos': cols['gols_mandante'],
+            'cartoes': cols['cartoes_visitante'],
+            'escanteios': cols['escanteios_visitante'],
+        })
+
+    @staticmethod
+    def _cumsum(values: np.ndarray) -> np.ndarray:
+        out = np.zeros(len(values) + 1)
+        np.cumsum(values, out=out[1:])
+        return out
+
+    def _team_cumsums(self, team_idx: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Espalha cada partida na linha do seu time e acumula ao longo do tempo."""
+        n_teams = len(self.team_ids)
+        valid = team_idx >= 0
+        cols = np.flatnonzero(valid)
+        rows = team_idx[valid]
+
+        cums = {}
+        for name, vals in values.items():
+            grid = np.zeros((n_teams, self.n_matches + 1))
+            grid[rows, cols + 1] = vals[valid]
+            cums[name] = np.cumsum(grid, axis=1)
+        return cums
+
+    # ==================== CONSULTAS ====================
+
+    def index_as_of(self, as_of) -> int:
+        """Número de partidas com data estritamente anterior a `as_of` (None = todas)."""
+        if as_of is None:
+            return self.n_matches
+        return int(np.searchsorted(self.dates, to_datetime64(as_of), side='left'))
+
+    def indices_as_of(self, as_of: Sequence) -> np.ndarray:
+        """Versão vetorizada de index_as_of."""
+        targets = np.array([to_datetime64(d) for d in as_of], dtype='datetime64[s]')
+        return np.searchsorted(self.dates, targets, side='left')
+
+    def league_totals(self, k: int) -> Dict[str, float]:
+        """Somas das estatísticas da liga nas k primeiras partidas."""
+        return {col: float(cum[k]) for col, cum in self._league_cum.items()}
+
+    def league_totals_at(self, k: np.ndarray) -> Dict[str, np.ndarray]:
+        """Somas da liga para um vetor de índices k."""
+        return {col: cum[k] for col, cum in self._league_cum.items()}
+
+    def team_totals(self, k: int) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Somas por time (casa, fora) nas k primeiras partidas.
+
+        Returns:
+            (casa, fora): dicts de TEAM_COLUMNS → vetor alinhado a self.team_ids
+        """
+        casa = {col: cum[:, k] for col, cum in self._home_cum.items()}
+        fora = {col: cum[:, k] for col, cum in self._away_cum.items()}
+        return casa, fora
+
+    def team_totals_at(
+        self, team_idx: np.ndarray, k: np.ndarray
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Somas (casa, fora) para pares (time, k) vetorizados."""
+        casa = {col: cum[team_idx, k] for col, cum in self._home_cum.items()}
+        fora = {col: cum[team_idx, k] for col, cum in self._away_cum.items()}
+        return casa, fora
@@ -7,11 +7,39 @@ Ajustes baseados em fatores externos:
 - Tipo de competição
 - Importância do jogo
 - Árbitro (opcional)
+
+Os ajustes são vetorizados: os parâmetros de N partidas formam uma matriz
+(N × 6, colunas em PARAM_COLUMNS) multiplicada pelos fatores de contexto.
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional, Sequence
 from enum import Enum
+import numpy as np
+
+
+# Colunas da matriz de parâmetros (uma linha por partida)
+PARAM_COLUMNS = (
+    'lambda_mandante',
+    'lambda_visitante',
+    'mu_mandante',
+    'mu_visitante',
+    'kappa_mandante',
+    'kappa_visitante',
+)
+
+# Amplitude máxima do ajuste por ranking (±10% em λ)
+AMPLITUDE_RANKING = 0.1
+
+
+def ranking_shift(diferenca_ranking):
+    """
+    Deslocamento do λ pela diferença de ranking: AMPLITUDE_RANKING × tanh(d / 10).
+    
+    Aceita escalar ou array; o mandante recebe 1 + shift e o visitante 1 − shift.
+    Única definição da fórmula, usada por MatchContext e ContextAdjuster.
+    """
+    return AMPLITUDE_RANKING * np.tanh(np.asarray(diferenca_ranking, dtype=float) / 10)
 
 
 class TipoCompeticao(Enum):
@@ -30,6 +58,31 @@ class ImportanciaJogo(Enum):
     BAIXA = 0.9     # Time já classificado/rebaixado
 
 
+# Fatores por tipo de competição
+FATORES_COMPETICAO = {
+    TipoCompeticao.PONTOS_CORRIDOS: {
+        'gols': 1.0,
+        'cartoes': 1.0,
+        'escanteios': 1.0
+    },
+    TipoCompeticao.MATA_MATA: {
+        'gols': 0.90,      # Jogos mais travados
+        'cartoes': 1.15,   # Mais cartões
+        'escanteios': 1.05
+    },
+    TipoCompeticao.GRUPO: {
+        'gols': 0.95,
+        'cartoes': 1.05,
+        'escanteios': 1.0
+    },
+    TipoCompeticao.AMISTOSO: {
+        'gols': 1.1,       # Mais aberto
+        'cartoes': 0.8,   # Menos cartões
+        'escanteios': 1.0
+    }
+}
+
+
 @dataclass
 class MatchContext:
     """Contexto completo de uma partida."""
@@ -60,29 +113,7 @@ class MatchContext:
         Mata-mata: mais fechado, menos gols, mais cartões
         Pontos corridos: mais aberto
         """
-        fatores = {
-            TipoCompeticao.PONTOS_CORRIDOS: {
-                'gols': 1.0,
-                'cartoes': 1.0,
-                'escanteios': 1.0
-            },
-            TipoCompeticao.MATA_MATA: {
-                'gols': 0.90,      # Jogos mais travados
-                'cartoes': 1.15,   # Mais cartões
-                'escanteios': 1.05
-            },
-            TipoCompeticao.GRUPO: {
-                'gols': 0.95,
-                'cartoes': 1.05,
-                'escanteios': 1.0
-            },
-            TipoCompeticao.AMISTOSO: {
-                'gols': 1.1,       # Mais aberto
-                'cartoes': 0.8,   # Menos cartões
-                'escanteios': 1.0
-            }
-        }
-        return fatores.get(self.competicao, fatores[TipoCompeticao.PONTOS_CORRIDOS])
+        return FATORES_COMPETICAO.get(self.competicao, FATORES_COMPETICAO[TipoCompeticao.PONTOS_CORRIDOS])
     
     def get_fator_importancia(self) -> float:
         """Retorna multiplicador baseado na importância."""
@@ -95,16 +126,12 @@ class MatchContext:
         Se mandante muito melhor: espera mais gols dele, menos do visitante
         """
         # diferenca_ranking positivo = mandante melhor
-        # Vamos usar uma função sigmoid suave
-        import math
-        
-        # Fator varia de 0.8 a 1.2
-        fator_mandante = 1.0 + 0.1 * math.tanh(self.diferenca_ranking / 10)
-        fator_visitante = 1.0 - 0.1 * math.tanh(self.diferenca_ranking / 10)
+        # Função sigmoid suave: fator varia de 0.9 a 1.1
+        shift = float(ranking_shift(self.diferenca_ranking))
         
         return {
-            'mandante': fator_mandante,
-            'visitante': fator_visitante
+            'mandante': 1.0 + shift,
+            'visitante': 1.0 - shift
         }
     
     def has_lineup(self) -> bool:
@@ -133,46 +160,57 @@ class ContextAdjuster:
         """
         # Mantém campos auxiliares (ex: distribution_prefs) para o restante do pipeline.
         adjusted = dict(params)
-
-        # Fatores de competição
-        f_comp = context.get_fator_competicao()
         
-        # Fatores de ranking
-        f_rank = context.get_fator_ranking()
+        row = self.adjust_array(params_to_array([params]), [context])[0]
+        adjusted.update({col: float(value) for col, value in zip(PARAM_COLUMNS, row)})
         
-        # Fator de importância (afeta principalmente cartões)
-        f_imp = context.get_fator_importancia()
+        return adjusted
+    
+    def adjust_array(
+        self,
+        params: np.ndarray,
+        contexts: Sequence[Optional[MatchContext]]
+    ) -> np.ndarray:
+        """
+        Ajusta N partidas de uma vez.
         
-        # Aplicar ajustes
-        adjusted.update({
-            'lambda_mandante': (
-                params['lambda_mandante'] * 
-                f_comp['gols'] * 
-                f_rank['mandante']
-            ),
-            'lambda_visitante': (
-                params['lambda_visitante'] * 
-                f_comp['gols'] * 
-                f_rank['visitante']
-            ),
-            'mu_mandante': (
-                params['mu_mandante'] * 
-                f_comp['cartoes'] * 
-                f_imp
-            ),
-            'mu_visitante': (
-                params['mu_visitante'] * 
-                f_comp['cartoes'] * 
-                f_imp
-            ),
-            'kappa_mandante': (
-                params['kappa_mandante'] * 
-                f_comp['escanteios']
-            ),
-            'kappa_visitante': (
-                params['kappa_visitante'] * 
-                f_comp['escanteios']
-            )
-        })
+        Args:
+            params: Matriz (N × 6) nas colunas de PARAM_COLUMNS
+            contexts: Contexto de cada partida (None = sem ajuste)
+            
+        Returns:
+            Nova matriz (N × 6) ajustada
+        """
+        return np.asarray(params, dtype=float) * self.context_factors(contexts)
+    
+    def context_factors(self, contexts: Sequence[Optional[MatchContext]]) -> np.ndarray:
+        """
+        Matriz (N × 6) de multiplicadores de contexto.
         
-        return adjusted
+        - λ: competição × ranking (tanh da diferença, ±10%)
+        - μ: competição × importância
+        - κ: competição
+        """
+        neutro = FATORES_COMPETICAO[TipoCompeticao.PONTOS_CORRIDOS]
+        comp = np.array([
+            [f['gols'], f['cartoes'], f['escanteios']]
+            for f in (c.get_fator_competicao() if c is not None else neutro for c in contexts)
+        ], dtype=float).reshape(-1, 3)
+        ranking = np.array([c.diferenca_ranking if c is not None else 0.0 for c in contexts], dtype=float)
+        importancia = np.array([c.get_fator_importancia() if c is not None else 1.0 for c in contexts], dtype=float)
+        
+        f_rank = ranking_shift(ranking)
+        
+        return np.column_stack([
+            comp[:, 0] * (1.0 + f_rank),
+            comp[:, 0] * (1.0 - f_rank),
+            comp[:, 1] * importancia,
+            comp[:, 1] * importancia,
+            comp[:, 2],
+            comp[:, 2],
+        ])
+
+
+def params_to_array(params: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Lista de dicts de parâmetros → matriz (N × 6) nas colunas de PARAM_COLUMNS."""
+    return np.array([[p[col] for col in PARAM_COLUMNS] for p in params], dtype=float).reshape(-1, len(PARAM_COLUMNS))
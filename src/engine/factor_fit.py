@@ -0,0 +1,395 @@
+"""
+ETAPA 5.1 - Ajuste dos Fatores (máxima verossimilhança)
+
+Ajusta os valores fixos do ParameterCalculator contra partidas históricas:
+- Fatores de mando (FATOR_*) de gols, cartões e escanteios
+- Pesos de ataque/defesa do modelo log-linear (calculate_with_log)
+
+Os limites (LIMITES) não são ajustados: ficam fixos como proteção contra
+valores extremos. Ajustá-los junto com os fatores deixa o clip fazer o papel
+do fator (limites apertados em volta da média da liga ganham na
+verossimilhança dentro da amostra e achatam os jogos desequilibrados).
+Valor ajustado que cai na borda da faixa de busca (FAIXA_*) é rejeitado:
+o ótimo real está fora da faixa ou os dados não o identificam, e o arquivo
+mantém o valor anterior.
+
+Cada partida entra com as âncoras e forças "as-of" (só jogos de datas
+anteriores, via LeagueTimeline), então o ajuste não vaza o resultado que
+tenta explicar. A função objetivo é a log-verossimilhança Poisson ou
+NegBinomial (mesma distribuição e α da precificação) somada sobre todas as
+partidas, vetorizada: uma grade opcional avalia todos os candidatos de uma
+vez e o L-BFGS-B (scipy) refina a partir do melhor ponto.
+
+O resultado vai para um JSON que o ParameterCalculator carrega ao iniciar
+(ParameterCalculator.PARAMS_PATH, variável MODEL_PARAMS).
+
+Uso:
+    python -m src.engine.factor_fit --ligas 1 --temporada 2025
+    python -m src.engine.factor_fit --partidas data/backtest_matches.json --dist gols=negbinomial
+"""
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import gammaln
+
+from src.core.league_stats import LeagueStats
+from src.core.team_model import TeamModel
+from src.core.timeline import LeagueTimeline
+from src.engine.parameters import ParameterCalculator
+from src.engine.pricing import ALPHA, DEFAULT_DIST
+
+
+# Mercado (distribuição) e coluna observada de cada parâmetro
+MERCADO_POR_PARAMETRO = {
+    'lambda_mandante': 'gols',
+    'lambda_visitante': 'gols',
+    'mu_mandante': 'cartoes',
+    'mu_visitante': 'cartoes',
+    'kappa_mandante': 'escanteios',
+    'kappa_visitante': 'escanteios',
+}
+COLUNA_OBSERVADA = {
+    'lambda_mandante': 'gols_mandante',
+    'lambda_visitante': 'gols_visitante',
+    'mu_mandante': 'cartoes_mandante',
+    'mu_visitante': 'cartoes_visitante',
+    'kappa_mandante': 'escanteios_mandante',
+    'kappa_visitante': 'escanteios_visitante',
+}
+
+# Faixas de busca
+FAIXA_FATOR = (0.5, 1.6)
+FAIXA_BETA = (0.0, 1.5)
+PONTOS_GRADE = 56  # Fatores: passo de 0.02
+PONTOS_GRADE_BETA = 16  # Betas: passo de 0.1
+
+# Distância relativa à borda da faixa a partir da qual o ajuste é rejeitado
+TOLERANCIA_BORDA = 1e-3
+
+
+def on_boundary(valor: float, faixa: Tuple[float, float]) -> bool:
+    """Valor ajustado encostado em uma das bordas da faixa de busca."""
+    largura = faixa[1] - faixa[0]
+    return min(valor - faixa[0], faixa[1] - valor) <= TOLERANCIA_BORDA * largura
+
+
+@dataclass
+class MatchFeatures:
+    """Termos "as-of" e valores observados das partidas usadas no ajuste."""
+    # parâmetro -> (âncora, força própria, força do adversário), vetores de N
+    componentes: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    # parâmetro -> contagem observada (vetor de N)
+    observado: Dict[str, np.ndarray]
+
+    @property
+    def n_partidas(self) -> int:
+        return len(self.observado['lambda_mandante'])
+
+
+def match_features(timeline: LeagueTimeline, min_jogos: int = 3) -> MatchFeatures:
+    """
+    Termos de cada partida da linha do tempo com dados anteriores à sua data.
+
+    Args:
+        timeline: Linha do tempo da liga (LeagueStats.get_timeline ou
+                  BacktestEngine.build_timeline)
+        min_jogos: Jogos anteriores exigidos de cada time (forças com pouco
+                   histórico são quase só a média da liga)
+    """
+    # Só partidas entre dois times da liga
+    da_liga = np.isin(timeline.home_ids, timeline.team_ids) & np.isin(timeline.away_ids, timeline.team_ids)
+    linhas = np.flatnonzero(da_liga)
+    mandante = np.searchsorted(timeline.team_ids, timeline.home_ids[linhas])
+    visitante = np.searchsorted(timeline.team_ids, timeline.away_ids[linhas])
+    k = timeline.indices_as_of(timeline.dates[linhas])
+
+    league_stats = LeagueStats(db_config=None)
+    team_model = TeamModel(db_config=None, league_stats=league_stats)
+    league_avg = league_stats.averages_at(timeline, k)
+
+    def _forcas(team_idx: np.ndarray) -> Dict[str, np.ndarray]:
+        casa, fora = timeline.team_totals_at(team_idx, k)
+        return team_model.strength_arrays(league_avg, team_model.means(casa), team_model.means(fora))
+
+    forca_m, forca_v = _forcas(mandante), _forcas(visitante)
+    historico = np.minimum(
+        forca_m['jogos_casa'] + forca_m['jogos_fora'],
+        forca_v['jogos_casa'] + forca_v['jogos_fora']
+    )
+    mask = historico >= min_jogos
+
+    componentes = ParameterCalculator.components(league_avg, forca_m, forca_v)
+    return MatchFeatures(
+        componentes={
+            nome: tuple(np.broadcast_to(termo, mask.shape)[mask] for termo in termos)
+            for nome, termos in componentes.items()
+        },
+        observado={
+            nome: timeline.stats[coluna][linhas][mask]
+            for nome, coluna in COLUNA_OBSERVADA.items()
+        }
+    )
+
+
+def combine(features: List[MatchFeatures]) -> MatchFeatures:
+    """Junta as partidas de várias ligas (cada uma com suas âncoras)."""
+    return MatchFeatures(
+        componentes={
+            nome: tuple(np.concatenate([f.componentes[nome][i] for f in features]) for i in range(3))
+            for nome in COLUNA_OBSERVADA
+        },
+        observado={
+            nome: np.concatenate([f.observado[nome] for f in features])
+            for nome in COLUNA_OBSERVADA
+        }
+    )
+
+
+def log_likelihood(y: np.ndarray, mean: np.ndarray, dist: str = 'poisson', alpha: float = 0.5) -> np.ndarray:
+    """
+    Log-verossimilhança somada no último eixo.
+
+    Args:
+        y: Contagens observadas (N)
+        mean: Médias (N) ou um bloco de candidatos (... × N)
+        dist: 'poisson' ou 'negbinomial' (variância = μ + α·μ², como count_pmf)
+    """
+    mean = np.maximum(mean, 1e-9)
+    if dist == 'negbinomial':
+        r = 1.0 / max(alpha, 0.01)
+        termos = (
+            gammaln(y + r) - gammaln(r) - gammaln(y + 1)
+            + r * np.log(r / (r + mean)) + y * np.log(mean / (r + mean))
+        )
+    else:
+        termos = y * np.log(mean) - mean - gammaln(y + 1)
+    return termos.sum(axis=-1)
+
+
+def fit_factor(
+    base: np.ndarray,
+    y: np.ndarray,
+    inicio: float,
+    limites: Tuple[float, float],
+    dist: str,
+    alpha: float,
+    grade: bool = True
+) -> float:
+    """Fator f que maximiza a verossimilhança de y ~ clip(base·f, limites)."""
+    if grade:
+        candidatos = np.linspace(*FAIXA_FATOR, PONTOS_GRADE)
+        ll = log_likelihood(y, np.clip(base[None, :] * candidatos[:, None], *limites), dist, alpha)
+        inicio = float(candidatos[np.argmax(ll)])
+
+    resultado = minimize(
+        lambda x: -log_likelihood(y, np.clip(base * np.exp(x[0]), *limites), dist, alpha),
+        x0=[np.log(np.clip(inicio, *FAIXA_FATOR))],
+        method='L-BFGS-B',
+        bounds=[tuple(np.log(FAIXA_FATOR))]
+    )
+    return float(np.exp(resultado.x[0]))
+
+
+def fit_betas(
+    features: MatchFeatures,
+    fatores: Dict[str, float],
+    limites: Dict[str, Tuple[float, float]],
+    inicio: Tuple[float, float],
+    dist: str,
+    alpha: float,
+    grade: bool = True
+) -> Tuple[float, float]:
+    """
+    Pesos (ataque, defesa) do modelo log-linear de gols, comuns a mandante e visitante:
+    log(λ) = log(âncora) + β_a·log(ataque) + β_d·log(defesa) + log(fator de mando)
+    """
+    lados = []
+    for nome in ('lambda_mandante', 'lambda_visitante'):
+        ancora, propria, adversario = features.componentes[nome]
+        lados.append((
+            np.log(ancora * fatores[nome]), np.log(propria), np.log(adversario),
+            features.observado[nome], limites[nome]
+        ))
+
+    def _ll(beta_a, beta_d):
+        return sum(
+            log_likelihood(y, np.clip(np.exp(base + beta_a * ataque + beta_d * defesa), *lim), dist, alpha)
+            for base, ataque, defesa, y, lim in lados
+        )
+
+    if grade:
+        candidatos = np.linspace(*FAIXA_BETA, PONTOS_GRADE_BETA)
+        # Todos os pares (β_a, β_d) de uma vez: eixos (β_a × β_d × N)
+        ll = _ll(candidatos[:, None, None], candidatos[None, :, None])
+        i, j = np.unravel_index(np.argmax(ll), ll.shape)
+        inicio = (candidatos[i], candidatos[j])
+
+    resultado = minimize(
+        lambda x: -_ll(x[0], x[1]),
+        x0=list(inicio),
+        method='L-BFGS-B',
+        bounds=[FAIXA_BETA, FAIXA_BETA]
+    )
+    return float(resultado.x[0]), float(resultado.x[1])
+
+
+def fit(
+    features: MatchFeatures,
+    calculator: Optional[ParameterCalculator] = None,
+    distribution_prefs: Optional[Dict[str, str]] = None,
+    grade: bool = True
+) -> dict:
+    """
+    Ajusta fatores e betas (limites do calculator ficam fixos).
+
+    Args:
+        features: Partidas (match_features / combine)
+        calculator: Valores de partida (padrão: ParameterCalculator sem arquivo)
+        distribution_prefs: Distribuição por mercado (padrão: DEFAULT_DIST)
+        grade: Busca em grade antes do L-BFGS-B (evita ótimos locais do clip)
+
+    Returns:
+        Conteúdo do arquivo de parâmetros (ver save_params); valores
+        rejeitados (borda da faixa) ficam em 'rejeitados' e não substituem
+        os anteriores
+    """
+    inicio_ajuste = time.perf_counter()
+    calculator = calculator or ParameterCalculator(None, None, params_path='')
+    prefs = {**DEFAULT_DIST, **(distribution_prefs or {})}
+
+    limites = calculator.LIMITES
+    fatores, verossimilhanca, sem_dados, rejeitados = {}, {}, [], {}
+    for nome, mercado in MERCADO_POR_PARAMETRO.items():
+        ancora, propria, adversario = features.componentes[nome]
+        base = ancora * propria * adversario
+        y = features.observado[nome]
+        dist, alpha = prefs[mercado], ALPHA[mercado]
+        fator = getattr(calculator, calculator.FATOR_POR_PARAMETRO[nome])
+        limite = limites[nome]
+
+        # Mercado sem dados na base (ex: cartões no histórico do backtest)
+        if not y.any():
+            fatores[nome] = fator
+            sem_dados.append(nome)
+            continue
+
+        antes = log_likelihood(y, np.clip(base * fator, *limite), dist, alpha)
+        ajustado = fit_factor(base, y, fator, limite, dist, alpha, grade)
+        if on_boundary(ajustado, FAIXA_FATOR):
+            rejeitados[calculator.FATOR_POR_PARAMETRO[nome]] = round(ajustado, 4)
+        else:
+            fator = ajustado
+
+        fatores[nome] = fator
+        verossimilhanca[nome] = {
+            'antes': float(antes),
+            'depois': float(log_likelihood(y, np.clip(base * fator, *limite), dist, alpha)),
+        }
+
+    betas = (calculator.BETA_ATAQUE, calculator.BETA_DEFESA)
+    if 'lambda_mandante' not in sem_dados:
+        ajustados = fit_betas(features, fatores, limites, betas, prefs['gols'], ALPHA['gols'], grade)
+        for nome, anterior, ajustado in zip(('ataque', 'defesa'), betas, ajustados):
+            if on_boundary(ajustado, FAIXA_BETA):
+                rejeitados[f'beta_{nome}'] = round(ajustado, 4)
+        betas = tuple(
+            anterior if on_boundary(ajustado, FAIXA_BETA) else ajustado
+            for anterior, ajustado in zip(betas, ajustados)
+        )
+
+    return {
+        'formato': ParameterCalculator.FORMATO_PARAMS,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'n_partidas': features.n_partidas,
+        'distribuicoes': prefs,
+        'fatores': {calculator.FATOR_POR_PARAMETRO[nome]: round(v, 4) for nome, v in fatores.items()},
+        'betas': {'ataque': round(betas[0], 4), 'defesa': round(betas[1], 4)},
+        'log_verossimilhanca': verossimilhanca,
+        'sem_dados': sem_dados,
+        'rejeitados': rejeitados,
+        'duracao_ms': (time.perf_counter() - inicio_ajuste) * 1000,
+    }
+
+
+def save_params(path: str, params: dict) -> str:
+    """Grava o JSON (arquivo temporário + os.replace: leitores nunca veem um parcial)."""
+    destino = Path(path)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.params-', suffix='.json', dir=destino.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(params, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return str(destino)
+
+
+def main():
+    """CLI: ajusta os fatores com as partidas do banco ou do histórico do backtest."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ajusta fatores e betas do ParameterCalculator")
+    parser.add_argument('--saida', default=ParameterCalculator.PARAMS_PATH, help='Arquivo de parâmetros')
+    parser.add_argument('--ligas', default='1', help='IDs das ligas, separados por vírgula')
+    parser.add_argument('--temporada', default='2025')
+    parser.add_argument('--partidas', default=None,
+                        help='JSON de partidas do backtest (em vez do banco; sem cartões)')
+    parser.add_argument('--dist', default='', help='Distribuição por mercado, ex: gols=negbinomial')
+    parser.add_argument('--min-jogos', type=int, default=3, help='Jogos anteriores exigidos de cada time')
+    parser.add_argument('--sem-grade', action='store_true', help='Só L-BFGS-B, sem busca em grade')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.partidas:
+        from src.backtest.backtest_engine import BacktestEngine
+
+        timeline, _ = BacktestEngine(args.partidas).build_timeline()
+        features = match_features(timeline, args.min_jogos)
+    else:
+        db_config = {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'port': int(os.getenv('DB_PORT', 5432)),
+            'database': os.getenv('DB_NAME', 'estatisticas'),
+            'user': os.getenv('DB_USER', 'estatisticas_user'),
+            'password': os.getenv('DB_PASS', 'estatisticas_pass')
+        }
+        league_stats = LeagueStats(db_config)
+        features = combine([
+            match_features(league_stats.get_timeline(int(liga), args.temporada), args.min_jogos)
+            for liga in args.ligas.split(',') if liga.strip()
+        ])
+
+    if features.n_partidas == 0:
+        print("⚠️ Nenhuma partida com histórico suficiente para o ajuste")
+        return
+
+    prefs = dict(item.split('=', 1) for item in args.dist.split(',') if '=' in item)
+    params = fit(features, distribution_prefs=prefs, grade=not args.sem_grade)
+    destino = save_params(args.saida, params)
+
+    print(f"✅ Parâmetros em {destino}: {features.n_partidas} partidas, "
+          f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+    parametro_por_fator = {v: k for k, v in ParameterCalculator.FATOR_POR_PARAMETRO.items()}
+    for nome, fator in params['fatores'].items():
+        ll = params['log_verossimilhanca'].get(parametro_por_fator[nome])
+        ganho = f" | log-verossimilhança {ll['antes']:.1f} → {ll['depois']:.1f}" if ll else " | sem dados"
+        print(f"   {nome}: {fator:.3f}{ganho}")
+    print(f"   Betas log-linear: ataque {params['betas']['ataque']:.2f}, defesa {params['betas']['defesa']:.2f}")
+    for nome, valor in params['rejeitados'].items():
+        print(f"   ⚠️ {nome} = {valor:.3f} na borda da faixa de busca: mantido o valor anterior")
+
+
+if __name__ == "__main__":
+    main()
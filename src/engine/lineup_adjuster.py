@@ -5,12 +5,18 @@ Ajusta os parâmetros λ, μ, κ baseado na escalação:
 - Escalação mais ofensiva → λ sobe
 - Escalação com jogadores indisciplinados → μ sobe
 - Jogadores chave fora → ajuste proporcional
+
+Também busca a melhor escalação: atribuição jogador → vaga por método
+húngaro em várias formações, avaliada pelos ratios e pela probabilidade
+analítica de vitória.
 """
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 import numpy as np
+from scipy.optimize import linear_sum_assignment
 
 from src.core.player_model import PlayerModel, PlayerRating
+from src.engine.pricing import outcome_probabilities, price_markets
 
 
 class LineupAdjuster:
@@ -59,20 +65,11 @@ class LineupAdjuster:
         ratios_m = self.player_model.calculate_lineup_ratios(lineup_mandante)
         ratios_v = self.player_model.calculate_lineup_ratios(lineup_visitante)
         
-        def _blend(base_ratio: float, confidence: float) -> float:
-            """Blenda ratio com neutro=1.0 de acordo com confiança (0=ignora lineup)."""
-            conf = max(0.0, min(1.0, confidence))
-            return 1.0 + (base_ratio - 1.0) * conf
-
         adjusted = dict(params)
+        adjusted.update(self.adjust_arrays(
+            params, ratios_m, ratios_v, confidence_mandante, confidence_visitante
+        ))
         adjusted.update({
-            'lambda_mandante': params['lambda_mandante'] * _blend(ratios_m['off_ratio'], confidence_mandante) * max(0.8, min(1.2, 1.0 / _blend(ratios_v.get('off_ratio', 1.0), confidence_visitante))),
-            'lambda_visitante': params['lambda_visitante'] * _blend(ratios_v['off_ratio'], confidence_visitante) * max(0.8, min(1.2, 1.0 / _blend(ratios_m.get('off_ratio', 1.0), confidence_mandante))),
-            'mu_mandante': params['mu_mandante'] * _blend(ratios_m['foul_ratio'], confidence_mandante),
-            'mu_visitante': params['mu_visitante'] * _blend(ratios_v['foul_ratio'], confidence_visitante),
-            'kappa_mandante': params.get('kappa_mandante', 5.0) * _blend(ratios_m['cross_ratio'], confidence_mandante),
-            'kappa_visitante': params.get('kappa_visitante', 4.0) * _blend(ratios_v['cross_ratio'], confidence_visitante),
-            
             # Metadados
             'ajuste_aplicado': True,
             'lineup_ratios': {
@@ -87,6 +84,139 @@ class LineupAdjuster:
         
         return adjusted
     
+    @staticmethod
+    def adjust_arrays(
+        params: dict,
+        ratios_m: dict,
+        ratios_v: dict,
+        confidence_mandante: Union[float, np.ndarray] = 1.0,
+        confidence_visitante: Union[float, np.ndarray] = 1.0
+    ) -> dict:
+        """
+        Aplica os ratios de escalação aos parâmetros (λ, μ, κ).
+        
+        Os ratios (e as confianças) podem ser vetores (um cenário por
+        elemento): o resultado tem o mesmo formato, o que permite ajustar N
+        cenários ou N partidas de uma vez.
+        """
+        def _blend(base_ratio, confidence):
+            """Blenda ratio com neutro=1.0 de acordo com confiança (0=ignora lineup)."""
+            conf = np.clip(confidence, 0.0, 1.0)
+            return 1.0 + (np.asarray(base_ratio) - 1.0) * conf
+        
+        off_m = _blend(ratios_m['off_ratio'], confidence_mandante)
+        off_v = _blend(ratios_v.get('off_ratio', 1.0), confidence_visitante)
+        
+        return {
+            'lambda_mandante': params['lambda_mandante'] * off_m * np.clip(1.0 / off_v, 0.8, 1.2),
+            'lambda_visitante': params['lambda_visitante'] * off_v * np.clip(1.0 / off_m, 0.8, 1.2),
+            'mu_mandante': params['mu_mandante'] * _blend(ratios_m['foul_ratio'], confidence_mandante),
+            'mu_visitante': params['mu_visitante'] * _blend(ratios_v['foul_ratio'], confidence_visitante),
+            'kappa_mandante': params.get('kappa_mandante', 5.0) * _blend(ratios_m['cross_ratio'], confidence_mandante),
+            'kappa_visitante': params.get('kappa_visitante', 4.0) * _blend(ratios_v['cross_ratio'], confidence_visitante),
+        }
+    
+    def absence_impact(
+        self,
+        params: dict,
+        mandante_id: int,
+        visitante_id: int,
+        lineup_mandante: Optional[List[int]] = None,
+        lineup_visitante: Optional[List[int]] = None
+    ) -> Dict:
+        """
+        Efeito em cada mercado da ausência de cada jogador (um por vez).
+        
+        Sem escalação informada, usa o elenco inteiro como base. Todos os
+        cenários "sem o jogador X" dos dois times são calculados juntos:
+        médias leave-one-out vetorizadas → ratios → parâmetros → uma única
+        precificação analítica.
+        
+        Args:
+            params: Parâmetros base da partida (λ, μ, κ e distribution_prefs)
+            
+        Returns:
+            Dict com mercados base e impacto (pontos percentuais) por jogador
+        """
+        lados = []
+        for lado, team_id, lineup in [
+            ('mandante', mandante_id, lineup_mandante),
+            ('visitante', visitante_id, lineup_visitante)
+        ]:
+            if lineup:
+                players = self.player_model.get_ratings(lineup)
+            else:
+                players = self.player_model.get_team_players_ratings(team_id)
+            lados.append((lado, players, self._leave_one_out_ratios(players)))
+        
+        # Cenário 0 = base; depois um cenário por jogador ausente
+        (_, players_m, (base_m, loo_m)), (_, players_v, (base_v, loo_v)) = lados
+        n_m, n_v = len(players_m), len(players_v)
+        
+        ratios_m = {k: np.concatenate([[base_m[k]], loo_m[k], np.full(n_v, base_m[k])]) for k in base_m}
+        ratios_v = {k: np.concatenate([[base_v[k]], np.full(n_m, base_v[k]), loo_v[k]]) for k in base_v}
+        
+        ajustados = self.adjust_arrays(params, ratios_m, ratios_v)
+        mercados = price_markets(ajustados, params.get('distribution_prefs'))
+        
+        base = {k: v[0] for k, v in mercados.items()}
+        delta = {k: v[1:] - v[0] for k, v in mercados.items()}
+        
+        jogadores = []
+        for i, (lado, p) in enumerate(
+            [('mandante', p) for p in players_m] + [('visitante', p) for p in players_v]
+        ):
+            jogadores.append({
+                'id': p.player_id,
+                'nome': p.nome,
+                'posicao': p.posicao,
+                'time': lado,
+                'impacto': {k: self._fmt_mercado(k, d[i]) for k, d in delta.items()}
+            })
+        
+        # Mais relevantes primeiro: maior mudança na probabilidade do resultado
+        jogadores.sort(
+            key=lambda j: -max(abs(j['impacto']['vitoria_mandante']), abs(j['impacto']['vitoria_visitante']))
+        )
+        
+        return {
+            'base': {k: self._fmt_mercado(k, v) for k, v in base.items()},
+            'jogadores': jogadores
+        }
+    
+    def _leave_one_out_ratios(self, players: List[PlayerRating]):
+        """Ratios da escalação completa e sem cada jogador (vetores de N)."""
+        if not players:
+            neutro = self.player_model.ratios_from_strength(50.0, 50.0, 70.0)
+            return neutro, {k: np.zeros(0) for k in neutro}
+        
+        cols = {
+            'ataque': np.array([p.rating_ataque for p in players]),
+            'escanteios': np.array([p.rating_escanteios for p in players]),
+            'disciplina': np.array([p.rating_disciplina for p in players]),
+        }
+        n = len(players)
+        base = self.player_model.ratios_from_strength(
+            *(c.mean() for c in cols.values())
+        )
+        if n == 1:
+            # Sem ninguém, escalação neutra (como calculate_lineup_strength([]))
+            loo = self.player_model.ratios_from_strength(
+                np.array([50.0]), np.array([50.0]), np.array([70.0])
+            )
+        else:
+            loo = self.player_model.ratios_from_strength(
+                *((c.sum() - c) / (n - 1) for c in cols.values())
+            )
+        return base, loo
+    
+    @staticmethod
+    def _fmt_mercado(mercado: str, valor: float) -> float:
+        """Médias (gols/cartões/escanteios) com 3 casas; probabilidades em %."""
+        if mercado.endswith(('_mandante', '_visitante', '_total')) and not mercado.startswith('vitoria'):
+            return round(float(valor), 3)
+        return round(float(valor) * 100, 2)
+    
     def get_key_players_impact(
         self,
         team_id: int,
@@ -120,10 +250,35 @@ class LineupAdjuster:
             'jogadores_ausentes': [p.nome for p in missing]
         }
     
+    # Formações: vagas por posição (sempre 11)
+    FORMACOES = {
+        '4-3-3': {'Goleiro': 1, 'Zagueiro': 2, 'Lateral': 2, 'Volante': 1, 'Meia': 2, 'Atacante': 3},
+        '4-4-2': {'Goleiro': 1, 'Zagueiro': 2, 'Lateral': 2, 'Volante': 2, 'Meia': 2, 'Atacante': 2},
+        '4-2-3-1': {'Goleiro': 1, 'Zagueiro': 2, 'Lateral': 2, 'Volante': 2, 'Meia': 3, 'Atacante': 1},
+        '3-5-2': {'Goleiro': 1, 'Zagueiro': 3, 'Lateral': 2, 'Volante': 1, 'Meia': 2, 'Atacante': 2},
+        '3-4-3': {'Goleiro': 1, 'Zagueiro': 3, 'Lateral': 2, 'Volante': 1, 'Meia': 1, 'Atacante': 3},
+        '5-3-2': {'Goleiro': 1, 'Zagueiro': 3, 'Lateral': 2, 'Volante': 2, 'Meia': 1, 'Atacante': 2},
+    }
+    
+    # Objetivo → (peso extra em ataque, peso extra em defesa, métrica de ranking)
+    OBJETIVOS = {
+        'attack': (1.5, 0.5, 'gols_esperados'),
+        'defense': (0.5, 1.5, 'defesa'),
+        'balanced': (1.0, 1.0, 'prob_vitoria'),
+    }
+    
+    # Jogador fora da posição rende menos; goleiro só joga no gol
+    FATOR_FORA_DE_POSICAO = 0.8
+    CUSTO_PROIBIDO = 1e3
+    
     def suggest_optimal_lineup(
         self,
         team_id: int,
-        objective: str = 'balanced'
+        objective: str = 'balanced',
+        base_params: Optional[dict] = None,
+        mandante: bool = True,
+        top_k: int = 3,
+        formacoes: Optional[List[str]] = None
     ) -> Dict:
         """
         Sugere escalação otimizada para um objetivo.
@@ -131,67 +286,215 @@ class LineupAdjuster:
         Args:
             team_id: ID do time
             objective: 'attack', 'defense', 'balanced'
+            base_params: λ base da partida (lambda_mandante/lambda_visitante)
+            mandante: Se o time joga em casa
+            top_k: Número de escalações alternativas
+            formacoes: Formações a testar (padrão: todas de FORMACOES)
             
         Returns:
-            Dict com escalação sugerida
+            Dict com escalação sugerida e alternativas
         """
-        players = self.player_model.get_team_players_ratings(team_id)
+        result = self.search_lineups(
+            team_id, [objective], base_params, mandante, top_k, formacoes
+        )
+        if 'error' in result:
+            return result
         
+        ranking = result[objective]
+        best = ranking[0]
+        return {
+            'formacao': best['formacao'],
+            'objetivo': objective,
+            'jogadores': best['jogadores'],
+            'strength': best['strength'],
+            'ratios': best['ratios'],
+            'probabilidades': best['probabilidades'],
+            'alternativas': ranking[1:]
+        }
+    
+    def search_lineups(
+        self,
+        team_id: int,
+        objectives: Optional[List[str]] = None,
+        base_params: Optional[dict] = None,
+        mandante: bool = True,
+        top_k: int = 3,
+        formacoes: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Busca as melhores escalações por objetivo.
+        
+        1. Para cada formação e objetivo, resolve a alocação jogador → vaga
+           como problema de atribuição (método húngaro) sobre a matriz de ratings
+        2. Gera vizinhos trocando cada titular pelo melhor substituto
+        3. Avalia todos os candidatos de uma vez: ratios da escalação → λ → 
+           probabilidade analítica de vitória
+        4. Retorna os top-k por objetivo
+        
+        Returns:
+            Dict objetivo -> lista de escalações ordenadas
+        """
+        objectives = objectives or list(self.OBJETIVOS)
+        formacoes = formacoes or list(self.FORMACOES)
+        for obj in objectives:
+            if obj not in self.OBJETIVOS:
+                raise ValueError(f"Objetivo inválido: {obj}")
+        
+        players = self.player_model.get_team_players_ratings(team_id)
         if not players:
             return {'error': 'Sem jogadores'}
         
-        # Separar por posição
-        goleiros = [p for p in players if p.posicao == 'Goleiro']
-        zagueiros = [p for p in players if p.posicao == 'Zagueiro']
-        laterais = [p for p in players if p.posicao == 'Lateral']
-        volantes = [p for p in players if p.posicao == 'Volante']
-        meias = [p for p in players if p.posicao == 'Meia']
-        atacantes = [p for p in players if p.posicao == 'Atacante']
-        
-        # Ordenar por objetivo
-        if objective == 'attack':
-            key_func = lambda p: p.rating_ataque
-        elif objective == 'defense':
-            key_func = lambda p: p.rating_defesa
-        else:  # balanced
-            key_func = lambda p: p.rating_geral
-        
-        # Montar 4-3-3 ou formação similar
-        lineup = []
-        
-        if goleiros:
-            lineup.extend(sorted(goleiros, key=key_func, reverse=True)[:1])
-        if zagueiros:
-            lineup.extend(sorted(zagueiros, key=key_func, reverse=True)[:2])
-        if laterais:
-            lineup.extend(sorted(laterais, key=key_func, reverse=True)[:2])
-        if volantes:
-            lineup.extend(sorted(volantes, key=key_func, reverse=True)[:1])
-        if meias:
-            lineup.extend(sorted(meias, key=key_func, reverse=True)[:2])
-        if atacantes:
-            lineup.extend(sorted(atacantes, key=key_func, reverse=True)[:3])
-        
-        # Completar até 11 se necessário
-        all_sorted = sorted(players, key=key_func, reverse=True)
-        while len(lineup) < 11 and all_sorted:
-            candidate = all_sorted.pop(0)
-            if candidate not in lineup:
-                lineup.append(candidate)
+        ataque = np.array([p.rating_ataque for p in players])
+        defesa = np.array([p.rating_defesa for p in players])
+        
+        # Candidatos únicos (conjunto de jogadores, formação)
+        candidatos = {}
+        for obj in objectives:
+            mult_atk, mult_def, _ = self.OBJETIVOS[obj]
+            for formacao in formacoes:
+                vagas = [pos for pos, n in self.FORMACOES[formacao].items() for _ in range(n)]
+                custo = -self._suitability(players, ataque, defesa, vagas, mult_atk, mult_def)
+                
+                escolhidos = self._assign(custo)
+                candidatos.setdefault(frozenset(escolhidos), formacao)
+                
+                # Vizinhança: tira um titular por vez e re-otimiza
+                for idx in escolhidos:
+                    restantes = np.delete(np.arange(len(players)), idx)
+                    if len(restantes) < len(vagas):
+                        break
+                    alt = restantes[self._assign(custo[restantes])]
+                    candidatos.setdefault(frozenset(alt), formacao)
+        
+        escalacoes = [sorted(c) for c in candidatos]
+        avaliacao = self._evaluate_lineups(players, escalacoes, base_params, mandante)
+        
+        result = {}
+        for obj in objectives:
+            metrica = self.OBJETIVOS[obj][2]
+            ordem = np.argsort(-avaliacao[metrica], kind='stable')[:top_k]
+            result[obj] = [
+                self._lineup_dict(
+                    players, escalacoes[i], candidatos[frozenset(escalacoes[i])], avaliacao, i
+                )
+                for i in ordem
+            ]
+        return result
+    
+    def _suitability(
+        self,
+        players: List[PlayerRating],
+        ataque: np.ndarray,
+        defesa: np.ndarray,
+        vagas: List[str],
+        mult_atk: float,
+        mult_def: float
+    ) -> np.ndarray:
+        """Matriz (jogadores × vagas) com o valor de cada jogador em cada vaga (0-100)."""
+        pesos = self.player_model.PESOS_POSICAO
+        w_atk = np.array([pesos[v]['ataque'] * mult_atk for v in vagas])
+        w_def = np.array([pesos[v]['defesa'] * mult_def for v in vagas])
+        
+        valor = (np.outer(ataque, w_atk) + np.outer(defesa, w_def)) / (w_atk + w_def)
+        
+        posicoes = np.array([p.posicao for p in players])[:, None]
+        vagas_arr = np.array(vagas)[None, :]
+        valor = np.where(posicoes == vagas_arr, valor, valor * self.FATOR_FORA_DE_POSICAO)
+        
+        goleiro = (posicoes == 'Goleiro') != (vagas_arr == 'Goleiro')
+        return np.where(goleiro, -self.CUSTO_PROIBIDO, valor)
+    
+    @staticmethod
+    def _assign(custo: np.ndarray) -> np.ndarray:
+        """Índices dos jogadores escolhidos na atribuição de menor custo."""
+        rows, _ = linear_sum_assignment(custo)
+        return rows
+    
+    def _evaluate_lineups(
+        self,
+        players: List[PlayerRating],
+        escalacoes: List[List[int]],
+        base_params: Optional[dict],
+        mandante: bool
+    ) -> Dict[str, np.ndarray]:
+        """Força, ratios e probabilidades de N escalações de uma vez."""
+        params = base_params or {}
+        lambda_m = params.get('lambda_mandante', 1.5)
+        lambda_v = params.get('lambda_visitante', 1.0)
+        lambda_time, lambda_adv = (lambda_m, lambda_v) if mandante else (lambda_v, lambda_m)
+        
+        # Matriz de pertinência normalizada: média = M @ ratings
+        membros = np.zeros((len(escalacoes), len(players)))
+        for i, escalacao in enumerate(escalacoes):
+            membros[i, escalacao] = 1.0 / len(escalacao)
+        
+        strength = {
+            'ataque': membros @ np.array([p.rating_ataque for p in players]),
+            'defesa': membros @ np.array([p.rating_defesa for p in players]),
+            'disciplina': membros @ np.array([p.rating_disciplina for p in players]),
+            'escanteios': membros @ np.array([p.rating_escanteios for p in players]),
+            'rating_medio': membros @ np.array([p.rating_geral for p in players]),
+        }
+        ratios = self.player_model.ratios_from_strength(
+            strength['ataque'], strength['escanteios'], strength['disciplina']
+        )
+        
+        # Mesma regra de adjust_for_lineup (adversário com escalação neutra)
+        gols_time = lambda_time * ratios['off_ratio']
+        gols_adv = lambda_adv * np.clip(1.0 / ratios['off_ratio'], 0.8, 1.2)
+        if mandante:
+            probs = outcome_probabilities(gols_time, gols_adv)
+            vitoria, empate = probs['vitoria_mandante'], probs['empate']
+        else:
+            probs = outcome_probabilities(gols_adv, gols_time)
+            vitoria, empate = probs['vitoria_visitante'], probs['empate']
         
         return {
-            'formacao': '4-3-3',
-            'objetivo': objective,
+            **strength,
+            **ratios,
+            'gols_esperados': gols_time,
+            'gols_sofridos': gols_adv,
+            'prob_vitoria': vitoria,
+            'prob_empate': empate
+        }
+    
+    def _lineup_dict(
+        self,
+        players: List[PlayerRating],
+        escalacao: List[int],
+        formacao: str,
+        avaliacao: Dict[str, np.ndarray],
+        i: int
+    ) -> Dict:
+        """Formata uma escalação avaliada."""
+        return {
+            'formacao': formacao,
             'jogadores': [
                 {
-                    'id': p.player_id,
-                    'nome': p.nome,
-                    'posicao': p.posicao,
-                    'rating': round(p.rating_geral, 1)
+                    'id': players[j].player_id,
+                    'nome': players[j].nome,
+                    'posicao': players[j].posicao,
+                    'rating': round(players[j].rating_geral, 1)
                 }
-                for p in lineup[:11]
+                for j in escalacao
             ],
-            'strength': self.player_model.calculate_lineup_strength(
-                [p.player_id for p in lineup[:11]]
-            )
+            'strength': {
+                'ataque': float(avaliacao['ataque'][i]),
+                'defesa': float(avaliacao['defesa'][i]),
+                'disciplina': float(avaliacao['disciplina'][i]),
+                'escanteios': float(avaliacao['escanteios'][i]),
+                'rating_medio': float(avaliacao['rating_medio'][i]),
+                'jogadores': len(escalacao)
+            },
+            'ratios': {
+                'off_ratio': round(float(avaliacao['off_ratio'][i]), 4),
+                'cross_ratio': round(float(avaliacao['cross_ratio'][i]), 4),
+                'foul_ratio': round(float(avaliacao['foul_ratio'][i]), 4)
+            },
+            'probabilidades': {
+                'gols_esperados': round(float(avaliacao['gols_esperados'][i]), 3),
+                'gols_sofridos': round(float(avaliacao['gols_sofridos'][i]), 3),
+                'vitoria': round(float(avaliacao['prob_vitoria'][i]) * 100, 1),
+                'empate': round(float(avaliacao['prob_empate'][i]) * 100, 1)
+            }
         }
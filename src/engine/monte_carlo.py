@@ -12,11 +12,13 @@ Para cada partida:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 import numpy as np
 from collections import Counter
 
+from src.core import metrics
 from src.core.distributions import PoissonModel, NegBinomialModel, DistributionFactory
+from src.engine.pricing import ALPHA, DEFAULT_DIST
 
 
 @dataclass
@@ -100,6 +102,70 @@ class SimulationResult:
         }
 
 
+SIMULATIONS_TOTAL = metrics.counter(
+    'simulations_total', 'Partidas simuladas (sorteios) por modo', ['modo']
+)
+SIMULATION_SAMPLES = metrics.histogram(
+    'simulation_samples', 'Simulações por partida em cada chamada', ['modo'],
+    buckets=(1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+)
+
+
+def market_values(gols_m, gols_v, cart_m, cart_v, esc_m, esc_v) -> Dict[str, np.ndarray]:
+    """
+    Valor de cada mercado em cada simulação (indicador 0/1 ou contagem).
+    
+    A média no último eixo é a probabilidade/média do mercado; aceita
+    vetores (uma partida) ou matrizes (partidas × simulações).
+    """
+    gols_total = gols_m + gols_v
+    cart_total = cart_m + cart_v
+    esc_total = esc_m + esc_v
+    return {
+        'vitoria_mandante': gols_m > gols_v,
+        'empate': gols_m == gols_v,
+        'vitoria_visitante': gols_m < gols_v,
+        'gols_mandante': gols_m,
+        'gols_visitante': gols_v,
+        'gols_total': gols_total,
+        'over_1.5': gols_total > 1.5,
+        'over_2.5': gols_total > 2.5,
+        'over_3.5': gols_total > 3.5,
+        'under_2.5': gols_total < 2.5,
+        'btts': (gols_m > 0) & (gols_v > 0),
+        'cartoes_mandante': cart_m,
+        'cartoes_visitante': cart_v,
+        'cartoes_total': cart_total,
+        'cartoes_over_3.5': cart_total > 3.5,
+        'cartoes_over_4.5': cart_total > 4.5,
+        'escanteios_mandante': esc_m,
+        'escanteios_visitante': esc_v,
+        'escanteios_total': esc_total,
+        'escanteios_over_8.5': esc_total > 8.5,
+        'escanteios_over_10.5': esc_total > 10.5,
+    }
+
+
+def running_estimates(somas: Dict[str, np.ndarray], n: int):
+    """
+    Estimativas e erros padrão a partir de somas acumuladas.
+    
+    Args:
+        somas: mercado -> [Σx, Σx²] das simulações até agora
+        n: Simulações até agora
+        
+    Returns:
+        (estimativas, erros_padrao): dicts mercado -> float
+    """
+    estimativas, erros = {}, {}
+    for mercado, (soma, soma_quad) in somas.items():
+        media = soma / n
+        variancia = max(soma_quad / n - media * media, 0.0) * n / max(n - 1, 1)
+        estimativas[mercado] = float(media)
+        erros[mercado] = float(np.sqrt(variancia / n))
+    return estimativas, erros
+
+
 class MonteCarloSimulator:
     """
     Simulador Monte Carlo para partidas de futebol.
@@ -110,6 +176,9 @@ class MonteCarloSimulator:
     
     DEFAULT_SIMULATIONS = 100_000
     
+    # Sorteios por bloco no simulate_batch (partidas × simulações): limita a memória
+    BATCH_BLOCK = 2_000_000
+    
     def __init__(self, n_simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = None):
         """
         Args:
@@ -129,7 +198,11 @@ class MonteCarloSimulator:
         kappa_mandante: float = 5.0,
         kappa_visitante: float = 4.0,
         use_negbinomial_cards: bool = True,
-        distribution_prefs: Optional[Dict[str, str]] = None
+        distribution_prefs: Optional[Dict[str, str]] = None,
+        rng: Optional[np.random.Generator] = None,
+        n_simulations: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        on_chunk: Optional[Callable[[int, Dict[str, float], Dict[str, float]], None]] = None
     ) -> SimulationResult:
         """
         Executa simulação Monte Carlo.
@@ -142,11 +215,21 @@ class MonteCarloSimulator:
             kappa_mandante: κ para escanteios do mandante
             kappa_visitante: κ para escanteios do visitante
             use_negbinomial_cards: Se True, usa NegBinomial para cartões
+            rng: Gerador próprio (permite simular em paralelo sem
+                 disputar o estado global do numpy)
+            n_simulations: Número de simulações desta chamada
+                           (padrão: o do simulador)
+            chunk_size: Sorteia em blocos deste tamanho (padrão: tudo de uma vez)
+            on_chunk: Chamado após cada bloco com (simulações até agora,
+                      estimativas parciais por mercado, erros padrão);
+                      ver running_estimates
             
         Returns:
             SimulationResult com todas as probabilidades
         """
-        n = self.n_simulations
+        n = n_simulations or self.n_simulations
+        SIMULATIONS_TOTAL.inc(n, modo='completo')
+        SIMULATION_SAMPLES.observe(n, modo='completo')
         
         # Criar distribuições
         prefs = distribution_prefs or {}
@@ -176,13 +259,26 @@ class MonteCarloSimulator:
             dist_esc_m = PoissonModel(kappa_mandante)
             dist_esc_v = PoissonModel(kappa_visitante)
         
-        # Simular
-        gols_m = dist_gols_m.sample(n)
-        gols_v = dist_gols_v.sample(n)
-        cart_m = dist_cart_m.sample(n)
-        cart_v = dist_cart_v.sample(n)
-        esc_m = dist_esc_m.sample(n)
-        esc_v = dist_esc_v.sample(n)
+        # Simular (em blocos, se pedido, com estimativas parciais a cada bloco)
+        dists = (dist_gols_m, dist_gols_v, dist_cart_m, dist_cart_v, dist_esc_m, dist_esc_v)
+        bloco = min(chunk_size or n, n)
+        amostras = [[] for _ in dists]
+        somas: Dict[str, np.ndarray] = {}
+        for inicio in range(0, n, bloco):
+            tamanho = min(bloco, n - inicio)
+            for lista, dist in zip(amostras, dists):
+                lista.append(dist.sample(tamanho, random_state=rng))
+            if on_chunk is not None:
+                valores = market_values(*(lista[-1] for lista in amostras))
+                for mercado, v in valores.items():
+                    v = v.astype(float)
+                    soma = somas.setdefault(mercado, np.zeros(2))
+                    soma += (v.sum(), (v * v).sum())
+                on_chunk(inicio + tamanho, *running_estimates(somas, inicio + tamanho))
+        
+        gols_m, gols_v, cart_m, cart_v, esc_m, esc_v = (
+            np.concatenate(lista) for lista in amostras
+        )
         
         # Totais
         gols_total = gols_m + gols_v
@@ -256,7 +352,14 @@ class MonteCarloSimulator:
             intervalo_escanteios_80=intervalo_esc
         )
     
-    def simulate_from_params(self, params: dict) -> SimulationResult:
+    def simulate_from_params(
+        self,
+        params: dict,
+        rng: Optional[np.random.Generator] = None,
+        n_simulations: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        on_chunk: Optional[Callable[[int, Dict[str, float], Dict[str, float]], None]] = None
+    ) -> SimulationResult:
         """
         Simula a partir de um dict de parâmetros.
         
@@ -269,20 +372,27 @@ class MonteCarloSimulator:
             mu_visitante=params.get('mu_visitante', 2.5),
             kappa_mandante=params.get('kappa_mandante', 5.0),
             kappa_visitante=params.get('kappa_visitante', 4.0),
-            distribution_prefs=params.get('distribution_prefs')
+            distribution_prefs=params.get('distribution_prefs'),
+            rng=rng,
+            n_simulations=n_simulations,
+            chunk_size=chunk_size,
+            on_chunk=on_chunk
         )
     
     def quick_simulate(
         self,
         lambda_mandante: float,
-        lambda_visitante: float
+        lambda_visitante: float,
+        n_simulations: Optional[int] = None
     ) -> dict:
         """
         Simulação rápida apenas para gols.
         
         Útil para testes ou quando só precisa do resultado.
         """
-        n = self.n_simulations
+        n = n_simulations or self.n_simulations
+        SIMULATIONS_TOTAL.inc(n, modo='rapido')
+        SIMULATION_SAMPLES.observe(n, modo='rapido')
         
         gols_m = np.random.poisson(lambda_mandante, n)
         gols_v = np.random.poisson(lambda_visitante, n)
@@ -295,3 +405,64 @@ class MonteCarloSimulator:
             'gols_visitante': round(np.mean(gols_v), 2),
             'over_2.5': round(np.sum(gols_m + gols_v > 2.5) / n * 100, 1)
         }
+    
+    def simulate_batch(
+        self,
+        params: Dict[str, np.ndarray],
+        distribution_prefs: Optional[Dict[str, str]] = None,
+        rng: Optional[np.random.Generator] = None,
+        n_simulations: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Simula N partidas de uma vez.
+        
+        Cada sorteio é uma matriz (partidas × simulações) em vez de um
+        simulate() por partida; as partidas são processadas em blocos de
+        até BATCH_BLOCK sorteios.
+        
+        Args:
+            params: Vetores lambda_/mu_/kappa_ mandante/visitante (N partidas)
+            distribution_prefs: Preferência de distribuição da liga
+            rng: Gerador aleatório (padrão: um novo, sem seed)
+            n_simulations: Simulações por partida (padrão: o do simulador)
+            
+        Returns:
+            Dict mercado -> vetor de N probabilidades (0-1) ou médias,
+            com as mesmas chaves de pricing.price_markets
+        """
+        n = n_simulations or self.n_simulations
+        rng = rng if rng is not None else np.random.default_rng()
+        prefs = {**DEFAULT_DIST, **(distribution_prefs or {})}
+        
+        medias = {
+            k: np.maximum(np.atleast_1d(np.asarray(v, dtype=float)), 0.01)
+            for k, v in params.items()
+            if k.split('_')[0] in ('lambda', 'mu', 'kappa')
+        }
+        total = len(medias['lambda_mandante'])
+        linhas = max(1, self.BATCH_BLOCK // n)
+        SIMULATIONS_TOTAL.inc(n * total, modo='lote')
+        SIMULATION_SAMPLES.observe(n, modo='lote')
+        result: Dict[str, np.ndarray] = {}
+        
+        def _draw(mercado: str, media: np.ndarray) -> np.ndarray:
+            media = media[:, None]
+            if prefs[mercado] == 'negbinomial':
+                alpha = ALPHA[mercado]
+                return rng.negative_binomial(1 / alpha, 1 / (1 + alpha * media), size=(len(media), n))
+            return rng.poisson(media, size=(len(media), n))
+        
+        for inicio in range(0, total, linhas):
+            bloco = slice(inicio, inicio + linhas)
+            gols_m = _draw('gols', medias['lambda_mandante'][bloco])
+            gols_v = _draw('gols', medias['lambda_visitante'][bloco])
+            cart_m = _draw('cartoes', medias['mu_mandante'][bloco])
+            cart_v = _draw('cartoes', medias['mu_visitante'][bloco])
+            esc_m = _draw('escanteios', medias['kappa_mandante'][bloco])
+            esc_v = _draw('escanteios', medias['kappa_visitante'][bloco])
+            
+            parcial = market_values(gols_m, gols_v, cart_m, cart_v, esc_m, esc_v)
+            for mercado, valores in parcial.items():
+                result.setdefault(mercado, np.empty(total))[bloco] = valores.mean(axis=-1)
+        
+        return result
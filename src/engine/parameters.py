@@ -13,8 +13,11 @@ Ou forma multiplicativa:
 λ₁ = λ_base × f(A₁) × g(D₂) × h(mando)
 """
 
+import json
+import os
 from dataclasses import dataclass, field
-from typing import Optional
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 import numpy as np
 
 from src.core.league_stats import LeagueStats, LeagueAverages
@@ -67,6 +70,23 @@ class MatchParameters:
         }
 
 
+@dataclass
+class PredictionContext:
+    """
+    Dados de uma previsão carregados uma única vez.
+    
+    Âncoras da liga, forças dos dois times e preferências de distribuição
+    (overdispersão) são passadas adiante pelo pipeline em vez de
+    consultadas de novo em cada etapa.
+    """
+    league_id: int
+    temporada: str
+    league_avg: LeagueAverages
+    mandante: TeamStrength
+    visitante: TeamStrength
+    distribution_prefs: dict = field(default_factory=dict)
+
+
 class ParameterCalculator:
     """
     Calcula os parâmetros λ, μ, κ para uma partida.
@@ -76,6 +96,10 @@ class ParameterCalculator:
     
     Trabalhamos no log para somar efeitos:
     log(λ₁) = log(média) + log(ataque₁) + log(defesa₂) + log(mando)
+    
+    Fatores, limites e pesos do modelo log-linear têm valores padrão abaixo;
+    se existir o arquivo de parâmetros ajustados (src.engine.factor_fit),
+    os valores dele substituem os padrões.
     """
     
     # Fatores de ajuste
@@ -86,9 +110,80 @@ class ParameterCalculator:
     FATOR_MANDANTE_ESCANTEIOS = 1.10
     FATOR_VISITANTE_ESCANTEIOS = 0.95
     
-    def __init__(self, league_stats: LeagueStats, team_model: TeamModel):
+    # Limites (mínimo, máximo) de cada parâmetro
+    LIMITES = {
+        'lambda_mandante': (0.3, 5.0),
+        'lambda_visitante': (0.2, 4.0),
+        'mu_mandante': (1.0, 6.0),
+        'mu_visitante': (1.0, 6.0),
+        'kappa_mandante': (2.0, 12.0),
+        'kappa_visitante': (2.0, 10.0),
+    }
+    
+    # Pesos de ataque e defesa no modelo log-linear (calculate_with_log)
+    BETA_ATAQUE = 0.5
+    BETA_DEFESA = 0.5
+    
+    # Fator de mando aplicado a cada parâmetro
+    FATOR_POR_PARAMETRO = {
+        'lambda_mandante': 'FATOR_MANDANTE_GOLS',
+        'lambda_visitante': 'FATOR_VISITANTE_GOLS',
+        'mu_mandante': 'FATOR_MANDANTE_CARTOES',
+        'mu_visitante': 'FATOR_VISITANTE_CARTOES',
+        'kappa_mandante': 'FATOR_MANDANTE_ESCANTEIOS',
+        'kappa_visitante': 'FATOR_VISITANTE_ESCANTEIOS',
+    }
+    
+    # Parâmetros ajustados (gerados por src.engine.factor_fit)
+    PARAMS_PATH = os.getenv('MODEL_PARAMS', 'data/model_params.json')
+    FORMATO_PARAMS = 1
+    
+    def __init__(
+        self,
+        league_stats: LeagueStats,
+        team_model: TeamModel,
+        params_path: Optional[str] = None
+    ):
+        """
+        Args:
+            params_path: Arquivo de parâmetros ajustados (padrão: PARAMS_PATH;
+                         '' = usar sempre os valores padrão)
+        """
         self.league_stats = league_stats
         self.team_model = team_model
+        self.params_versao: Optional[str] = None
+        
+        path = self.PARAMS_PATH if params_path is None else params_path
+        if path and Path(path).exists():
+            self.load_params(path)
+    
+    def load_params(self, path: str) -> None:
+        """
+        Substitui fatores e pesos pelos valores ajustados (limites só alargam).
+        
+        Raises:
+            ValueError: Arquivo de outro formato
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        if params.get('formato') != self.FORMATO_PARAMS:
+            raise ValueError(
+                f"Parâmetros {path} no formato {params.get('formato')}, esperado {self.FORMATO_PARAMS}: reajuste"
+            )
+        
+        for nome, valor in params.get('fatores', {}).items():
+            if nome in self.FATOR_POR_PARAMETRO.values():
+                setattr(self, nome, float(valor))
+        # Limites são proteção: um arquivo pode alargá-los, nunca apertá-los
+        limites = dict(self.LIMITES)
+        for nome, (minimo, maximo) in params.get('limites', {}).items():
+            if nome in limites:
+                limites[nome] = (min(limites[nome][0], minimo), max(limites[nome][1], maximo))
+        self.LIMITES = limites
+        betas = params.get('betas', {})
+        self.BETA_ATAQUE = float(betas.get('ataque', self.BETA_ATAQUE))
+        self.BETA_DEFESA = float(betas.get('defesa', self.BETA_DEFESA))
+        self.params_versao = params.get('criado_em')
     
     def calculate(
         self,
@@ -116,6 +211,58 @@ class ParameterCalculator:
         mandante = self.team_model.calculate_team_strength(mandante_id, league_id, temporada)
         visitante = self.team_model.calculate_team_strength(visitante_id, league_id, temporada)
         
+        return self.calculate_from_strengths(league_avg, mandante, visitante)
+    
+    def load_context(
+        self,
+        mandante_id: int,
+        visitante_id: int,
+        league_id: int,
+        temporada: str = "2025",
+        as_of=None
+    ) -> PredictionContext:
+        """
+        Carrega âncoras, forças e dispersão de uma partida.
+        
+        Args:
+            as_of: Se informado, usa apenas jogos anteriores a essa data
+        """
+        if as_of is not None:
+            league_avg = self.league_stats.averages_as_of(league_id, as_of, temporada)
+            mandante = self.team_model.strength_as_of(mandante_id, league_id, as_of, temporada)
+            visitante = self.team_model.strength_as_of(visitante_id, league_id, as_of, temporada)
+        else:
+            league_avg = self.league_stats.calculate_averages(league_id, temporada)
+            mandante = self.team_model.calculate_team_strength(mandante_id, league_id, temporada)
+            visitante = self.team_model.calculate_team_strength(visitante_id, league_id, temporada)
+        
+        return PredictionContext(
+            league_id=league_id,
+            temporada=temporada,
+            league_avg=league_avg,
+            mandante=mandante,
+            visitante=visitante,
+            distribution_prefs=self.league_stats.get_distribution_prefs(league_id, temporada)
+        )
+    
+    def calculate_from_context(self, ctx: PredictionContext) -> MatchParameters:
+        """Calcula parâmetros a partir de um PredictionContext já carregado."""
+        params = self.calculate_from_strengths(ctx.league_avg, ctx.mandante, ctx.visitante)
+        params.base_params['distribution_prefs'] = ctx.distribution_prefs
+        return params
+    
+    def calculate_from_strengths(
+        self,
+        league_avg: LeagueAverages,
+        mandante: TeamStrength,
+        visitante: TeamStrength
+    ) -> MatchParameters:
+        """
+        Calcula parâmetros a partir de âncoras e forças já carregadas.
+        
+        Permite usar snapshots "as-of" (backtests sem vazamento) ou
+        estados pré-carregados sem novas consultas ao banco.
+        """
         # Calcular λ (gols)
         lambda_m, lambda_v, lambda_meta = self._calculate_goals_lambda(
             league_avg, mandante, visitante
@@ -216,8 +363,8 @@ class ParameterCalculator:
             }
         }
         
-        lambda_m = max(0.3, min(lambda_m, 5.0))
-        lambda_v = max(0.2, min(lambda_v, 4.0))
+        lambda_m = self._limitar('lambda_mandante', lambda_m)
+        lambda_v = self._limitar('lambda_visitante', lambda_v)
         
         return lambda_m, lambda_v, raw_meta
     
@@ -258,8 +405,8 @@ class ParameterCalculator:
             }
         }
         
-        mu_m = max(1.0, min(mu_m, 6.0))
-        mu_v = max(1.0, min(mu_v, 6.0))
+        mu_m = self._limitar('mu_mandante', mu_m)
+        mu_v = self._limitar('mu_visitante', mu_v)
         
         return mu_m, mu_v, raw_meta
     
@@ -300,11 +447,63 @@ class ParameterCalculator:
             }
         }
         
-        kappa_m = max(2.0, min(kappa_m, 12.0))
-        kappa_v = max(2.0, min(kappa_v, 10.0))
+        kappa_m = self._limitar('kappa_mandante', kappa_m)
+        kappa_v = self._limitar('kappa_visitante', kappa_v)
         
         return kappa_m, kappa_v, raw_meta
     
+    def _limitar(self, nome: str, valor: float) -> float:
+        minimo, maximo = self.LIMITES[nome]
+        return max(minimo, min(valor, maximo))
+    
+    @staticmethod
+    def components(
+        league_avg: LeagueAverages,
+        mandante: Dict[str, np.ndarray],
+        visitante: Dict[str, np.ndarray]
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Termos de cada parâmetro antes do fator de mando e dos limites.
+        
+        Returns:
+            Dict PARAM_COLUMNS -> (âncora da liga, força própria, força do adversário)
+        """
+        def _termos(ancora, propria, adversario):
+            return tuple(np.asarray(v, dtype=float) for v in (ancora, propria, adversario))
+        
+        return {
+            'lambda_mandante': _termos(league_avg.gols_mandante, mandante['ataque_casa'], visitante['defesa_fora']),
+            'lambda_visitante': _termos(league_avg.gols_visitante, visitante['ataque_fora'], mandante['defesa_casa']),
+            'mu_mandante': _termos(league_avg.cartoes_mandante, mandante['cartoes_favor'], visitante['cartoes_contra']),
+            'mu_visitante': _termos(league_avg.cartoes_visitante, visitante['cartoes_favor'], mandante['cartoes_contra']),
+            'kappa_mandante': _termos(league_avg.escanteios_mandante, mandante['escanteios_favor'], visitante['escanteios_contra']),
+            'kappa_visitante': _termos(league_avg.escanteios_visitante, visitante['escanteios_favor'], mandante['escanteios_contra']),
+        }
+    
+    def parameter_arrays(
+        self,
+        league_avg: LeagueAverages,
+        mandante: Dict[str, np.ndarray],
+        visitante: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        λ, μ, κ de N partidas de uma vez (versão vetorizada de calculate_from_strengths).
+        
+        Args:
+            league_avg: LeagueAverages com campos escalares ou vetores de N
+            mandante, visitante: Forças no formato de TeamModel.strength_arrays
+            
+        Returns:
+            Dict PARAM_COLUMNS -> vetor de N
+        """
+        return {
+            nome: np.clip(
+                ancora * propria * adversario * getattr(self, self.FATOR_POR_PARAMETRO[nome]),
+                *self.LIMITES[nome]
+            )
+            for nome, (ancora, propria, adversario) in self.components(league_avg, mandante, visitante).items()
+        }
+    
     def calculate_with_log(
         self,
         mandante_id: int,
@@ -324,10 +523,10 @@ class ParameterCalculator:
         mandante = self.team_model.calculate_team_strength(mandante_id, league_id, temporada)
         visitante = self.team_model.calculate_team_strength(visitante_id, league_id, temporada)
         
-        # Coeficientes (podem ser calibrados)
+        # Coeficientes (ajustados por src.engine.factor_fit quando houver arquivo)
         beta_0 = np.log(league_avg.gols_mandante)  # Intercepto
-        beta_ataque = 0.5  # Peso do ataque
-        beta_defesa = 0.5  # Peso da defesa
+        beta_ataque = self.BETA_ATAQUE  # Peso do ataque
+        beta_defesa = self.BETA_DEFESA  # Peso da defesa
         beta_mando = np.log(self.FATOR_MANDANTE_GOLS)
         
         # Log-linear para mandante
@@ -346,16 +545,16 @@ class ParameterCalculator:
             np.log(self.FATOR_VISITANTE_GOLS)
         )
         
-        lambda_m = np.exp(log_lambda_m)
-        lambda_v = np.exp(log_lambda_v)
+        lambda_m = self._limitar('lambda_mandante', float(np.exp(log_lambda_m)))
+        lambda_v = self._limitar('lambda_visitante', float(np.exp(log_lambda_v)))
         
         # Cartões e escanteios seguem mesma lógica
-        mu_m, mu_v = self._calculate_cards_mu(league_avg, mandante, visitante)
-        kappa_m, kappa_v = self._calculate_corners_kappa(league_avg, mandante, visitante)
+        mu_m, mu_v, _ = self._calculate_cards_mu(league_avg, mandante, visitante)
+        kappa_m, kappa_v, _ = self._calculate_corners_kappa(league_avg, mandante, visitante)
         
         return MatchParameters(
-            lambda_mandante=max(0.3, min(lambda_m, 5.0)),
-            lambda_visitante=max(0.2, min(lambda_v, 4.0)),
+            lambda_mandante=lambda_m,
+            lambda_visitante=lambda_v,
             lambda_total=lambda_m + lambda_v,
             mu_mandante=mu_m,
             mu_visitante=mu_v,
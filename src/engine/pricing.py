@@ -0,0 +1,153 @@
+"""
+ETAPA 8.1 - Precificação Analítica
+
+Probabilidades exatas (sem sorteio) a partir de λ, μ, κ:
+- Distribuições de contagem truncadas em um máximo de eventos
+- Grade de placares = produto externo das duas distribuições (times independentes)
+- Vetorizado: recebe vetores de parâmetros e precifica N cenários de uma vez
+
+Usa as mesmas distribuições do MonteCarloSimulator (Poisson ou NegBinomial
+com os mesmos α), então converge para o resultado da simulação, mas custa
+microssegundos por cenário em vez de 100k sorteios.
+"""
+
+from typing import Dict, Optional
+import numpy as np
+from scipy import stats
+
+
+# Dispersão α da NegBinomial por mercado (mesmos valores do MonteCarloSimulator)
+ALPHA = {'gols': 0.35, 'cartoes': 0.5, 'escanteios': 0.25}
+
+# Distribuição usada quando não há preferência da liga
+DEFAULT_DIST = {'gols': 'poisson', 'cartoes': 'negbinomial', 'escanteios': 'poisson'}
+
+# Truncamento da distribuição (a massa acima disso é desprezível para futebol)
+MAX_GOLS = 12
+
+
+def count_pmf(mean, max_k: int, dist: str = 'poisson', alpha: float = 0.5) -> np.ndarray:
+    """
+    P(X = k) para k = 0..max_k, para cada média do vetor.
+
+    Args:
+        mean: Média (escalar ou vetor de N médias)
+        max_k: Maior contagem considerada
+        dist: 'poisson' ou 'negbinomial'
+        alpha: Dispersão da NegBinomial (variância = μ + α·μ²)
+
+    Returns:
+        Matriz (N × max_k+1)
+    """
+    mean = np.maximum(np.atleast_1d(np.asarray(mean, dtype=float)), 0.01)[:, None]
+    k = np.arange(max_k + 1)[None, :]
+
+    if dist == 'negbinomial':
+        alpha = max(alpha, 0.01)
+        return stats.nbinom.pmf(k, 1 / alpha, 1 / (1 + alpha * mean))
+    return stats.poisson.pmf(k, mean)
+
+
+def outcome_probabilities(
+    lambda_mandante,
+    lambda_visitante,
+    distribution_prefs: Optional[Dict[str, str]] = None,
+    max_gols: int = MAX_GOLS
+) -> Dict[str, np.ndarray]:
+    """
+    Probabilidades de vitória/empate/derrota e gols esperados.
+
+    Args:
+        lambda_mandante: Gols esperados do mandante (escalar ou vetor)
+        lambda_visitante: Gols esperados do visitante (escalar ou vetor)
+        distribution_prefs: Preferência de distribuição da liga (ex: {'gols': 'negbinomial'})
+
+    Returns:
+        Dict de vetores (um elemento por cenário): vitoria_mandante, empate,
+        vitoria_visitante, gols_mandante, gols_visitante
+    """
+    dist = (distribution_prefs or {}).get('gols', DEFAULT_DIST['gols'])
+    pm = count_pmf(lambda_mandante, max_gols, dist, ALPHA['gols'])
+    pv = count_pmf(lambda_visitante, max_gols, dist, ALPHA['gols'])
+
+    # Grade de placares (N × gols mandante × gols visitante)
+    grid = pm[:, :, None] * pv[:, None, :]
+    k = np.arange(max_gols + 1)
+    casa, fora = np.meshgrid(k, k, indexing='ij')
+
+    return {
+        'vitoria_mandante': (grid * (casa > fora)).sum(axis=(1, 2)),
+        'empate': (grid * (casa == fora)).sum(axis=(1, 2)),
+        'vitoria_visitante': (grid * (casa < fora)).sum(axis=(1, 2)),
+        'gols_mandante': pm @ k,
+        'gols_visitante': pv @ k
+    }
+
+
+# Truncamento para cartões/escanteios (médias bem abaixo disso)
+MAX_CONTAGEM = 40
+
+
+def prob_total_over(pmf_a: np.ndarray, pmf_b: np.ndarray, linha: float) -> np.ndarray:
+    """
+    P(A + B > linha) para cada cenário, com A e B independentes.
+
+    Args:
+        pmf_a, pmf_b: Matrizes (N × K) de P(X = k)
+        linha: Linha do mercado (ex: 2.5)
+    """
+    t = int(np.floor(linha))
+    i = np.arange(t + 1)
+    cdf_b = np.cumsum(pmf_b, axis=1)
+    return 1.0 - (pmf_a[:, i] * cdf_b[:, t - i]).sum(axis=1)
+
+
+def price_markets(
+    params: Dict[str, np.ndarray],
+    distribution_prefs: Optional[Dict[str, str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Precifica todos os mercados do SimulationResult para N cenários de uma vez.
+
+    Args:
+        params: lambda_/mu_/kappa_ mandante/visitante (escalares ou vetores de N)
+        distribution_prefs: Preferência de distribuição por mercado
+
+    Returns:
+        Dict mercado -> vetor de probabilidades (0-1) ou médias
+    """
+    prefs = {**DEFAULT_DIST, **(distribution_prefs or {})}
+
+    def _pmfs(mercado: str, prefixo: str, max_k: int):
+        return (
+            count_pmf(params[f'{prefixo}_mandante'], max_k, prefs[mercado], ALPHA[mercado]),
+            count_pmf(params[f'{prefixo}_visitante'], max_k, prefs[mercado], ALPHA[mercado])
+        )
+
+    result = outcome_probabilities(
+        params['lambda_mandante'], params['lambda_visitante'], prefs, MAX_GOLS
+    )
+    gols_m, gols_v = _pmfs('gols', 'lambda', MAX_GOLS)
+    cart_m, cart_v = _pmfs('cartoes', 'mu', MAX_CONTAGEM)
+    esc_m, esc_v = _pmfs('escanteios', 'kappa', MAX_CONTAGEM)
+    k = np.arange(MAX_CONTAGEM + 1)
+
+    result.update({
+        'gols_total': result['gols_mandante'] + result['gols_visitante'],
+        'over_1.5': prob_total_over(gols_m, gols_v, 1.5),
+        'over_2.5': prob_total_over(gols_m, gols_v, 2.5),
+        'over_3.5': prob_total_over(gols_m, gols_v, 3.5),
+        'btts': (1.0 - gols_m[:, 0]) * (1.0 - gols_v[:, 0]),
+        'cartoes_mandante': cart_m @ k,
+        'cartoes_visitante': cart_v @ k,
+        'cartoes_over_3.5': prob_total_over(cart_m, cart_v, 3.5),
+        'cartoes_over_4.5': prob_total_over(cart_m, cart_v, 4.5),
+        'escanteios_mandante': esc_m @ k,
+        'escanteios_visitante': esc_v @ k,
+        'escanteios_over_8.5': prob_total_over(esc_m, esc_v, 8.5),
+        'escanteios_over_10.5': prob_total_over(esc_m, esc_v, 10.5),
+    })
+    result['under_2.5'] = 1.0 - result['over_2.5']
+    result['cartoes_total'] = result['cartoes_mandante'] + result['cartoes_visitante']
+    result['escanteios_total'] = result['escanteios_mandante'] + result['escanteios_visitante']
+    return result
@@ -330,36 +330,66 @@ def get_players(team_id: int):
         st.error(f"Erro ao buscar jogadores: {str(e)}")
         return []
 
-def predict_match(home_id: int, away_id: int, n_simulations: int = 50_000, lineup_confidence: float = 1.0):
-    """Faz predição de partida (sem cache para garantir valores únicos)."""
+def predict_match(home_id: int, away_id: int, n_simulations: int = 50_000, lineup_confidence: float = 1.0, on_progress=None):
+    """
+    Faz predição de partida (sem cache para garantir valores únicos).
+    
+    Usa o endpoint de streaming: on_progress(evento) recebe as estimativas
+    parciais (com erro padrão) enquanto o Monte Carlo roda.
+    """
     try:
-        payload = {
+        match = {
             "mandante_id": home_id,
             "visitante_id": away_id,
-            "n_simulations": n_simulations,
             "lineup_confidence_mandante": lineup_confidence,
             "lineup_confidence_visitante": lineup_confidence
         }
         if st.session_state.get('lineup_home_ids'):
-            payload["lineup_mandante"] = st.session_state['lineup_home_ids']
+            match["lineup_mandante"] = st.session_state['lineup_home_ids']
         if st.session_state.get('lineup_away_ids'):
-            payload["lineup_visitante"] = st.session_state['lineup_away_ids']
+            match["lineup_visitante"] = st.session_state['lineup_away_ids']
+        payload = {
+            "matches": [match],
+            "n_simulations": n_simulations,
+            "chunk_size": max(n_simulations // 10, 1000)
+        }
 
-        response = requests.post(
-            f"{API_BASE_URL}/predict",
+        with requests.post(
+            f"{API_BASE_URL}/predict/stream",
             json=payload,
+            stream=True,
             timeout=60
-        )
-        if response.status_code == 200:
-            result = response.json()
-            return result
-        else:
-            st.error(f"Erro na API: {response.status_code} - {response.text}")
-            return None
+        ) as response:
+            if response.status_code != 200:
+                st.error(f"Erro na API: {response.status_code} - {response.text}")
+                return None
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                evento = json.loads(line)
+                if evento['evento'] == 'parcial' and on_progress:
+                    on_progress(evento)
+                elif evento['evento'] == 'partida':
+                    return evento['previsao']
+                elif evento['evento'] == 'erro':
+                    st.error(f"Erro na predição: {evento['detalhe']}")
+                    return None
+        return None
     except Exception as e:
         st.error(f"Erro na predição: {str(e)}")
         return None
 
+def show_progress(placeholder, evento):
+    """Estimativa parcial do resultado (± 2 erros padrão)."""
+    est, ep = evento['estimativas'], evento['erro_padrao']
+    partes = [
+        f"{nome} {est[k] * 100:.1f}% ± {2 * ep[k] * 100:.1f}"
+        for nome, k in [("Casa", 'vitoria_mandante'), ("Empate", 'empate'), ("Fora", 'vitoria_visitante')]
+    ]
+    placeholder.info(
+        f"🎲 {evento['simulacoes']:,} simulações • ".replace(",", ".") + " | ".join(partes)
+    )
+
 def format_percentage(value):
     """Formata percentual."""
     return f"{value:.1f}%"
@@ -542,8 +572,13 @@ def show_prediction_tab(show_stats, show_confidence, n_simulations):
                 st.warning("⚠️ Escalação do visitante sem goleiro")
                 return
             
+            progresso = st.empty()
             with st.spinner(f"🔮 Simulando {n_simulations:,} partidas...".replace(",", ".")):
-                prediction = predict_match(team_dict[home_team], team_dict[away_team], n_simulations, lineup_confidence)
+                prediction = predict_match(
+                    team_dict[home_team], team_dict[away_team], n_simulations, lineup_confidence,
+                    on_progress=lambda evento: show_progress(progresso, evento)
+                )
+            progresso.empty()
             
             if prediction:
                 display_prediction(prediction, home_team, away_team, show_stats, show_confidence)
@@ -6,6 +6,8 @@ Uso:
     python run_backtest.py --fetch    # Buscar partidas históricas
     python run_backtest.py --run      # Executar backtest
     python run_backtest.py --all      # Buscar + backtest + calibrar
+    python run_backtest.py --walk-forward --variante negbin --dist gols=negbinomial
+    python run_backtest.py --comparar # Comparar variantes do walk-forward
 """
 
 import argparse
@@ -17,7 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from backtest.backtest_engine import BacktestEngine
 from backtest.calibration import Calibrator
-from poisson_analyzer import PoissonAnalyzer
+from backtest.walk_forward import WalkForwardRunner, compare_variants
 
 
 def main():
@@ -27,15 +29,24 @@ def main():
     parser.add_argument('--calibrate', action='store_true', help='Treinar calibradores')
     parser.add_argument('--all', action='store_true', help='Executar tudo')
     parser.add_argument('--status', action='store_true', help='Mostrar status')
+    parser.add_argument('--walk-forward', action='store_true', help='Walk-forward rodada a rodada')
+    parser.add_argument('--variante', default='base', help='Nome da variante do walk-forward')
+    parser.add_argument('--dist', default='', help='Distribuição por mercado, ex: gols=negbinomial,escanteios=poisson')
+    parser.add_argument('--metodo', default='auto', choices=['auto', 'platt', 'isotonic', 'nenhum'],
+                        help='Calibração treinada a cada rodada')
+    parser.add_argument('--workers', type=int, default=None, help='Processos do walk-forward')
+    parser.add_argument('--refazer', action='store_true', help='Recalcular rodadas já gravadas')
+    parser.add_argument('--comparar', action='store_true', help='Comparar variantes do walk-forward')
     
     args = parser.parse_args()
     
     # Se nenhuma flag, mostrar status
-    if not any([args.fetch, args.run, args.calibrate, args.all, args.status]):
+    if not any([args.fetch, args.run, args.calibrate, args.all, args.status, args.walk_forward, args.comparar]):
         args.status = True
     
     # Paths
     data_path = Path(__file__).parent.parent / 'data'
+    walk_forward_path = data_path / 'walk_forward'
     
     engine = BacktestEngine(str(data_path / 'backtest_matches.json'))
     
@@ -72,6 +83,8 @@ def main():
         print("   python run_backtest.py --run        # Executar backtest")
         print("   python run_backtest.py --calibrate  # Treinar calibradores")
         print("   python run_backtest.py --all        # Tudo")
+        print("   python run_backtest.py --walk-forward --variante base")
+        print("   python run_backtest.py --comparar   # Comparar variantes")
         print("=" * 60)
         return
     
@@ -92,14 +105,8 @@ def main():
             print("⚠️ Poucos dados para backtest. Execute --fetch primeiro.")
             return
         
-        # Carregar analyzer
-        analyzer = PoissonAnalyzer(
-            jogadores_path=str(data_path / 'jogadores.json'),
-            times_path=str(data_path / 'times.json')
-        )
-        
-        # Executar backtest
-        results = engine.run_backtest(analyzer)
+        # Executar backtest (forças "as-of" de cada partida, sem vazamento)
+        results = engine.run_backtest()
         
         if not results:
             print("⚠️ Nenhum resultado de backtest")
@@ -113,6 +120,7 @@ def main():
             print(f"\n🎯 {market.upper()}")
             print(f"   Amostras: {result.n_samples}")
             print(f"   Brier Score: {result.brier_score:.4f}")
+            print(f"   Log-loss: {result.log_loss:.4f}")
             print(f"   Accuracy: {result.accuracy*100:.1f}%")
             
             print("   Análise por faixa:")
@@ -140,6 +148,43 @@ def main():
     elif args.calibrate:
         print("⚠️ Para calibrar, execute --run primeiro para gerar previsões.")
     
+    if args.walk_forward:
+        print("\n" + "=" * 60)
+        print("🔁 WALK-FORWARD")
+        print("=" * 60)
+        
+        if engine.get_summary().get('n_matches', 0) < 20:
+            print("⚠️ Poucos dados para backtest. Execute --fetch primeiro.")
+            return
+        
+        prefs = dict(item.split('=', 1) for item in args.dist.split(',') if '=' in item) or None
+        runner = WalkForwardRunner(
+            engine,
+            variante=args.variante,
+            distribution_prefs=prefs,
+            metodo=args.metodo,
+            max_workers=args.workers,
+            output_dir=str(walk_forward_path)
+        )
+        runner.run(refazer=args.refazer)
+    
+    if args.comparar or args.walk_forward:
+        resumos = compare_variants(str(walk_forward_path))
+        if not resumos:
+            print("⚠️ Nenhuma variante gravada. Execute --walk-forward primeiro.")
+        else:
+            print("\n📊 VARIANTES (Brier / log-loss, bruto → calibrado):")
+            print("-" * 60)
+            for market in next(iter(resumos.values()))['mercados']:
+                print(f"\n🎯 {market.upper()}")
+                for variante, resumo in resumos.items():
+                    m = resumo['mercados'].get(market)
+                    if m is None:
+                        continue
+                    print(f"   {variante:>12}: {m['brier']:.4f} → {m['brier_calibrado']:.4f}"
+                          f" | {m['log_loss']:.4f} → {m['log_loss_calibrado']:.4f}"
+                          f" | N={resumo['partidas']}")
+    
     print("\n✅ Concluído!")
 
 
@@ -8,6 +8,7 @@ Coleta dados de partidas do Brasileirão seguindo a especificação:
 - Escalações e minutos jogados
 """
 
+import os
 import json
 import time
 import random
@@ -44,6 +45,13 @@ class MatchScraper:
         "Origin": "https://www.sofascore.com"
     }
     
+    # Endpoint da API para invalidar caches de forças após novos jogos
+    CACHE_INVALIDATE_URL = os.getenv(
+        'CACHE_INVALIDATE_URL', 'http://localhost:8000/api/cache/invalidate'
+    )
+    # Token compartilhado com a API (mesmo CACHE_INVALIDATE_TOKEN do servidor)
+    CACHE_INVALIDATE_TOKEN = os.getenv('CACHE_INVALIDATE_TOKEN', '')
+    
     def __init__(self, db_config: Dict[str, str]):
         """Inicializa o scraper com configuração do banco."""
         self.session = requests.Session()
@@ -60,8 +68,10 @@ class MatchScraper:
         
         # Cache de mapeamento sofascore_id -> db_id
         self.team_mapping = {}
+        self.team_league = {}  # team_id -> league_id
         self.player_mapping = {}
         self.existing_event_ids = set()  # Cache de eventos já no banco
+        self.touched_team_ids = set()  # Times com partidas novas (para invalidar cache)
     
     def connect_db(self):
         """Conecta ao banco de dados."""
@@ -148,11 +158,12 @@ class MatchScraper:
         self.connect_db()
         
         with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT id, sofascore_id FROM teams WHERE sofascore_id IS NOT NULL")
+            cur.execute("SELECT id, sofascore_id, league_id FROM teams WHERE sofascore_id IS NOT NULL")
             rows = cur.fetchall()
             
             for row in rows:
                 self.team_mapping[row['sofascore_id']] = row['id']
+                self.team_league[row['id']] = row['league_id']
         
         logger.info(f"✅ {len(self.team_mapping)} times mapeados")
     
@@ -381,6 +392,7 @@ class MatchScraper:
                 
                 match_id = cur.fetchone()[0]
                 self.conn.commit()
+                self.touched_team_ids.update((home_team_id, away_team_id))
                 
                 logger.info(f"✅ Partida salva: ID {match_id} - {match_data['homeTeam']['name']} {match_insert['home_goals']} x {match_insert['away_goals']} {match_data['awayTeam']['name']}")
                 return match_id
@@ -390,6 +402,38 @@ class MatchScraper:
             logger.error(f"Erro ao salvar partida: {e}")
             return None
     
+    def notify_cache_invalidation(self):
+        """
+        Avisa a API que os times com partidas novas devem ser recalculados.
+        
+        Uma requisição por liga (league_id dos times), autenticada com
+        CACHE_INVALIDATE_TOKEN. Falhas são apenas registradas: o TTL do
+        cache garante a atualização mesmo se a API estiver fora do ar.
+        """
+        if not self.touched_team_ids:
+            return
+        if not self.CACHE_INVALIDATE_TOKEN:
+            logger.warning("CACHE_INVALIDATE_TOKEN não configurado: cache da API não invalidado")
+            return
+        
+        por_liga = {}
+        for team_id in self.touched_team_ids:
+            por_liga.setdefault(self.team_league.get(team_id), []).append(team_id)
+        
+        for league_id, team_ids in por_liga.items():
+            try:
+                r = requests.post(
+                    self.CACHE_INVALIDATE_URL,
+                    json={'team_ids': sorted(team_ids), 'league_id': league_id},
+                    headers={'X-Cache-Token': self.CACHE_INVALIDATE_TOKEN},
+                    timeout=5
+                )
+                r.raise_for_status()
+                logger.info(f"🧹 Cache invalidado para {len(team_ids)} times (liga {league_id})")
+                self.touched_team_ids.difference_update(team_ids)
+            except requests.RequestException as e:
+                logger.warning(f"Não foi possível invalidar o cache da API (liga {league_id}): {e}")
+    
     def save_lineup(self, match_id: int, match_data: Dict, lineup_data: Dict):
         """Salva escalação da partida."""
         self.connect_db()
@@ -638,6 +682,7 @@ class MatchScraper:
         print(f"Partidas já existentes: {skipped_count}")
         print(f"{'='*60}\n")
         
+        self.notify_cache_invalidation()
         self.close_db()
 
 